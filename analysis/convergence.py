@@ -1,13 +1,104 @@
+import copy
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 from simulation.engine import SimulationEngine
+from simulation.modes import DeterministicMode
+from simulation.random_generators import MersenneTwister
 from models.environment import Environment
 from models.clan import Clan
 import json
 
 CONVERGENCE_TOLERANCE = 0.05
 
-def run_simulation_for_convergence(initial_conditions, total_steps, dt):
-    
+
+def compact_state(engine):
+    """Estado mínimo para convergencia: tamaños de clanes y copia de la rejilla."""
+    return {
+        'time': engine.time,
+        'clans': [{'id': clan.id, 'size': float(clan.size)} for clan in engine.clans],
+        'resource_grid': engine.environment.grid.copy()
+    }
+
+
+class FinalStateReducer:
+    """Conserva solo el estado final de la ejecución."""
+    name = 'final_state'
+
+    def __init__(self):
+        self.state = None
+
+    def update(self, engine):
+        pass
+
+    def finalize(self, engine):
+        self.state = compact_state(engine)
+
+    def result(self):
+        return self.state
+
+
+class CheckpointReducer:
+    """Muestrea el estado compacto cada `interval` unidades de tiempo de simulación."""
+    name = 'checkpoints'
+
+    def __init__(self, interval=1.0, include_grid=False):
+        self.interval = interval
+        self.include_grid = include_grid
+        self.checkpoints = {}
+        self._next_time = 0.0
+
+    def _sample(self, engine):
+        state = compact_state(engine)
+        if not self.include_grid:
+            state['total_resources'] = float(state.pop('resource_grid').sum())
+        self.checkpoints[round(engine.time, 9)] = state
+
+    def update(self, engine):
+        if engine.time + 1e-9 >= self._next_time:
+            self._sample(engine)
+            self._next_time += self.interval
+
+    def finalize(self, engine):
+        if round(engine.time, 9) not in self.checkpoints:
+            self._sample(engine)
+
+    def result(self):
+        return self.checkpoints
+
+
+class L2ErrorReducer:
+    """Error L2 frente a un estado de referencia, calculado sin guardar la trayectoria.
+
+    `reference` puede ser un estado (se compara con el estado final) o un
+    diccionario {tiempo: estado}; en ese caso se compara en cada tiempo.
+    """
+    name = 'l2_error'
+
+    def __init__(self, reference):
+        if 'clans' in reference:
+            self.reference = None
+            self.final_reference = reference
+        else:
+            self.reference = {round(float(t), 9): state for t, state in reference.items()}
+            self.final_reference = None
+        self.errors = {}
+
+    def update(self, engine):
+        if self.reference:
+            key = round(engine.time, 9)
+            if key in self.reference:
+                self.errors[key] = calculate_l2_norm(compact_state(engine), self.reference[key])
+
+    def finalize(self, engine):
+        if self.final_reference is not None:
+            self.errors[round(engine.time, 9)] = calculate_l2_norm(compact_state(engine), self.final_reference)
+
+    def result(self):
+        return self.errors
+
+
+def _build_initial_clans(initial_conditions):
     if 'clans' in initial_conditions:
         clans_data = initial_conditions['clans']
     else:
@@ -15,28 +106,53 @@ def run_simulation_for_convergence(initial_conditions, total_steps, dt):
             {'id': 1, 'size': 50, 'position': [10, 10], 'parameters': {'birth_rate': 0.1, 'natural_death_rate': 0.05}},
             {'id': 2, 'size': 40, 'position': [30, 30], 'parameters': {'birth_rate': 0.12, 'natural_death_rate': 0.04}}
         ]
-    
+
     initial_clans = []
     for clan_data in clans_data:
         clan = Clan(
             clan_id=clan_data['id'],
             initial_size=clan_data['size'],
             initial_position=clan_data['position'],
-            parameters=clan_data['parameters']
+            parameters=dict(clan_data['parameters'])
         )
         initial_clans.append(clan)
-    
+    return initial_clans
+
+
+def run_simulation_for_convergence(initial_conditions, total_steps, dt, reducers=None, seed=0):
+    """Ejecuta una simulación con paso `dt` pasando cada estado por los reductores.
+
+    No se almacena la trayectoria: retorna {nombre_reductor: resultado}. Por
+    defecto solo se conserva el estado final.
+    """
+    reducers = reducers if reducers is not None else [FinalStateReducer()]
+
+    environment = Environment(grid_size=initial_conditions.get('grid_size', [50, 50]),
+                              precision=initial_conditions.get('precision', 'float64'))
+    environment.set_rng(MersenneTwister(seed))
     engine = SimulationEngine(
-        Environment(grid_size=initial_conditions.get('grid_size', [50, 50])),
-        initial_clans,
+        environment,
+        _build_initial_clans(initial_conditions),
+        DeterministicMode(seed=seed),
         dt=dt
     )
-    
-    states = [engine.get_simulation_state()]
-    for _ in range(int(total_steps / dt)):
+
+    for reducer in reducers:
+        reducer.update(engine)
+    for _ in range(int(round(total_steps / dt))):
         engine.step()
-        states.append(engine.get_simulation_state())
-    return states
+        for reducer in reducers:
+            reducer.update(engine)
+    for reducer in reducers:
+        reducer.finalize(engine)
+
+    return {reducer.name: reducer.result() for reducer in reducers}
+
+
+def _run_convergence_task(task):
+    initial_conditions, total_steps, dt, reducers, seed = task
+    return dt, run_simulation_for_convergence(initial_conditions, total_steps, dt, reducers, seed)
+
 
 def calculate_l2_norm(state1, state2):
     """Calcula la norma L2 de la diferencia entre dos estados de la simulación."""
@@ -47,22 +163,37 @@ def calculate_l2_norm(state1, state2):
         size2 = state2['clans'][i]['size'] if i < len(state2['clans']) else 0
         diff_pop += (size1 - size2) ** 2
 
-    diff_resource = np.sum((np.array(state1['resource_grid']) - np.array(state2['resource_grid'])) ** 2)
+    diff_resource = np.sum((np.asarray(state1['resource_grid']) - np.asarray(state2['resource_grid'])) ** 2)
     return np.sqrt(diff_pop + diff_resource)
 
+
+def _final_state(result):
+    """Estado final de un resultado: salida reducida, estado suelto o lista de estados."""
+    if isinstance(result, list):
+        return result[-1]
+    if 'final_state' in result:
+        return result['final_state']
+    return result
+
+
 def richardson_extrapolation(results, dts):
-    """Aplica la extrapolación de Richardson para estimar el error de truncamiento."""
+    """Aplica la extrapolación de Richardson para estimar el error de truncamiento.
+
+    `results[dt]` puede ser la salida de los reductores (con 'final_state'), un
+    estado final o la lista completa de estados.
+    """
     if len(results) < 2:
         return {}
 
+    final_states = {dt: _final_state(results[dt]) for dt in dts}
     extrapolated_errors = {}
     sorted_dts = sorted(dts, reverse=True)
     r = sorted_dts[0] / sorted_dts[1]
 
     if len(results) >= 3:
         r2 = sorted_dts[1] / sorted_dts[2]
-        norm12 = calculate_l2_norm(results[sorted_dts[0]][-1], results[sorted_dts[1]][-1])
-        norm23 = calculate_l2_norm(results[sorted_dts[1]][-1], results[sorted_dts[2]][-1])
+        norm12 = calculate_l2_norm(final_states[sorted_dts[0]], final_states[sorted_dts[1]])
+        norm23 = calculate_l2_norm(final_states[sorted_dts[1]], final_states[sorted_dts[2]])
         if norm12 > 1e-9 and norm23 > 1e-9:
             p_est = np.log(norm12 / norm23) / np.log(r)
         else:
@@ -73,26 +204,41 @@ def richardson_extrapolation(results, dts):
     for i in range(len(sorted_dts) - 1):
         dt_fine = sorted_dts[i+1]
         dt_coarse = sorted_dts[i]
-        state_fine = results[dt_fine][-1]
-        state_coarse = results[dt_coarse][-1]
-        error_estimate = calculate_l2_norm(state_fine, state_coarse) / (r**p_est - 1)
+        error_estimate = calculate_l2_norm(final_states[dt_fine], final_states[dt_coarse]) / (r**p_est - 1)
         extrapolated_errors[f"{dt_fine}/{dt_coarse}"] = error_estimate
 
     return extrapolated_errors
 
-def analyze_convergence(initial_conditions, total_steps, dts_to_test):
-    """Realiza el análisis de convergencia completo."""
+
+def analyze_convergence(initial_conditions, total_steps, dts_to_test, reducers=None, max_workers=None, seed=0):
+    """Realiza el análisis de convergencia completo.
+
+    Cada dt se ejecuta en un proceso distinto (`max_workers=1` ejecuta en serie
+    en el proceso actual) con su propia copia de `reducers`; siempre se añade un
+    `FinalStateReducer` para las normas y la extrapolación de Richardson.
+    """
+    reducers = list(reducers or [])
+    if not any(isinstance(reducer, FinalStateReducer) for reducer in reducers):
+        reducers.append(FinalStateReducer())
+
+    tasks = [(initial_conditions, total_steps, dt, copy.deepcopy(reducers), seed) for dt in dts_to_test]
     results = {}
-    for dt in dts_to_test:
-        print(f"Running simulation with dt = {dt}")
-        results[dt] = run_simulation_for_convergence(initial_conditions, total_steps, dt)
+    if max_workers == 1:
+        for task in tasks:
+            print(f"Running simulation with dt = {task[2]}")
+            dt, output = _run_convergence_task(task)
+            results[dt] = output
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for dt, output in executor.map(_run_convergence_task, tasks):
+                results[dt] = output
 
     convergence_norms = {}
     if results:
         finest_dt = min(results.keys())
-        for dt, states in results.items():
+        for dt, output in results.items():
             if dt != finest_dt:
-                norm = calculate_l2_norm(states[-1], results[finest_dt][-1])
+                norm = calculate_l2_norm(_final_state(output), _final_state(results[finest_dt]))
                 convergence_norms[f"L2({dt}, {finest_dt})"] = norm
 
     richardson_errors = richardson_extrapolation(results, list(dts_to_test))
@@ -102,7 +248,9 @@ def analyze_convergence(initial_conditions, total_steps, dts_to_test):
         'convergence_norms': convergence_norms,
         'richardson_errors': richardson_errors,
         'convergence_achieved': convergence_achieved,
-        'tested_dts': list(dts_to_test)
+        'tested_dts': list(dts_to_test),
+        'reduced_outputs': {dt: {name: value for name, value in output.items() if name != 'final_state'}
+                            for dt, output in results.items()}
     }
 
 def load_convergence_results(filepath="data/validation/convergence_results.json"):
@@ -1,58 +1,143 @@
+import contextlib
+import io
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 from simulation.engine import SimulationEngine
+from simulation.modes import DeterministicMode, StochasticMode, HybridMode
+from simulation.random_generators import MersenneTwister
 from models.environment import Environment
 from models.clan import Clan
 import json
 from config import GRID_SIZE, INITIAL_CLAN_COUNT, MIN_CLAN_SIZE, MAX_CLAN_SIZE
 
-def run_monte_carlo_simulation(num_runs=100, num_steps=100, dt=0.1, seed=None):
-    """Realiza un análisis de sensibilidad de Monte Carlo."""
-    results = []
-    rng = np.random.RandomState(seed)
-
-    for i in range(num_runs):
-        print(f"Ejecutando simulación de Monte Carlo {i+1}/{num_runs}")
-        initial_clans = []
-        for j in range(rng.randint(1, INITIAL_CLAN_COUNT + 1)):
-            initial_size = rng.randint(MIN_CLAN_SIZE, MAX_CLAN_SIZE + 1)
-            initial_position = [rng.randint(0, GRID_SIZE[0]), rng.randint(0, GRID_SIZE[1])]
-
-            clan = Clan(
-                clan_id=j + 1,
-                initial_size=initial_size,
-                initial_position=initial_position,
-                parameters={
-                    'birth_rate': rng.uniform(0.05, 0.2),
-                    'natural_death_rate': rng.uniform(0.01, 0.1)
-                }
-            )
-            initial_clans.append(clan)
+SIMULATION_MODES = {
+    'deterministic': DeterministicMode,
+    'stochastic': StochasticMode,
+    'hybrid': HybridMode
+}
+
+
+def spawn_run_seeds(seed, num_runs):
+    """Semillas independientes por réplica derivadas de una semilla raíz (`SeedSequence.spawn`).
+
+    Cada réplica recibe su propio flujo, de modo que el resultado no depende del
+    número de procesos ni del orden en que terminan.
+    """
+    children = np.random.SeedSequence(seed).spawn(num_runs)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def _build_initial_clans(rng):
+    initial_clans = []
+    for j in range(rng.random_randint(1, INITIAL_CLAN_COUNT + 1)):
+        initial_size = rng.random_randint(MIN_CLAN_SIZE, MAX_CLAN_SIZE + 1)
+        initial_position = [rng.random_randint(0, GRID_SIZE[0]), rng.random_randint(0, GRID_SIZE[1])]
+
+        clan = Clan(
+            clan_id=j + 1,
+            initial_size=initial_size,
+            initial_position=initial_position,
+            parameters={
+                'birth_rate': rng.random_uniform(0.05, 0.2),
+                'natural_death_rate': rng.random_uniform(0.01, 0.1)
+            }
+        )
+        initial_clans.append(clan)
+    return initial_clans
 
-        environment = Environment(grid_size=GRID_SIZE)
 
-        engine = SimulationEngine(
-            environment, 
-            initial_clans, 
-            dt=dt 
-        )
+def run_monte_carlo_replicate(task):
+    """Ejecuta una réplica y retorna un registro compacto (sin la rejilla de recursos).
 
-        if seed:
-            np.random.seed(rng.randint(0, 1000000))
+    `task` es una tupla (índice, semilla, num_steps, dt, modo, silencioso) para que
+    pueda enviarse tal cual a un proceso del pool.
+    """
+    run_index, run_seed, num_steps, dt, mode, quiet = task
+    scenario_seed, environment_seed, mode_seed = (
+        int(child.generate_state(1)[0]) for child in np.random.SeedSequence(run_seed).spawn(3)
+    )
 
+    output = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+        initial_clans = _build_initial_clans(MersenneTwister(scenario_seed))
         initial_conditions = {
-            'clans': [{'id': c.id, 'size': c.size, 'position': c.position.tolist(), 'parameters': c.parameters} for c in initial_clans],
+            'clans': [{'id': c.id, 'size': c.size, 'position': c.position.tolist(), 'parameters': dict(c.parameters)} for c in initial_clans],
             'grid_size': GRID_SIZE
         }
-        
-        final_state = None
+
+        environment = Environment(grid_size=GRID_SIZE)
+        environment.set_rng(MersenneTwister(environment_seed))
+        engine = SimulationEngine(environment, initial_clans, SIMULATION_MODES[mode](seed=mode_seed), dt=dt)
         for _ in range(num_steps):
             engine.step()
-            final_state = engine.get_simulation_state()
 
-        if final_state:
-            results.append({'initial_conditions': initial_conditions, 'final_state': final_state})
+    return {
+        'run': run_index,
+        'seed': run_seed,
+        'initial_conditions': initial_conditions,
+        'final_state': {
+            'time': engine.time,
+            'step': engine.step_count,
+            'clans': [{'id': c.id, 'size': float(c.size), 'energy': float(c.energy), 'position': c.position.tolist()} for c in engine.clans],
+            'total_resources': environment.get_total_resources()
+        }
+    }
+
+
+def run_parallel_monte_carlo(num_runs=100, num_steps=100, dt=0.1, seed=None, mode='deterministic',
+                             max_workers=None, progress_callback=None, cancel_event=None, quiet=True):
+    """Análisis de Monte Carlo con un pool de procesos.
+
+    - Cada réplica usa un flujo propio derivado de `seed`, así que los resultados
+      son idénticos con cualquier número de procesos (`max_workers=1` ejecuta en
+      el proceso actual).
+    - `progress_callback(completadas, total)` se llama al terminar cada réplica.
+    - Si `cancel_event` (p. ej. `threading.Event`) se activa, las réplicas
+      pendientes se cancelan y se retornan solo las completadas.
+
+    Retorna los registros ordenados por índice de réplica.
+    """
+    if mode not in SIMULATION_MODES:
+        raise ValueError(f"Modo de simulación desconocido: '{mode}'. Opciones: {sorted(SIMULATION_MODES)}")
+
+    tasks = [(i, run_seed, num_steps, dt, mode, quiet) for i, run_seed in enumerate(spawn_run_seeds(seed, num_runs))]
+    results = [None] * num_runs
+    completed = 0
+
+    if max_workers == 1:
+        for task in tasks:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            results[task[0]] = run_monte_carlo_replicate(task)
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, num_runs)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run_monte_carlo_replicate, task): task[0] for task in tasks}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                results[futures[future]] = future.result()
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, num_runs)
+                if cancel_event is not None and cancel_event.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+
+    if completed < num_runs:
+        print(f"⏹️ Monte Carlo cancelado: {completed}/{num_runs} réplicas completadas")
+    return [result for result in results if result is not None]
+
+
+def run_monte_carlo_simulation(num_runs=100, num_steps=100, dt=0.1, seed=None):
+    """Realiza un análisis de sensibilidad de Monte Carlo (serie, en el proceso actual)."""
+    def report_progress(completed, total):
+        print(f"Ejecutando simulación de Monte Carlo {completed}/{total}")
 
-    return results
+    return run_parallel_monte_carlo(num_runs, num_steps, dt, seed, max_workers=1, progress_callback=report_progress)
 
 def analyze_sensitivity_results(monte_carlo_results):
     """Analiza los resultados del análisis de sensibilidad de Monte Carlo."""
@@ -1,6 +1,10 @@
-import pandas as pd
 import numpy as np
-from scipy import stats
+from utils.lazy_imports import lazy_import
+from models.precision import decode_resource_grid
+
+# Dependencias pesadas: se importan en el primer uso
+pd = lazy_import('pandas')
+stats = lazy_import('scipy.stats')
 
 def calculate_clan_statistics(history):
     """Calcula estadísticas descriptivas por clan (tamaño promedio, máximo, mínimo)."""
@@ -33,8 +37,9 @@ def analyze_variable_correlation(history):
 
     data = []
     for state in history:
+        resource_grid = decode_resource_grid(state)
         for clan in state['clans']:
-            local_resource = state['resource_grid'][int(clan['position'][1]), int(clan['position'][0])]
+            local_resource = resource_grid[int(clan['position'][1]), int(clan['position'][0])]
             data.append({'clan_size': clan['size'], 'local_resource': local_resource})
 
     df = pd.DataFrame(data)
@@ -4,6 +4,7 @@ import json
 from simulation.engine import SimulationEngine
 from models.clan import Clan
 from models.environment import Environment
+from models.precision import decode_resource_grid
 
 CONSERVATION_TOLERANCE = 1e-6
 
@@ -15,8 +16,8 @@ def check_conservation_laws(initial_state, final_state, tolerance=CONSERVATION_T
     final_population = sum(clan['size'] for clan in final_state['clans'])
     population_conserved = np.isclose(initial_population, final_population, atol=tolerance)
 
-    initial_resource = np.sum(initial_state['resource_grid'])
-    final_resource = np.sum(final_state['resource_grid'])
+    initial_resource = np.sum(decode_resource_grid(initial_state))
+    final_resource = np.sum(decode_resource_grid(final_state))
     resource_conserved = np.isclose(initial_resource, final_resource, atol=tolerance)
 
     return {
@@ -8,8 +8,9 @@ from datetime import datetime
 from threading import Thread, Lock
 from models.environment import Environment
 from models.clan import Clan
-from simulation.engine import SimulationEngine
+from simulation.engine import create_engine
 from simulation.modes import StochasticMode, DeterministicMode
+from models.precision import PrecisionPolicy, DEFAULT_PRECISION
 import data.configs.config_default as default_config 
 
 
@@ -100,7 +101,9 @@ def initialize_simulation(mode_name='stochastic', config_name='stochastic_defaul
         
 
         # 3. Inicializar entorno con tamaño de grid desde la configuración
-        env = Environment(grid_size=current_config['GRID_SIZE'])
+        env = Environment(grid_size=current_config['GRID_SIZE'],
+                          precision=current_config.get('precision', default_config.GRID_PRECISION),
+                          grid_threads=current_config.get('grid_threads', default_config.GRID_THREADS))
         env.max_resource = current_config['RESOURCE_MAX']
         env.regeneration_rate = current_config['RESOURCE_REGEN_RATE']
 
@@ -129,12 +132,16 @@ def initialize_simulation(mode_name='stochastic', config_name='stochastic_defaul
         simulation_data['max_steps'] = current_config.get('simulation_steps', 500)
         simulation_data['dt'] = current_config.get('dt', 0.2)
 
-        current_simulation_engine = SimulationEngine(
+        current_simulation_engine = create_engine(
             environment=env,
             initial_clans=clans,
             simulation_mode=current_mode_instance,
             dt=simulation_data['dt'],
-            seed=global_rng_seed
+            seed=global_rng_seed,
+            backend=current_config.get('engine_backend', default_config.ENGINE_BACKEND),
+            kernel_backend=current_config.get('kernel_backend', default_config.KERNEL_BACKEND),
+            demographic_integrator=current_config.get('demographic_integrator', default_config.DEMOGRAPHIC_INTEGRATOR),
+            tiles=current_config.get('decomposition_tiles', default_config.DECOMPOSITION_TILES)
         )
 
         simulation_data['step'] = 0
@@ -288,8 +295,12 @@ def get_simulation_state():
             'time': engine_state['time'],
             'step': engine_state['step'],
             'mode': current_simulation_mode_name,
+            # Rejilla en el formato de almacenamiento; el cliente multiplica por `resource_scale`
             'resource_grid': engine_state['resource_grid'],
+            'resource_scale': PrecisionPolicy(engine_state.get('precision', DEFAULT_PRECISION)).step(engine_state.get('max_resource')) or 1.0,
             'clans': engine_state['clans'], # Ya viene formateado del engine
+            'territorial_boundaries': engine_state.get('territorial_boundaries', {}),
+            'resource_hotspots': engine_state.get('resource_hotspots', []),
             'running': simulation_data['running'],
             'max_steps': simulation_data['max_steps'],
             'auto_stop': simulation_data['auto_stop'],
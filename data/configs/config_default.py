@@ -5,6 +5,8 @@
 GRID_SIZE = (30, 30)  # Tamaño de la rejilla (filas, columnas)
 RESOURCE_MAX = 50.0  # Cantidad máxima de recursos por celda
 RESOURCE_REGEN_RATE = 0.5  # Tasa de regeneración de recursos por unidad de tiempo
+GRID_PRECISION = 'float64'  # Precisión de la rejilla: 'float64', 'float32' o 'uint16' (punto fijo)
+GRID_THREADS = None  # Hilos para las actualizaciones de toda la rejilla (None: según las CPUs disponibles)
 
 # === CONFIGURACIÓN DE CLANES ===
 INITIAL_CLAN_COUNT = 5  # Número inicial de clanes
@@ -15,6 +17,7 @@ MAX_CLAN_SIZE = 70  # Tamaño máximo inicial de clan
 BIRTH_RATE = 0.1  # Tasa de natalidad base por unidad de tiempo
 NATURAL_DEATH_RATE = 0.05  # Tasa de mortalidad natural por unidad de tiempo
 MORTALITY_STARVATION_MAX = 0.8  # Mortalidad máxima por inanición
+DEMOGRAPHIC_INTEGRATOR = 'legacy'  # 'legacy' (Euler con redondeo por paso) o, con backend vectorizado, 'euler', 'rk4' o 'exact'
 
 # === RECURSOS Y SUPERVIVENCIA ===
 RESOURCE_REQUIRED_PER_INDIVIDUAL = 1.2  # Recursos necesarios por individuo por unidad de tiempo
@@ -75,6 +78,17 @@ DETERMINISTIC_FORAGE_PROBABILITY = 1.0  # Siempre forrajear cuando es óptimo
 DETERMINISTIC_USE_CACHING = True  # Usar cache para optimizaciones
 DETERMINISTIC_CACHE_LIMIT = 1000  # Límite de entradas en cache
 
+# === CONFIGURACIÓN DE NÚMEROS ALEATORIOS ===
+RNG_BACKEND = 'generator'  # 'generator' (flujos por clan y subsistema) o 'mersenne' (flujo compartido, compatibilidad)
+RNG_BIT_GENERATOR = 'pcg64'  # Generador de bits del backend 'generator': 'pcg64' o 'philox'
+
+# === CONFIGURACIÓN DE KERNELS ===
+KERNEL_BACKEND = 'auto'  # 'auto' (numba si está instalado), 'numpy' o 'numba' (con NumPy como respaldo)
+
+# === CONFIGURACIÓN DEL MOTOR ===
+ENGINE_BACKEND = 'object'  # 'object', 'vectorized' o 'decomposed' (modelo reducido de forrajeo por teselas, sin modos ni combate)
+DECOMPOSITION_TILES = (2, 2)  # Teselas (filas, columnas) del backend 'decomposed', una por proceso
+
 # === CONFIGURACIÓN DE RECUPERACIÓN ===
 ENERGY_RECOVERY_RATE_RESTING = 25.0  # Recuperación de energía durante descanso
 MORALE_RECOVERY_RATE_RESTING = 10.0  # Recuperación de moral durante descanso
@@ -1,4 +1,6 @@
 import numpy as np
+from models.perception import perceive_disk, best_resource_direction, toroidal_displacement, disk_stencil
+from models.clan_memory import ResourceMemory, DEFAULT_MEMORY_CAPACITY, DEFAULT_MEMORY_DECAY
 
 class Clan:
     def __init__(self, clan_id, initial_size, initial_position, parameters=None):
@@ -16,7 +18,6 @@ class Clan:
         self.allies = set()
         self.enemies = set()
 
-        self.resource_memory = {}
         self.movement_history = [self.position.copy()]
 
         self.parameters = {
@@ -28,18 +29,105 @@ class Clan:
             'cooperation_tendency': 0.6,
             'aggressiveness': 0.3,
             'territorial_expansion_rate': 0.05,
-            'exploration_tendency': 0.5
+            'exploration_tendency': 0.5,
+            'memory_capacity': DEFAULT_MEMORY_CAPACITY,
+            'memory_decay_rate': DEFAULT_MEMORY_DECAY
         }
 
         if parameters:
             self.parameters.update(parameters)
+
+        # Memoria acotada de recursos percibidos (último valor y cuándo se vio); como
+        # mínimo cabe una percepción completa para no descartar celdas recién vistas
+        self.resource_memory = ResourceMemory(self.parameters['memory_capacity'], self.parameters['memory_decay_rate'])
+        self.resource_memory.reserve(len(disk_stencil(int(self.parameters['perception_radius']))[0]))
         
         self.rng = None
+        self.neighbor_index = None
+        self.territory_map = None
+        # Backend de kernels (`kernels.select_backend`); None usa NumPy directamente
+        self.kernels = None
+        # Dirección de migración precalculada en lote (`plan_migrations`), se usa una vez
+        self.planned_migration = None
 
     def set_rng(self, rng_instance):
         """Permite que el RNG se inyecte en el clan."""
         self.rng = rng_instance
 
+    def set_kernels(self, kernels):
+        """Inyecta el backend de kernels seleccionado por el motor."""
+        self.kernels = kernels
+
+    def set_neighbor_index(self, spatial_index):
+        """Inyecta el índice espacial del paso para consultas de vecinos."""
+        self.neighbor_index = spatial_index
+
+    def set_territory_map(self, territory_map):
+        """Conecta el clan al ráster territorial compartido (`TerritoryRaster`)."""
+        self.territory_map = territory_map
+
+    def get_territory_size(self):
+        """Número de celdas de territorio del clan."""
+        if self.territory_map is not None:
+            return self.territory_map.size_of(self.id)
+        return len(self.territory_cells)
+
+    def get_territory_cells(self):
+        """Celdas de territorio como array (K, 2)."""
+        if self.territory_map is not None:
+            return self.territory_map.cells_of(self.id)
+        return np.array(list(self.territory_cells), dtype=int).reshape(-1, 2)
+
+    def get_territory_center(self):
+        """Centro del territorio (media circular sobre el toro si hay ráster), o None."""
+        if self.territory_map is not None:
+            return self.territory_map.center_of(self.id)
+        if not self.territory_cells:
+            return None
+        return np.mean([np.array(cell) for cell in self.territory_cells], axis=0)
+
+    def get_territory_direction(self, environment=None):
+        """Vector desde la posición del clan hasta el centro de su territorio, o None."""
+        center = self.get_territory_center()
+        if center is None:
+            return None
+        if environment is not None:
+            return toroidal_displacement(self.position, center, environment.grid_size)
+        return center - self.position
+
+    def _grid_size(self, environment=None):
+        """Tamaño del toro para distancias entre clanes (None si no se conoce)."""
+        if environment is not None:
+            return environment.grid_size
+        if self.neighbor_index is not None:
+            return self.neighbor_index.grid_size
+        if self.territory_map is not None:
+            return np.array(self.territory_map.shape)
+        return None
+
+    def _nearby_clans(self, other_clans, radius, environment=None):
+        """Clanes de `other_clans` a menos de `radius` (excluyendo al propio), con su distancia toroidal.
+
+        Solo se consideran los clanes de `other_clans` (sin lista no hay vecinos).
+        El índice espacial inyectado acelera la búsqueda; sin él se recorre la lista.
+        """
+        if not other_clans:
+            return []
+        if self.neighbor_index is not None:
+            allowed = {other_clan.id for other_clan in other_clans}
+            candidates = [(other_clan, distance) for other_clan, distance
+                          in self.neighbor_index.query_items(self.position, radius) if other_clan.id in allowed]
+        else:
+            positions = np.array([other_clan.position for other_clan in other_clans], dtype=float).reshape(-1, 2)
+            grid_size = self._grid_size(environment)
+            if grid_size is not None:
+                deltas = toroidal_displacement(self.position, positions, grid_size)
+            else:
+                deltas = positions - self.position
+            candidates = zip(other_clans, np.sqrt((deltas ** 2).sum(axis=1)))
+        return [(other_clan, distance) for other_clan, distance in candidates
+                if other_clan.id != self.id and distance < radius]
+
     def update_behavior(self, environment, other_clans, dt):
         """
         Este método es el punto de entrada para que el SimulationMode aplique el comportamiento.
@@ -55,17 +143,14 @@ class Clan:
     def _perceive_environment(self, environment, other_clans):
         """Percibe el entorno y otros clanes."""
         radius = int(self.parameters['perception_radius'])
-        for dx in range(-radius, radius + 1):
-            for dy in range(-radius, radius + 1):
-                if np.sqrt(dx*dx + dy*dy) <= radius: 
-                    pos = self.position + np.array([dx, dy])
-                    pos = environment.get_toroidal_position(pos).astype(int)
-                    resource_level = environment.get_resource(pos)
-                    self.resource_memory[tuple(pos)] = resource_level
+        cells, levels = perceive_disk(environment.grid, self.position, radius)
+        # Si el radio creció tras crear el clan, la memoria crece con él
+        self.resource_memory.reserve(len(cells))
+        self.resource_memory.update(cells, levels)
 
     def _decide_state(self, environment, other_clans):
         """Decide qué estado adoptar."""
-        threats = self._count_nearby_threats(other_clans)
+        threats = self._count_nearby_threats(other_clans, environment)
         local_resources = self._evaluate_local_resources(environment)
 
         if threats > 0 and self.energy > 30:
@@ -77,21 +162,17 @@ class Clan:
         else:
             self.state = 'foraging'
 
-    def _count_nearby_threats(self, other_clans):
+    def _count_nearby_threats(self, other_clans, environment=None):
         """Cuenta amenazas cercanas."""
         threats = 0
-        for other_clan in other_clans:
-            if other_clan.id != self.id:
-                distance = np.linalg.norm(self.position - other_clan.position)
-                if distance < self.parameters['perception_radius'] / 2 and other_clan.size >= self.size * 0.8:
-                    threats += 1
+        for other_clan, _ in self._nearby_clans(other_clans, self.parameters['perception_radius'] / 2, environment):
+            if other_clan.size >= self.size * 0.8:
+                threats += 1
         return threats
 
     def _evaluate_local_resources(self, environment):
         """Evalúa recursos en área local (promedio de recursos percibidos)."""
-        if not self.resource_memory:
-            return 0
-        return sum(self.resource_memory.values()) / len(self.resource_memory)
+        return self.resource_memory.mean()
 
 
     def _forage_behavior(self, environment, dt):
@@ -104,9 +185,8 @@ class Clan:
 
     def _defend_behavior(self, environment, dt):
         """Comportamiento defensivo."""
-        if len(self.territory_cells) > 0:
-            territory_center = np.mean([np.array(cell) for cell in self.territory_cells], axis=0)
-            direction = territory_center - self.position
+        direction = self.get_territory_direction(environment)
+        if direction is not None:
             if np.linalg.norm(direction) > 1: # Si está lejos del centro, moverse hacia él
                 direction = direction / np.linalg.norm(direction)
                 movement = direction * self.parameters['movement_speed'] * 0.5 * dt
@@ -128,12 +208,10 @@ class Clan:
         target = None
         min_distance = float('inf')
 
-        for other_clan in other_clans:
-            if other_clan.id != self.id and other_clan.size > 0:
-                distance = np.linalg.norm(self.position - other_clan.position)
-                if distance < min_distance and distance < 5:
-                    target = other_clan
-                    min_distance = distance
+        for other_clan, distance in self._nearby_clans(other_clans, 5):
+            if other_clan.size > 0 and distance < min_distance:
+                target = other_clan
+                min_distance = distance
 
         if target:
             direction = target.position - self.position
@@ -159,60 +237,52 @@ class Clan:
 
     def _find_resource_direction(self, environment):
         """Encuentra la mejor dirección hacia recursos percibidos."""
-        best_direction = np.array([0.0, 0.0])
-        max_resource_level = -1.0
-
-        for pos_tuple, resource_level in self.resource_memory.items():
-            if resource_level > max_resource_level:
-                cell_pos = np.array(pos_tuple)
-                direction_vector = cell_pos - self.position
-
-                if environment:
-                    direction_vector = environment.get_toroidal_position(direction_vector + environment.grid_size / 2) - environment.grid_size / 2
+        if not self.resource_memory:
+            return np.array([0.0, 0.0])
 
-                if np.linalg.norm(direction_vector) > 0:
-                    max_resource_level = resource_level
-                    best_direction = direction_vector / np.linalg.norm(direction_vector)
-        
-        return best_direction
+        cells = self.resource_memory.cells().astype(float)
+        levels = self.resource_memory.levels()
+        grid_size = environment.grid_size if environment else None
+        return best_resource_direction(cells, levels, self.position, grid_size)
 
 
     def _find_migration_direction(self, environment):
         """Encuentra dirección para migración, buscando áreas con altos recursos no explorados."""
-        best_direction = np.array([0.0, 0.0])
-        best_score = -1.0
-
-        for _ in range(self.parameters['perception_radius'] * 2): 
-            if self.rng:
-                angle = self.rng.random_uniform(0, 2*np.pi)
-            else:
-                angle = np.random.uniform(0, 2*np.pi) 
+        if self.planned_migration is not None:
+            direction, self.planned_migration = self.planned_migration, None
+            return direction
+
+        candidates = self._migration_candidates(environment)
+        if candidates is None:
+            return np.array([0.0, 0.0])
+        directions, area_means, memory_levels, exploration_bonus = candidates
+        if self.kernels is not None:
+            best = self.kernels.migration_choice(area_means[None], memory_levels[None], [exploration_bonus])[0]
+            return directions[int(best)]
+        scores = area_means + np.where(memory_levels < 10, exploration_bonus, 0)
+
+        return directions[int(np.argmax(scores))]
+
+    def _migration_candidates(self, environment):
+        """Direcciones candidatas con su recurso medio, memoria y bonus de exploración (None si no hay)."""
+        num_candidates = self.parameters['perception_radius'] * 2
+        if num_candidates <= 0:
+            return None
 
-            direction_candidate = np.array([np.cos(angle), np.sin(angle)])
-            test_pos = self.position + direction_candidate * self.parameters['perception_radius'] * 1.5 
-            test_pos = environment.get_toroidal_position(test_pos).astype(int)
-
-            area_resources = 0
-            cells_in_area = 0
-            for dx in range(-2, 3):
-                for dy in range(-2, 3):
-                    check_pos = test_pos + np.array([dx, dy])
-                    check_pos = environment.get_toroidal_position(check_pos).astype(int)
-                    area_resources += environment.get_resource(check_pos)
-                    cells_in_area += 1
-            
-            avg_area_resource = area_resources / cells_in_area if cells_in_area > 0 else 0
-            exploration_bonus = 0
-            if tuple(test_pos) not in self.resource_memory or self.resource_memory[tuple(test_pos)] < 10: 
-                exploration_bonus = self.parameters['exploration_tendency'] * 20
-
-            current_score = avg_area_resource + exploration_bonus
+        if self.rng:
+            angles = self.rng.random_uniform(0, 2*np.pi, size=num_candidates)
+        else:
+            angles = np.random.uniform(0, 2*np.pi, num_candidates)
 
-            if current_score > best_score:
-                best_score = current_score
-                best_direction = direction_candidate
+        directions = np.column_stack([np.cos(angles), np.sin(angles)])
+        test_positions = self.position + directions * self.parameters['perception_radius'] * 1.5
+        test_cells = environment.get_toroidal_position(test_positions).astype(int)
 
-        return best_direction
+        # Media de recursos en el área 5x5 de cada candidato (consulta en lote a la tabla de sumas)
+        area_means = environment.get_box_means(test_cells, half_size=2)
+        exploration_bonus = self.parameters['exploration_tendency'] * 20
+        memory_levels = self.resource_memory.lookup(test_cells, default=0)
+        return directions, area_means, memory_levels, exploration_bonus
 
 
     def _engage_combat(self, enemy, dt):
@@ -238,17 +308,24 @@ class Clan:
         enemy.morale = max(0, enemy.morale - 5 * dt)
 
 
-    def _consume_resources(self, environment, dt):
-        """Consume recursos del entorno y actualiza energía y tamaño."""
-        pos = self.position.astype(int)
-        needed = self.size * self.parameters['resource_required_per_individual'] * dt
-
+    def _consumption_demand(self, dt):
+        """Recursos que el clan intenta consumir en un paso dt."""
         group_efficiency_bonus = self.parameters['cooperation_tendency'] * 0.3
         effective_consumption_rate = self.parameters['resource_required_per_individual'] * (1.0 - group_efficiency_bonus)
-        effective_needed = self.size * effective_consumption_rate * dt
+        return self.size * effective_consumption_rate * dt
+
+    def _consume_resources(self, environment, dt):
+        """Consume recursos del entorno y actualiza energía y tamaño."""
+        consumed, effective_needed = self._take_resources(environment, dt)
+        self._apply_consumption(consumed, effective_needed, dt)
 
-        consumed = environment.consume(pos, effective_needed)
+    def _take_resources(self, environment, dt):
+        """Consume del entorno lo que necesita el clan; retorna (consumido, necesitado)."""
+        effective_needed = self._consumption_demand(dt)
+        return environment.consume(self.position.astype(int), effective_needed), effective_needed
 
+    def _apply_consumption(self, consumed, effective_needed, dt):
+        """Actualiza energía y tamaño a partir de lo consumido frente a lo necesitado."""
         if effective_needed > 0:
             energy_conversion_efficiency = (consumed / effective_needed)
             energy_gain = energy_conversion_efficiency * 15 * dt
@@ -292,30 +369,39 @@ class Clan:
 
         self.position = new_position
         self.movement_history.append(self.position.copy())
+        if self.neighbor_index is not None:
+            self.neighbor_index.move_item(self, self.position)
 
         if len(self.movement_history) > 20: 
             self.movement_history.pop(0) 
     def _update_territory(self):
         """Actualiza territorio controlado."""
         expansion_chance = self.parameters['territorial_expansion_rate'] * (self.energy / 100) * (self.morale / 100)
-        
+        new_cells = []
+
         if self.rng:
             if self.rng.random_float() < expansion_chance:
                 dx = self.rng.random_randint(-1, 1)
                 dy = self.rng.random_randint(-1, 1)
                 if dx != 0 or dy != 0:
-                    cell = self.position.astype(int) + np.array([dx, dy])
-                    self.territory_cells.add(tuple(cell))
+                    new_cells.append(self.position.astype(int) + np.array([dx, dy]))
         else:
             if np.random.random() < expansion_chance:
                 for dx in range(-1, 2):
                     for dy in range(-1, 2):
                         if dx == 0 and dy == 0:
                             continue
-                        cell = self.position.astype(int) + np.array([dx, dy])
-                        self.territory_cells.add(tuple(cell))
+                        new_cells.append(self.position.astype(int) + np.array([dx, dy]))
+
+        max_territory_size = self.size * 5
+        if self.territory_map is not None:
+            if new_cells:
+                self.territory_map.claim(self.id, new_cells, strength=self.size * (self.energy / 100))
+            # Recorte por cercanía a la posición actual del clan
+            self.territory_map.trim(self.id, max_territory_size, self.position)
+            return
 
-        max_territory_size = self.size * 5 
+        self.territory_cells.update(tuple(cell) for cell in new_cells)
         if len(self.territory_cells) > max_territory_size:
 
             cells_to_keep = list(self.territory_cells)[:max_territory_size]
@@ -332,7 +418,7 @@ class Clan:
             'strategy': self.strategy,
             'energy': round(self.energy, 1),
             'morale': round(self.morale, 1),
-            'territory_size': len(self.territory_cells),
+            'territory_size': self.get_territory_size(),
             'allies': list(self.allies),
             'enemies': list(self.enemies),
             'combat_strength': round(self.size * (self.energy / 100) * self.parameters['aggressiveness'], 1),
@@ -340,4 +426,27 @@ class Clan:
         }
 
     def __repr__(self):
-        return f"Clan{self.id}(size={self.size:.1f}, pos={self.position.round(1)}, state={self.state})"
\ No newline at end of file
+        return f"Clan{self.id}(size={self.size:.1f}, pos={self.position.round(1)}, state={self.state})"
+
+
+def plan_migrations(clans, environment, kernels):
+    """Elige en lote la dirección de migración de varios clanes con `kernels.migration_choice`.
+
+    Cada clan extrae sus candidatos con su propio RNG, así que el resultado es
+    el mismo que llamar a `_find_migration_direction` clan por clan mientras la
+    rejilla no cambie entre medias. La dirección queda en `planned_migration`.
+    """
+    groups = {}
+    for clan in clans:
+        candidates = clan._migration_candidates(environment)
+        if candidates is None:
+            clan.planned_migration = np.array([0.0, 0.0])
+        else:
+            groups.setdefault(len(candidates[0]), []).append((clan, candidates))
+    # Una llamada por número de candidatos (uno solo si todos comparten radio de percepción)
+    for group in groups.values():
+        group_clans, candidates = zip(*group)
+        directions, area_means, memory_levels, bonus = zip(*candidates)
+        best = kernels.migration_choice(np.array(area_means), np.array(memory_levels), np.array(bonus))
+        for clan, clan_directions, index in zip(group_clans, directions, best.tolist()):
+            clan.planned_migration = clan_directions[int(index)]
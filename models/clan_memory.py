@@ -0,0 +1,159 @@
+# clan_territorial_simulation/models/clan_memory.py
+import numpy as np
+
+DEFAULT_MEMORY_CAPACITY = 256
+DEFAULT_MEMORY_DECAY = 0.0
+
+# Codificación de celdas (x, y) no negativas en una clave entera ordenable
+_KEY_STRIDE = np.int64(1) << 32
+
+
+def encode_cells(cells):
+    cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+    return cells[:, 0] * _KEY_STRIDE + cells[:, 1]
+
+
+def decode_keys(keys):
+    rows, cols = np.divmod(keys, _KEY_STRIDE)
+    return np.column_stack([rows, cols])
+
+
+class ResourceMemory:
+    """Memoria de recursos de un clan respaldada por arrays y acotada.
+
+    Guarda, para cada celda recordada, el último valor visto y el instante en
+    que se vio, en arrays ordenados por clave (búsqueda con `searchsorted`).
+    Al superar `capacity` se olvidan las celdas vistas hace más tiempo y, si se
+    fija `max_age`, también las más antiguas que esa ventana. Con `decay_rate`
+    el valor recordado pierde peso exponencialmente con la edad.
+
+    Conserva la interfaz de diccionario que usaba `Clan` (`get`, `in`,
+    `len`, asignación por tupla).
+    """
+
+    def __init__(self, capacity=DEFAULT_MEMORY_CAPACITY, decay_rate=DEFAULT_MEMORY_DECAY, max_age=None):
+        self.capacity = int(capacity)
+        self.decay_rate = float(decay_rate)
+        self.max_age = max_age
+        self.now = 0
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._values = np.zeros(0)
+        self._timestamps = np.zeros(0, dtype=np.int64)
+
+    def reserve(self, count):
+        """Amplía la capacidad a al menos `count` celdas (p. ej. una percepción completa)."""
+        self.capacity = max(self.capacity, int(count))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __bool__(self):
+        return len(self._keys) > 0
+
+    def _find(self, keys):
+        """Posiciones de `keys` en la memoria y máscara de las que están presentes."""
+        slots = np.searchsorted(self._keys, keys)
+        found = slots < len(self._keys)
+        found[found] = self._keys[slots[found]] == keys[found]
+        return slots, found
+
+    def update(self, cells, levels, time=None):
+        """Registra una percepción (celdas (K, 2) y niveles (K,)) en un instante.
+
+        Sin `time` avanza un reloj interno de un tick por llamada.
+        """
+        self.now = self.now + 1 if time is None else time
+        keys = encode_cells(cells)
+        levels = np.asarray(levels, dtype=float).ravel()
+        if len(keys) == 0:
+            return
+
+        # La última aparición de cada celda gana, como en dict.update
+        reversed_unique, first = np.unique(keys[::-1], return_index=True)
+        new_keys = reversed_unique
+        new_values = levels[::-1][first]
+
+        slots, found = self._find(new_keys)
+        self._values[slots[found]] = new_values[found]
+        self._timestamps[slots[found]] = self.now
+
+        missing = ~found
+        if missing.any():
+            keys = np.concatenate([self._keys, new_keys[missing]])
+            order = np.argsort(keys, kind='stable')
+            self._keys = keys[order]
+            self._values = np.concatenate([self._values, new_values[missing]])[order]
+            self._timestamps = np.concatenate([self._timestamps, np.full(missing.sum(), self.now)])[order]
+        self._prune()
+
+    def _prune(self):
+        keep = None
+        if self.max_age is not None:
+            keep = self.now - self._timestamps <= self.max_age
+        if len(self._keys) > self.capacity:
+            # Conservar las `capacity` celdas vistas más recientemente
+            recent = np.zeros(len(self._keys), dtype=bool)
+            recent[np.argsort(-self._timestamps, kind='stable')[:self.capacity]] = True
+            keep = recent if keep is None else keep & recent
+        if keep is not None and not keep.all():
+            self._keys = self._keys[keep]
+            self._values = self._values[keep]
+            self._timestamps = self._timestamps[keep]
+
+    def cells(self):
+        """Celdas recordadas como array (K, 2)."""
+        return decode_keys(self._keys)
+
+    def levels(self):
+        """Valores recordados con el decaimiento por edad aplicado."""
+        if self.decay_rate == 0:
+            return self._values.copy()
+        return self._values * np.exp(-self.decay_rate * (self.now - self._timestamps))
+
+    def mean(self):
+        """Media de los valores recordados (0 si la memoria está vacía)."""
+        return float(self.levels().mean()) if len(self._keys) else 0
+
+    def argmax(self):
+        """Celda y valor del mejor recuerdo, o (None, 0) si la memoria está vacía."""
+        if not len(self._keys):
+            return None, 0
+        levels = self.levels()
+        best = int(np.argmax(levels))
+        return decode_keys(self._keys[best:best + 1])[0], float(levels[best])
+
+    def lookup(self, cells, default=0.0):
+        """Valores recordados (con decaimiento) para muchas celdas a la vez."""
+        slots, found = self._find(encode_cells(cells))
+        result = np.full(len(slots), float(default))
+        if found.any():
+            values = self._values[slots[found]]
+            if self.decay_rate:
+                values = values * np.exp(-self.decay_rate * (self.now - self._timestamps[slots[found]]))
+            result[found] = values
+        return result
+
+    def get(self, cell, default=None):
+        if cell not in self:
+            return default
+        return float(self.lookup([cell])[0])
+
+    def __contains__(self, cell):
+        return bool(self._find(encode_cells([cell]))[1][0])
+
+    def __getitem__(self, cell):
+        value = self.get(cell)
+        if value is None:
+            raise KeyError(cell)
+        return value
+
+    def __setitem__(self, cell, value):
+        self.update([cell], [value], time=self.now)
+
+    def clear(self):
+        self._keys = self._keys[:0]
+        self._values = self._values[:0]
+        self._timestamps = self._timestamps[:0]
+
+    def __repr__(self):
+        return f"ResourceMemory(celdas={len(self._keys)}, capacidad={self.capacity}, decaimiento={self.decay_rate})"
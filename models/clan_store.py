@@ -0,0 +1,251 @@
+# clan_territorial_simulation/models/clan_store.py
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from models.clan import Clan
+
+# Códigos enteros de estado para la columna `state_codes`
+CLAN_STATES = ('foraging', 'defending', 'migrating', 'fighting', 'resting')
+STATE_CODES = {name: code for code, name in enumerate(CLAN_STATES)}
+
+# Columnas de parámetros almacenadas como arrays (nombre -> dtype)
+PARAMETER_COLUMNS = {
+    'birth_rate': np.float64,
+    'natural_death_rate': np.float64,
+    'movement_speed': np.float64,
+    'resource_required_per_individual': np.float64,
+    'perception_radius': np.int64,
+    'cooperation_tendency': np.float64,
+    'aggressiveness': np.float64,
+    'territorial_expansion_rate': np.float64,
+    'exploration_tendency': np.float64
+}
+
+
+class ClanStore:
+    """Almacén struct-of-arrays con el estado numérico de todos los clanes.
+
+    Cada clan ocupa una fila de arrays contiguos (posición, tamaño, energía,
+    moral, estado y columnas de parámetros). Los objetos `StoredClan` son
+    vistas ligeras sobre una fila, de modo que el código existente basado en
+    `Clan` (modos, interacciones) sigue funcionando sin cambios.
+    """
+
+    def __init__(self, capacity=16):
+        capacity = max(1, int(capacity))
+        self.count = 0
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._positions = np.zeros((capacity, 2))
+        self._sizes = np.zeros(capacity)
+        self._energy = np.zeros(capacity)
+        self._morale = np.zeros(capacity)
+        self._state_codes = np.zeros(capacity, dtype=np.int8)
+        self._parameters = {name: np.zeros(capacity, dtype=dtype) for name, dtype in PARAMETER_COLUMNS.items()}
+        self.views = []
+
+    @classmethod
+    def from_clans(cls, clans):
+        """Construye el almacén a partir de una lista de objetos `Clan`."""
+        store = cls(capacity=len(clans))
+        for clan in clans:
+            store.append(clan)
+        return store
+
+    def __len__(self):
+        return self.count
+
+    # --- Columnas activas (vistas sobre las filas ocupadas) ---
+
+    @property
+    def ids(self):
+        return self._ids[:self.count]
+
+    @property
+    def positions(self):
+        return self._positions[:self.count]
+
+    @property
+    def sizes(self):
+        return self._sizes[:self.count]
+
+    @property
+    def energy(self):
+        return self._energy[:self.count]
+
+    @property
+    def morale(self):
+        return self._morale[:self.count]
+
+    @property
+    def state_codes(self):
+        return self._state_codes[:self.count]
+
+    def parameter(self, name):
+        """Retorna la columna activa de un parámetro."""
+        return self._parameters[name][:self.count]
+
+    # --- Gestión de filas ---
+
+    def _grow(self, min_capacity):
+        capacity = max(min_capacity, 2 * len(self._sizes))
+
+        def resized(array):
+            new_array = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            new_array[:self.count] = array[:self.count]
+            return new_array
+
+        self._ids = resized(self._ids)
+        self._positions = resized(self._positions)
+        self._sizes = resized(self._sizes)
+        self._energy = resized(self._energy)
+        self._morale = resized(self._morale)
+        self._state_codes = resized(self._state_codes)
+        self._parameters = {name: resized(column) for name, column in self._parameters.items()}
+
+    def append(self, clan):
+        """Copia un `Clan` al almacén y retorna su vista `StoredClan`."""
+        if self.count >= len(self._sizes):
+            self._grow(self.count + 1)
+
+        row = self.count
+        self.count += 1
+        self._ids[row] = clan.id
+        self._positions[row] = clan.position
+        self._sizes[row] = clan.size
+        self._energy[row] = clan.energy
+        self._morale[row] = clan.morale
+        self._state_codes[row] = STATE_CODES.get(clan.state, 0)
+        for name in PARAMETER_COLUMNS:
+            self._parameters[name][row] = clan.parameters[name]
+
+        view = StoredClan(self, row, clan)
+        self.views.append(view)
+        return view
+
+    def compact(self, keep_mask):
+        """Elimina las filas no marcadas en `keep_mask` y reindexa las vistas."""
+        keep = np.flatnonzero(np.asarray(keep_mask, dtype=bool))
+        if len(keep) == self.count:
+            return
+
+        new_count = len(keep)
+        self._ids[:new_count] = self._ids[keep]
+        self._positions[:new_count] = self._positions[keep]
+        self._sizes[:new_count] = self._sizes[keep]
+        self._energy[:new_count] = self._energy[keep]
+        self._morale[:new_count] = self._morale[keep]
+        self._state_codes[:new_count] = self._state_codes[keep]
+        for column in self._parameters.values():
+            column[:new_count] = column[keep]
+
+        self.views = [self.views[i] for i in keep]
+        for row, view in enumerate(self.views):
+            view._row = row
+        self.count = new_count
+
+    def __repr__(self):
+        return f"ClanStore(clanes={self.count}, capacidad={len(self._sizes)})"
+
+
+class _ParameterRow(MutableMapping):
+    """Diccionario de parámetros de un clan respaldado por las columnas del almacén."""
+
+    def __init__(self, view, extra):
+        self._view = view
+        self._extra = dict(extra)
+
+    def __getitem__(self, key):
+        if key in PARAMETER_COLUMNS:
+            return self._view._store._parameters[key][self._view._row]
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in PARAMETER_COLUMNS:
+            self._view._store._parameters[key][self._view._row] = value
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in PARAMETER_COLUMNS:
+            raise KeyError(f"El parámetro '{key}' es una columna del almacén y no puede eliminarse")
+        del self._extra[key]
+
+    def __iter__(self):
+        yield from PARAMETER_COLUMNS
+        yield from self._extra
+
+    def __len__(self):
+        return len(PARAMETER_COLUMNS) + len(self._extra)
+
+
+class StoredClan(Clan):
+    """Vista de un clan cuyo estado numérico vive en una fila de `ClanStore`."""
+
+    def __init__(self, store, row, source_clan):
+        self._store = store
+        self._row = row
+        self.id = source_clan.id
+        self.strategy = source_clan.strategy
+
+        self.territory_cells = source_clan.territory_cells
+        self.allies = source_clan.allies
+        self.enemies = source_clan.enemies
+        self.resource_memory = source_clan.resource_memory
+        self.movement_history = source_clan.movement_history
+
+        extra = {k: v for k, v in source_clan.parameters.items() if k not in PARAMETER_COLUMNS}
+        self._parameter_row = _ParameterRow(self, extra)
+        self.rng = source_clan.rng
+        self.neighbor_index = source_clan.neighbor_index
+        self.territory_map = source_clan.territory_map
+        self.kernels = source_clan.kernels
+        self.planned_migration = None
+
+    @property
+    def row(self):
+        return self._row
+
+    @property
+    def position(self):
+        return self._store._positions[self._row]
+
+    @position.setter
+    def position(self, value):
+        self._store._positions[self._row] = value
+
+    @property
+    def size(self):
+        return self._store._sizes[self._row]
+
+    @size.setter
+    def size(self, value):
+        self._store._sizes[self._row] = value
+
+    @property
+    def energy(self):
+        return self._store._energy[self._row]
+
+    @energy.setter
+    def energy(self, value):
+        self._store._energy[self._row] = value
+
+    @property
+    def morale(self):
+        return self._store._morale[self._row]
+
+    @morale.setter
+    def morale(self, value):
+        self._store._morale[self._row] = value
+
+    @property
+    def state(self):
+        return CLAN_STATES[self._store._state_codes[self._row]]
+
+    @state.setter
+    def state(self, value):
+        self._store._state_codes[self._row] = STATE_CODES[value]
+
+    @property
+    def parameters(self):
+        return self._parameter_row
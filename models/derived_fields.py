@@ -0,0 +1,200 @@
+# clan_territorial_simulation/models/derived_fields.py
+import numpy as np
+
+from models.region_table import RegionSumTable
+
+# Fracción de la rejilla consultada en un paso a partir de la cual compensa
+# calcular el campo completo en lugar de memoizar celda a celda
+FULL_FIELD_FRACTION = 1 / 64
+
+
+def density_field(environment, radius=2):
+    """Media de recursos en el disco de radio `radius` alrededor de cada celda."""
+    rows, cols = np.indices(environment.grid.shape)
+    centers = np.stack([rows, cols], axis=-1)
+    # Tabla recién construida: las correcciones puntuales pendientes de la tabla
+    # compartida costarían O(pendientes) por celda
+    table = RegionSumTable(environment.grid)
+    return table.disk_mean(centers, int(radius)).astype(environment.grid.dtype, copy=False)
+
+
+def gradient_field(environment):
+    """Gradiente por diferencias centradas con envoltura toroidal, forma (2, H, W)."""
+    grid = environment.grid
+    grad_x = (np.roll(grid, -1, axis=0) - np.roll(grid, 1, axis=0)) / 2.0
+    grad_y = (np.roll(grid, -1, axis=1) - np.roll(grid, 1, axis=1)) / 2.0
+    return np.stack([grad_x, grad_y])
+
+
+def density_at(environment, cells, radius=2):
+    """Media del disco de radio `radius` en las celdas `cells` (N, 2): O(1) por celda con la tabla de sumas."""
+    return environment.region_table().disk_mean(cells, int(radius)).astype(environment.grid.dtype, copy=False)
+
+
+def gradient_at(environment, cells):
+    """Gradiente centrado en las celdas `cells` (N, 2), forma (2, N)."""
+    grid = environment.grid
+    height, width = grid.shape
+    rows, cols = cells[:, 0], cells[:, 1]
+    grad_x = (grid[(rows + 1) % height, cols] - grid[(rows - 1) % height, cols]) / 2.0
+    grad_y = (grid[rows, (cols + 1) % width] - grid[rows, (cols - 1) % width]) / 2.0
+    return np.stack([grad_x, grad_y])
+
+
+def aggregate_fields(environment):
+    """Agregados globales de la rejilla."""
+    grid = environment.grid
+    return {
+        # Acumulación en float64 aunque la rejilla sea de menor precisión
+        'total': np.sum(grid, dtype=np.float64),
+        'mean': np.mean(grid, dtype=np.float64),
+        'max': np.max(grid),
+        'min': np.min(grid),
+        'std': np.std(grid, dtype=np.float64)
+    }
+
+
+DEFAULT_FIELDS = {
+    'density': density_field,
+    'gradient': gradient_field,
+    'aggregates': aggregate_fields
+}
+
+# Evaluación en celdas sueltas de los campos que la admiten (última dimensión = celdas)
+DEFAULT_POINT_FIELDS = {
+    'density': density_at,
+    'gradient': gradient_at
+}
+
+
+class DerivedFieldCache:
+    """Registro de campos derivados de `Environment.grid` calculados bajo demanda.
+
+    Cada campo se guarda junto con la versión de la rejilla con la que se
+    calculó y se reutiliza mientras la versión no cambie. Durante un paso el
+    motor puede fijar (`pin`) la caché: los campos calculados desde ese momento
+    se comparten por todos los clanes hasta `unpin`, aunque el consumo vaya
+    modificando la rejilla, de modo que cada campo se calcula una vez por paso.
+
+    Las consultas por celdas (`get_at`) no construyen el campo completo
+    mientras se consulten pocas celdas: con la caché fijada cada celda se
+    evalúa una vez por paso y se memoiza; solo cuando las celdas consultadas
+    superan `FULL_FIELD_FRACTION` de la rejilla se calcula el campo entero.
+    """
+
+    def __init__(self, environment, fields=None, point_fields=None):
+        self.environment = environment
+        self.builders = dict(DEFAULT_FIELDS if fields is None else fields)
+        self.point_builders = dict(DEFAULT_POINT_FIELDS if point_fields is None else point_fields)
+        self.full_field_fraction = FULL_FIELD_FRACTION
+        self.pinned = False
+        self._pin_version = None
+        self._entries = {}
+        self._point_entries = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reinicia los contadores de aciertos y fallos."""
+        self.stats = {'hits': 0, 'misses': 0, 'fields': {}}
+
+    def register(self, name, builder):
+        """Registra un campo nuevo: `builder(environment, **params)`."""
+        self.builders[name] = builder
+        self.point_builders.pop(name, None)
+        self.invalidate(name)
+
+    def invalidate(self, name=None):
+        """Descarta las entradas de un campo (o todas)."""
+        if name is None:
+            self._entries.clear()
+            self._point_entries.clear()
+        else:
+            self._entries = {key: entry for key, entry in self._entries.items() if key[0] != name}
+            self._point_entries = {key: entry for key, entry in self._point_entries.items() if key[0] != name}
+
+    def pin(self):
+        """Comparte los campos calculados a partir de ahora hasta `unpin`."""
+        self.pinned = True
+        self._pin_version = self.environment.version
+
+    def unpin(self):
+        self.pinned = False
+        self._pin_version = None
+        self._point_entries.clear()
+
+    def _is_fresh(self, version):
+        if version == self.environment.version:
+            return True
+        return self.pinned and version >= self._pin_version
+
+    def get(self, name, **params):
+        """Valor del campo `name` para la versión actual (o la fijada) de la rejilla."""
+        key = (name, tuple(sorted(params.items())))
+        entry = self._entries.get(key)
+        field_stats = self.stats['fields'].setdefault(name, {'hits': 0, 'misses': 0})
+        if entry is not None and self._is_fresh(entry[0]):
+            self.stats['hits'] += 1
+            field_stats['hits'] += 1
+            return entry[1]
+
+        self.stats['misses'] += 1
+        field_stats['misses'] += 1
+        value = self.builders[name](self.environment, **params)
+        self._entries[key] = (self.environment.version, value)
+        return value
+
+    def _count(self, name, hit):
+        field_stats = self.stats['fields'].setdefault(name, {'hits': 0, 'misses': 0})
+        outcome = 'hits' if hit else 'misses'
+        self.stats[outcome] += 1
+        field_stats[outcome] += 1
+
+    def get_at(self, name, cells, **params):
+        """Valor del campo `name` en las celdas enteras `cells` (N, 2).
+
+        Usa el campo completo si ya está calculado y vigente. Si no, evalúa solo
+        las celdas pedidas; con la caché fijada memoiza cada celda hasta `unpin`
+        y pasa al campo completo cuando se han consultado muchas celdas.
+        """
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        key = (name, tuple(sorted(params.items())))
+        entry = self._entries.get(key)
+        point_builder = self.point_builders.get(name)
+        grid_size = self.environment.grid.size
+        if (entry is not None and self._is_fresh(entry[0])) or point_builder is None:
+            return self.get(name, **params)[..., cells[:, 0], cells[:, 1]]
+
+        if not self.pinned:
+            if len(cells) >= grid_size * self.full_field_fraction:
+                return self.get(name, **params)[..., cells[:, 0], cells[:, 1]]
+            self._count(name, False)
+            return point_builder(self.environment, cells, **params)
+
+        memo = self._point_entries.setdefault(key, {})
+        flat = cells[:, 0] * self.environment.grid.shape[1] + cells[:, 1]
+        missing = np.unique([cell for cell in flat.tolist() if cell not in memo])
+        if len(memo) + len(missing) >= grid_size * self.full_field_fraction:
+            self._point_entries.pop(key, None)
+            return self.get(name, **params)[..., cells[:, 0], cells[:, 1]]
+
+        self._count(name, len(missing) == 0)
+        if len(missing):
+            missing_cells = np.stack(np.divmod(missing, self.environment.grid.shape[1]), axis=-1)
+            values = np.asarray(point_builder(self.environment, missing_cells, **params))
+            for index, cell in enumerate(missing.tolist()):
+                memo[cell] = values[..., index]
+        return np.stack([memo[cell] for cell in flat.tolist()], axis=-1)
+
+    def get_stats(self):
+        """Aciertos y fallos globales y por campo, y entradas en caché."""
+        stats = {'hits': self.stats['hits'], 'misses': self.stats['misses'],
+                 'fields': {name: dict(counts) for name, counts in self.stats['fields'].items()}}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['entries'] = len(self._entries)
+        stats['point_entries'] = sum(len(memo) for memo in self._point_entries.values())
+        stats['pinned'] = self.pinned
+        return stats
+
+    def __repr__(self):
+        return f"DerivedFieldCache(campos={sorted(self.builders)}, entradas={len(self._entries)}, fijada={self.pinned})"
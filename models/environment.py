@@ -1,21 +1,67 @@
 # models/environment.py
 
 import numpy as np
+from models.perception import toroidal_displacement, disk_stencil, stencil_cells
+from models.region_table import RegionSumTable
+from models.hotspots import HotspotIndex, regeneration_bound
+from models.derived_fields import DerivedFieldCache
+from models.precision import PrecisionPolicy, DEFAULT_PRECISION
+from models.grid_kernels import TiledGridKernels
 
 class Environment:
-    def __init__(self, grid_size=(50, 50), max_resource=100.0, regeneration_rate=1.5):
+    def __init__(self, grid_size=(50, 50), max_resource=100.0, regeneration_rate=1.5, precision=DEFAULT_PRECISION,
+                 grid_threads=None):
         self.grid_size = np.array(grid_size)
-        self.grid = np.zeros(grid_size)  # Inicialización real se hará desde app.py o desde el engine
+        self._hotspot_index = None
+        # Versión de la rejilla: aumenta con cada mutación y valida los campos derivados
+        self.version = 0
+        self.derived = DerivedFieldCache(self)
+        # Precisión numérica de la rejilla ('float64', 'float32' o punto fijo 'uint16')
+        self.precision = PrecisionPolicy(precision)
+        # Kernels por teselas para las actualizaciones de toda la rejilla
+        self.grid_kernels = TiledGridKernels(grid_threads)
         self.max_resource = max_resource
         self.regeneration_rate = regeneration_rate
+        self.grid = np.zeros(grid_size)  # Inicialización real se hará desde app.py o desde el engine
 
         # El RNG ahora lo recibirá desde el modo o Engine. Por ahora, si no lo tiene, usa np.random
         self.rng = None
 
+        # Ráster territorial compartido; lo asigna el motor (`TerritoryRaster`)
+        self.territory = None
+
     def set_rng(self, rng_instance):
         """Permite que el RNG se inyecte en el entorno."""
         self.rng = rng_instance
 
+    @property
+    def grid(self):
+        return self._grid
+
+    @grid.setter
+    def grid(self, value):
+        self._grid = np.asarray(value, dtype=self.precision.dtype)
+        self.mark_grid_modified()
+
+    def mark_grid_modified(self, quantized=False):
+        """Invalida los campos derivados tras modificar `grid` in situ desde fuera.
+
+        Con `quantized=True` el llamador ya dejó la rejilla en la malla de punto
+        fijo (como `TiledGridKernels.regenerate`) y no se vuelve a cuantizar.
+        """
+        if self.precision.quantized and not quantized:
+            self._grid[...] = self.precision.cast(self._grid, self.max_resource)
+        self.version += 1
+        self._region_table = None
+        if self._hotspot_index is not None:
+            self._hotspot_index.stale = True
+
+    def region_table(self):
+        """Tabla de sumas acumuladas periódica de la rejilla (se recalcula bajo demanda)."""
+        if self._region_table is None:
+            self._region_table = RegionSumTable(self._grid)
+        return self._region_table
+
     def is_valid_position(self, position):
         """Verifica si una posición está dentro del grid."""
         return (0 <= position[0] < self.grid_size[0] and
@@ -25,6 +71,10 @@ class Environment:
         """Convierte posición a coordenadas toroidales."""
         return np.mod(position, self.grid_size)
 
+    def get_toroidal_distance(self, position_a, position_b):
+        """Distancia euclídea mínima entre dos posiciones sobre el toro."""
+        return float(np.linalg.norm(toroidal_displacement(position_a, position_b, self.grid_size)))
+
     def get_resource(self, position):
         """Obtiene la cantidad de recurso en una posición."""
         pos = self.get_toroidal_position(np.array(position)).astype(int)
@@ -35,7 +85,17 @@ class Environment:
         pos = self.get_toroidal_position(np.array(position)).astype(int)
         current = self.grid[pos[0], pos[1]]
         consumed = min(current, amount)
-        self.grid[pos[0], pos[1]] = max(0, current - consumed)
+        remaining = max(0, current - consumed)
+        if self.precision.quantized:
+            # Redondeo hacia arriba: nunca se consume más de lo pedido
+            remaining = min(current, self.precision.cast(remaining, self.max_resource, rounding=np.ceil)[()])
+            consumed = current - remaining
+        self.grid[pos[0], pos[1]] = remaining
+        self.version += 1
+        if self._region_table is not None and not self._region_table.record_change(pos, self.grid[pos[0], pos[1]] - current):
+            self._region_table = None
+        if self._hotspot_index is not None:
+            self._hotspot_index.update_cell(int(pos[0]) * self.grid.shape[1] + int(pos[1]), self.grid[pos[0], pos[1]])
         return consumed
 
     def consume_resource(self, position, amount):
@@ -44,37 +104,52 @@ class Environment:
 
     def regenerate(self, dt):
         """Regenera recursos usando crecimiento logístico."""
-        # Crecimiento logístico
-        growth = self.regeneration_rate * self.grid * (1 - self.grid / self.max_resource) * dt
-        self.grid = np.minimum(self.grid + growth, self.max_resource)
-
-        # Añadir variabilidad estocástica pequeña, usando self.rng si está disponible
+        # Variabilidad estocástica pequeña, usando self.rng si está disponible
         if self.rng:
-            noise = self.rng.random_normal(0, 0.05, size=self.grid.shape) * dt
+            noise = self.rng.random_normal(0, 0.05, size=self.grid.shape)
         else:
-            noise = np.random.normal(0, 0.05, self.grid.shape) * dt  # Fallback si no hay RNG asignado
-        self.grid = np.maximum(0, self.grid + noise)
+            noise = np.random.normal(0, 0.05, self.grid.shape)  # Fallback si no hay RNG asignado
+
+        # Crecimiento logístico, ruido y recortes fusionados por teselas (en el lugar)
+        noise_max = self.grid_kernels.regenerate(self._grid, noise, self.regeneration_rate, self.max_resource, dt, self.precision)
+        index = self._hotspot_index
+        fresh = index is not None and not index.stale
+        self.mark_grid_modified(quantized=True)
+        if fresh:
+            # La cota de las celdas fuera del top-k se avanza sin recorrer la rejilla
+            index.refresh(self._grid, regeneration_bound(index.outside_bound, self.regeneration_rate, self.max_resource,
+                                                         dt, noise_max, self.precision.step(self.max_resource)))
 
     def get_resource_density(self):
         """Calcula la densidad promedio de recursos."""
-        return np.mean(self.grid)
+        return self.derived.get('aggregates')['mean']
 
     def get_total_resources(self):
         """Obtiene el total de recursos en el entorno."""
-        return np.sum(self.grid)
+        return self.derived.get('aggregates')['total']
 
     def get_resource_grid_info(self):
         """Retorna información estadística del grid de recursos."""
+        aggregates = self.derived.get('aggregates')
         return {
-            'total': self.get_total_resources(),
-            'average': self.get_resource_density(),
-            'max': np.max(self.grid),
-            'min': np.min(self.grid),
-            'std': np.std(self.grid),
+            'total': aggregates['total'],
+            'average': aggregates['mean'],
+            'max': aggregates['max'],
+            'min': aggregates['min'],
+            'std': aggregates['std'],
             'grid_size': self.grid_size.tolist(),
+            'precision': self.precision.name,
             'max_capacity': self.max_resource * self.grid_size[0] * self.grid_size[1]
         }
 
+    def export_grid(self):
+        """Rejilla en el formato de almacenamiento de la política de precisión."""
+        return self.precision.encode(self.grid, self.max_resource)
+
+    def import_grid(self, stored):
+        """Carga una rejilla guardada con `export_grid`."""
+        self.grid = self.precision.decode(stored, self.max_resource)
+
     def get_resource_distribution(self):
         """Retorna la distribución de recursos para análisis."""
         flattened = self.grid.flatten()
@@ -90,54 +165,71 @@ class Environment:
         }
 
     def get_local_resource_density(self, position, radius=2):
-        """Obtiene la densidad promedio de recursos en un área local."""
-        pos = self.get_toroidal_position(np.array(position)).astype(int)
-        total_resources = 0
-        cell_count = 0
+        """Obtiene la densidad promedio de recursos en un área local (disco de radio `radius`)."""
+        return float(self.get_local_resource_densities(np.asarray(position)[None], radius)[0])
 
-        for dx in range(-radius, radius + 1):
-            for dy in range(-radius, radius + 1):
-                if dx*dx + dy*dy <= radius*radius:  # Círculo en lugar de cuadrado
-                    check_pos = self.get_toroidal_position(pos + np.array([dx, dy])).astype(int)
-                    total_resources += self.grid[check_pos[0], check_pos[1]]
-                    cell_count += 1
+    def get_local_resource_densities(self, positions, radius=2):
+        """Densidad promedio en el disco de radio `radius` para muchas posiciones (..., 2).
 
-        return total_resources / cell_count if cell_count > 0 else 0
+        Con la caché de campos fijada (durante un paso del motor) cada celda se
+        evalúa una vez por paso y se comparte; fuera de ella se lee de la tabla
+        de sumas acumuladas.
+        """
+        cells = self.get_toroidal_position(np.asarray(positions)).astype(int)
+        if self.derived.pinned:
+            return self.derived.get_at('density', cells, radius=int(radius)).reshape(cells.shape[:-1])
+        return self.region_table().disk_mean(cells, int(radius))
+
+    def get_box_means(self, positions, half_size=2):
+        """Media de recursos en cuadrados (2·half_size+1)² centrados en cada posición (..., 2)."""
+        cells = self.get_toroidal_position(np.asarray(positions)).astype(int)
+        return self.region_table().box_mean(cells, half_size)
 
     def add_resource_patch(self, center_position, radius, amount):
         """Añade un parche de recursos en una ubicación específica."""
-        center = self.get_toroidal_position(np.array(center_position)).astype(int)
-        
-        for dx in range(-radius, radius + 1):
-            for dy in range(-radius, radius + 1):
-                distance = np.sqrt(dx*dx + dy*dy)
-                if distance <= radius:
-                    # Distribución gaussiana dentro del parche
-                    intensity = np.exp(-(distance**2) / (2 * (radius/3)**2))
-                    patch_pos = self.get_toroidal_position(center + np.array([dx, dy])).astype(int)
-                    
-                    added_resource = amount * intensity
-                    current_resource = self.grid[patch_pos[0], patch_pos[1]]
-                    self.grid[patch_pos[0], patch_pos[1]] = min(
-                        self.max_resource, 
-                        current_resource + added_resource
-                    )
+        self.add_resource_patches([center_position], radius, [amount])
+
+    def add_resource_patches(self, center_positions, radius, amounts):
+        """Añade varios parches gaussianos (mismo radio) con un único estampado indexado.
+
+        Equivale a llamar a `add_resource_patch` para cada centro en orden: con
+        cantidades no negativas basta recortar una vez tras sumar; si alguna es
+        negativa se aplica por capas de apariciones, recortando en cada una.
+        """
+        centers = self.get_toroidal_position(np.asarray(center_positions, dtype=float).reshape(-1, 2)).astype(int)
+        if len(centers) == 0:
+            return
+        _, distances = disk_stencil(radius)
+        # Distribución gaussiana dentro del parche
+        intensity = np.exp(-(distances**2) / (2 * (radius/3)**2))
+        added = np.asarray(amounts, dtype=float).reshape(-1, 1) * intensity
+
+        cells = np.concatenate([stencil_cells(center, radius, self.grid.shape) for center in centers])
+        added = added.ravel()
+        if np.all(added >= 0):
+            index = (cells[:, 0], cells[:, 1])
+            np.add.at(self.grid, index, added)
+            self.grid[index] = np.minimum(self.grid[index], self.max_resource)
+        else:
+            for layer in _occurrence_layers(np.ravel_multi_index((cells[:, 0], cells[:, 1]), self.grid.shape)):
+                index = (cells[layer, 0], cells[layer, 1])
+                self.grid[index] = np.minimum(self.grid[index] + added[layer], self.max_resource)
+        self.mark_grid_modified()
 
     def deplete_area(self, center_position, radius, depletion_factor=0.5):
         """Agota recursos en un área específica."""
-        center = self.get_toroidal_position(np.array(center_position)).astype(int)
-        
-        for dx in range(-radius, radius + 1):
-            for dy in range(-radius, radius + 1):
-                distance = np.sqrt(dx*dx + dy*dy)
-                if distance <= radius:
-                    # Deplección más intensa en el centro
-                    intensity = 1.0 - (distance / radius) * 0.5  # Entre 0.5 y 1.0
-                    depletion_pos = self.get_toroidal_position(center + np.array([dx, dy])).astype(int)
-                    
-                    current_resource = self.grid[depletion_pos[0], depletion_pos[1]]
-                    depleted_amount = current_resource * depletion_factor * intensity
-                    self.grid[depletion_pos[0], depletion_pos[1]] = max(0, current_resource - depleted_amount)
+        _, distances = disk_stencil(radius)
+        # Deplección más intensa en el centro
+        intensity = 1.0 - (distances / radius) * 0.5  # Entre 0.5 y 1.0
+        cells = stencil_cells(self.get_toroidal_position(np.asarray(center_position, dtype=float)), radius, self.grid.shape)
+
+        # Si el disco envuelve el toro una celda aparece varias veces: se aplica por capas
+        for layer in _occurrence_layers(np.ravel_multi_index((cells[:, 0], cells[:, 1]), self.grid.shape)):
+            index = (cells[layer, 0], cells[layer, 1])
+            current_resource = self.grid[index]
+            depleted_amount = current_resource * depletion_factor * intensity[layer]
+            self.grid[index] = np.maximum(0, current_resource - depleted_amount)
+        self.mark_grid_modified()
 
     def reset_resources(self, distribution_type='uniform', **kwargs):
         """Reinicia la distribución de recursos según el tipo especificado."""
@@ -168,23 +260,28 @@ class Environment:
             patch_radius = kwargs.get('patch_radius', 5)
             patch_intensity = kwargs.get('patch_intensity', self.max_resource * 0.9)
             
+            patch_centers = []
             for _ in range(num_patches):
                 if self.rng:
-                    patch_center = [
+                    patch_centers.append([
                         self.rng.random_randint(0, self.grid_size[0]),
                         self.rng.random_randint(0, self.grid_size[1])
-                    ]
+                    ])
                 else:
-                    patch_center = [
+                    patch_centers.append([
                         np.random.randint(0, self.grid_size[0]),
                         np.random.randint(0, self.grid_size[1])
-                    ]
-                self.add_resource_patch(patch_center, patch_radius, patch_intensity)
+                    ])
+            self.add_resource_patches(patch_centers, patch_radius, [patch_intensity] * num_patches)
+        self.mark_grid_modified()
 
     def get_gradient(self, position):
         """Calcula el gradiente de recursos en una posición."""
         pos = self.get_toroidal_position(np.array(position)).astype(int)
-        
+        if self.derived.pinned:
+            # Gradiente compartido por todos los clanes durante el paso (memoizado por celda)
+            return self.derived.get_at('gradient', pos[None])[:, 0]
+
         # Calcular gradiente usando diferencias finitas
         dx_pos = self.get_toroidal_position(pos + np.array([1, 0])).astype(int)
         dx_neg = self.get_toroidal_position(pos + np.array([-1, 0])).astype(int)
@@ -199,20 +296,41 @@ class Environment:
     def find_resource_hotspots(self, threshold_percentile=90):
         """Encuentra las ubicaciones con más recursos (hotspots)."""
         threshold = np.percentile(self.grid, threshold_percentile)
-        hotspots = []
-        
-        for i in range(self.grid_size[0]):
-            for j in range(self.grid_size[1]):
-                if self.grid[i, j] >= threshold:
-                    hotspots.append({
-                        'position': [i, j],
-                        'resource_level': self.grid[i, j],
-                        'relative_density': self.grid[i, j] / self.max_resource
-                    })
-        
-        # Ordenar por nivel de recursos
-        hotspots.sort(key=lambda x: x['resource_level'], reverse=True)
-        return hotspots
+        cells = np.flatnonzero(self.grid.ravel() >= threshold)
+        levels = self.grid.ravel()[cells]
+
+        # Ordenar por nivel de recursos (estable: a igual nivel, orden de recorrido)
+        order = np.argsort(-levels, kind='stable')
+        return self._hotspot_records(cells[order], levels[order])
+
+    def get_top_hotspots(self, k=10):
+        """Las `k` celdas con más recurso, servidas por un índice top-k incremental."""
+        if self._hotspot_index is None or self._hotspot_index.k < k:
+            self._hotspot_index = HotspotIndex(k)
+        cells, levels = self._hotspot_index.top(self.grid, k)
+        return self._hotspot_records(cells, levels)
+
+    def _hotspot_records(self, cells, levels):
+        rows, cols = np.divmod(cells, self.grid.shape[1])
+        return [
+            {'position': [row, col], 'resource_level': level, 'relative_density': level / self.max_resource}
+            for row, col, level in zip(rows.tolist(), cols.tolist(), levels.tolist())
+        ]
 
     def __repr__(self):
-        return f"Environment(size={self.grid_size}, avg_resource={self.get_resource_density():.2f}, total={self.get_total_resources():.1f})"
\ No newline at end of file
+        return f"Environment(size={self.grid_size}, avg_resource={self.get_resource_density():.2f}, total={self.get_total_resources():.1f})"
+
+
+def _occurrence_layers(flat_cells):
+    """Divide una secuencia de celdas en capas sin repetidos, respetando el orden.
+
+    La capa k contiene la k-ésima aparición de cada celda, de modo que aplicar las
+    capas en orden reproduce un recorrido secuencial celda a celda.
+    """
+    order = np.argsort(flat_cells, kind='stable')
+    sorted_cells = flat_cells[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_cells)) + 1]
+    counts = np.diff(np.r_[starts, len(sorted_cells)])
+    occurrence = np.empty(len(flat_cells), dtype=int)
+    occurrence[order] = np.arange(len(sorted_cells)) - np.repeat(starts, counts)
+    return [np.flatnonzero(occurrence == k) for k in range(int(occurrence.max()) + 1)] if len(flat_cells) else []
@@ -1,47 +1,128 @@
 import numpy as np
 
-def population_dynamics(current_population, birth_rate, natural_death_rate, competition_rate, starvation_rate):
+# Las ecuaciones aceptan escalares o arrays (una entrada por clan o por celda) y
+# siguen las reglas de broadcasting de NumPy: una llamada evalúa toda la población.
+
+# Constantes del modelo demográfico del motor (ver simulation.kernels)
+STARVATION_MORTALITY_ZERO_ENERGY = 0.8
+STARVATION_MORTALITY_LOW_ENERGY = 0.4
+LOW_ENERGY_THRESHOLD = 25.0
+REPRODUCTION_ENERGY_THRESHOLD = 30.0
+# Por debajo de medio individuo el clan se considera extinto
+EXTINCTION_SIZE = 0.5
+
+
+def population_dynamics(current_population, birth_rate, natural_death_rate, competition_rate=0.0, starvation_rate=0.0):
     """
     Ecuación diferencial para dinámicas poblacionales
-    dN/dt = birth_rate * N - natural_death_rate * N - competition_rate * N - starvation_rate * N
+    dN/dt = (birth_rate - natural_death_rate - competition_rate - starvation_rate) * N
+    """
+    current_population = np.asarray(current_population, dtype=float)
+    net_rate = birth_rate - natural_death_rate - competition_rate - starvation_rate
+    result = np.where(current_population > 0, net_rate * current_population, 0.0)
+    return result[()] if result.ndim == 0 else result
+
+def resource_evolution(resource, regeneration_rate, consumption=0.0, max_resource=100.0):
+    """
+    Ecuación de los recursos de una celda
+    dR/dt = alpha * R_max * (1 - R / R_max) - C
     """
-    if current_population <= 0:
-        return 0
-    
-    growth = birth_rate * current_population
-    deaths = (natural_death_rate + competition_rate + starvation_rate) * current_population
-    
-    return growth - deaths
+    resource = np.asarray(resource, dtype=float)
+    result = regeneration_rate * max_resource * (1 - resource / max_resource) - consumption
+    return result[()] if result.ndim == 0 else result
 
-def starvation_mortality(resource_per_capita, threshold=0.5, max_mortality=0.3):
+def starvation_mortality(resource_per_capita, resource_required=0.5, max_mortality=0.3):
     """
-    Calcula la mortalidad por inanición basada en recursos per capita
+    Mortalidad por inanición según los recursos per cápita
+    mu_s = mu_s_max * exp(-R_local / R_req)
     """
-    if resource_per_capita >= threshold:
-        return 0.0
-    
-    # Mortalidad exponencial cuando los recursos son escasos
-    mortality = max_mortality * np.exp(-resource_per_capita / threshold)
-    return min(mortality, max_mortality)
+    resource_per_capita = np.maximum(np.asarray(resource_per_capita, dtype=float), 0.0)
+    result = max_mortality * np.exp(-resource_per_capita / resource_required)
+    return result[()] if result.ndim == 0 else result
 
-def cooperative_consumption(individual_consumption, group_size, cooperation_factor, 
-                          resource_concentration, efficiency):
+def cooperative_consumption(individual_consumption, group_size, cooperation_factor,
+                            resource_concentration, efficiency):
     """
-    Modelo de consumo cooperativo de recursos
+    Consumo cooperativo de recursos: economía de escala en el tamaño del grupo
+    C = c * N^(1 - k) * rho * eta
     """
-    cooperation_bonus = cooperation_factor * np.log(1 + group_size)
-    base_consumption = individual_consumption * efficiency
-    
-    return base_consumption * (1 + cooperation_bonus) * resource_concentration
+    group_size = np.asarray(group_size, dtype=float)
+    result = individual_consumption * group_size ** (1 - np.asarray(cooperation_factor)) * resource_concentration * efficiency
+    return result[()] if result.ndim == 0 else result
 
-def clan_movement(current_position, resource_gradient, movement_speed, noise_std=0.1):
+def clan_movement(velocity, resource_gradient, noise_std=0.1, noise=None, rng=None):
     """
-    Calcula el movimiento del clan basado en gradiente de recursos
+    Velocidad del clan según el gradiente de recursos
+    dp/dt = v * grad(R) + sigma * epsilon
+
+    `noise` (epsilon) se sortea con `rng` (o np.random) si no se proporciona.
+    """
+    movement = np.asarray(velocity, dtype=float) * np.asarray(resource_gradient, dtype=float)
+    if noise is None:
+        noise = rng.random_normal(0, 1, size=movement.shape) if rng is not None else np.random.normal(0, 1, movement.shape)
+    return movement + noise_std * np.asarray(noise, dtype=float)
+
+
+# === Tasas del modelo demográfico del motor ===
+
+def energy_starvation_rate(energy):
+    """Mortalidad por inanición (por individuo y unidad de tiempo) según la energía del clan."""
+    energy = np.asarray(energy, dtype=float)
+    low = (1.0 - energy / LOW_ENERGY_THRESHOLD) * STARVATION_MORTALITY_LOW_ENERGY
+    return np.where(energy <= 0, STARVATION_MORTALITY_ZERO_ENERGY,
+                    np.where(energy < LOW_ENERGY_THRESHOLD, low, 0.0))
+
+def energy_birth_rate(energy, birth_rate):
+    """Natalidad efectiva: crece linealmente con la energía por encima del umbral reproductivo."""
+    energy = np.asarray(energy, dtype=float)
+    modifier = np.minimum(1.0, (energy - REPRODUCTION_ENERGY_THRESHOLD) / 70.0)
+    return np.where(energy > REPRODUCTION_ENERGY_THRESHOLD, birth_rate * modifier, 0.0)
+
+def demographic_rates(energy, birth_rate, natural_death_rate):
+    """Tasa neta per cápita de cada clan: dN/dt = rate * N con la energía del paso."""
+    return energy_birth_rate(energy, birth_rate) - natural_death_rate - energy_starvation_rate(energy)
+
+
+# === Integradores ===
+
+def euler_step(derivative, state, dt):
+    """Euler explícito: y + dt * f(y)."""
+    return state + dt * derivative(state)
+
+def rk4_step(derivative, state, dt):
+    """Runge-Kutta clásico de cuarto orden."""
+    k1 = derivative(state)
+    k2 = derivative(state + 0.5 * dt * k1)
+    k3 = derivative(state + 0.5 * dt * k2)
+    k4 = derivative(state + dt * k3)
+    return state + dt / 6.0 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+def exponential_step(state, rate, dt):
+    """Solución exacta de dy/dt = rate * y durante dt."""
+    return state * np.exp(rate * dt)
+
+def logistic_step(state, rate, capacity, dt):
+    """Solución exacta de dy/dt = rate * y * (1 - y / capacity) durante dt."""
+    growth = np.exp(rate * dt)
+    return capacity * state * growth / (capacity + state * (growth - 1))
+
+INTEGRATORS = {'euler': euler_step, 'rk4': rk4_step}
+POPULATION_INTEGRATORS = ('euler', 'rk4', 'exact')
+
+def integrate_population(sizes, rates, dt, method='exact'):
+    """Avanza dN/dt = rates * N un paso dt para toda la población a la vez.
+
+    'exact' usa la solución exponencial (estable para cualquier dt); 'euler' y
+    'rk4' integran la misma ecuación. Los tamaños no se redondean: solo los
+    clanes por debajo de `EXTINCTION_SIZE` pasan a 0.
     """
-    # Movimiento dirigido hacia recursos
-    movement = movement_speed * resource_gradient
-    
-    # Añadir ruido estocástico
-    noise = np.random.normal(0, noise_std, size=movement.shape)
-    
-    return movement + noise
\ No newline at end of file
+    sizes = np.asarray(sizes, dtype=float)
+    rates = np.asarray(rates, dtype=float)
+    if method == 'exact':
+        result = exponential_step(sizes, rates, dt)
+    elif method in INTEGRATORS:
+        result = INTEGRATORS[method](lambda n: population_dynamics(n, rates, 0.0), sizes, dt)
+    else:
+        raise ValueError(f"Integrador no soportado: {method}")
+    result = np.maximum(result, 0.0)
+    return np.where(result < EXTINCTION_SIZE, 0.0, result)
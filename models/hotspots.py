@@ -0,0 +1,137 @@
+# clan_territorial_simulation/models/hotspots.py
+import numpy as np
+
+# Holgura relativa para el redondeo en coma flotante (cubre float32)
+ROUNDING_SLACK = 8 * np.finfo(np.float32).eps
+
+
+def regeneration_bound(bound, regeneration_rate, max_resource, dt, noise_max, step=0.0):
+    """Cota superior, tras `TiledGridKernels.regenerate`, de las celdas que valían como mucho `bound`.
+
+    El crecimiento logístico x + r·x·(1 - x/max)·dt es cóncavo, así que su
+    máximo sobre (-inf, bound] está en el vértice o en `bound`; después se
+    recorta a `max`, se suma el ruido (`noise_max` es el máximo de noise·dt) y,
+    en punto fijo, cada uno de los dos redondeos puede subir medio `step`.
+    """
+    if np.isneginf(bound):
+        return bound
+    growth_rate = regeneration_rate * dt
+    if growth_rate < 0:
+        return np.inf
+    peak = min(bound, max_resource * (1 + growth_rate) / (2 * growth_rate)) if growth_rate > 0 else bound
+    grown = min(peak + growth_rate * peak * (1 - peak / max_resource), max_resource)
+    value = max(0.0, grown + noise_max + step)
+    return value + ROUNDING_SLACK * max(value, max_resource)
+
+
+class HotspotIndex:
+    """Conjunto top-k de celdas con más recurso, mantenido de forma incremental.
+
+    La reconstrucción completa usa selección parcial (`argpartition`) y guarda
+    `k + reserve` candidatas junto con una cota superior de los valores fuera
+    del conjunto. Los consumos puntuales solo actualizan el valor de la celda;
+    tras cambios globales basta con releer las candidatas y la cota. Tras la
+    regeneración la cota se avanza con `regeneration_bound` sin recorrer la
+    rejilla (O(k)); si esa cota holgada no basta para confirmar el top-k, o
+    tras otros cambios globales, se recalcula exacta en O(H·W). Solo se
+    reconstruye cuando la k-ésima candidata cae por debajo de la cota exacta.
+    Los empates en el umbral se resuelven de forma arbitraria.
+    """
+
+    def __init__(self, k=10, reserve=None):
+        self.k = int(k)
+        self.reserve = int(reserve) if reserve is not None else max(self.k, 16)
+        self.cells = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros(0)
+        self.outside_bound = -np.inf
+        self.stale = True
+        # True si `outside_bound` viene de `regeneration_bound` y no de recorrer la rejilla
+        self.loose_bound = False
+        self._member = None
+        self._slots = {}
+        self.stats = {'rebuilds': 0, 'refreshes': 0, 'scans': 0, 'updates': 0, 'queries': 0}
+
+    def rebuild(self, grid):
+        """Selección parcial de las `k + reserve` celdas con más recurso."""
+        flat = grid.ravel()
+        size = min(self.k + self.reserve, flat.size)
+        if size < flat.size:
+            cells = np.argpartition(flat, flat.size - size)[flat.size - size:]
+            # Todas las celdas excluidas valen como mucho el pivote de la partición
+            self.outside_bound = float(flat[cells].min())
+        else:
+            cells = np.arange(flat.size)
+            self.outside_bound = -np.inf
+
+        self.cells = cells.astype(np.int64)
+        self.values = flat[self.cells].astype(float)
+        self._member = np.zeros(flat.size, dtype=bool)
+        self._member[self.cells] = True
+        self._slots = {cell: slot for slot, cell in enumerate(self.cells.tolist())}
+        self.stale = False
+        self.loose_bound = False
+        self.stats['rebuilds'] += 1
+
+    def refresh(self, grid, outside_bound=None):
+        """Relee las candidatas y la cota tras un cambio global de la rejilla.
+
+        Con `outside_bound` (cota válida de las celdas fuera del conjunto, p. ej.
+        de `regeneration_bound`) cuesta O(k); sin ella recorre toda la rejilla.
+        """
+        if self._member is None or self._member.size != grid.size:
+            self.rebuild(grid)
+            return
+        flat = grid.ravel()
+        self.values = flat[self.cells].astype(float)
+        self.loose_bound = False
+        if self.cells.size < flat.size:
+            if outside_bound is not None:
+                self.outside_bound = float(outside_bound)
+                self.loose_bound = True
+            else:
+                self.outside_bound = float(np.where(self._member, -np.inf, flat).max())
+                self.stats['scans'] += 1
+        self.stale = False
+        self.stats['refreshes'] += 1
+
+    def update_cell(self, flat_index, value):
+        """Registra el nuevo valor de una celda (consumo o aporte puntual)."""
+        if self.stale:
+            return
+        self.stats['updates'] += 1
+        slot = self._slots.get(flat_index)
+        if slot is not None:
+            self.values[slot] = value
+        elif value > self.outside_bound:
+            self.outside_bound = float(value)
+
+    def is_valid(self):
+        """True si las k mejores candidatas siguen siendo el top-k real."""
+        if self.stale:
+            return False
+        if len(self.values) <= self.k:
+            return np.isneginf(self.outside_bound)
+        kth = np.partition(self.values, len(self.values) - self.k)[len(self.values) - self.k]
+        return kth >= self.outside_bound
+
+    def top(self, grid, k=None):
+        """Celdas planas y valores del top-k, ordenados de mayor a menor recurso."""
+        k = self.k if k is None else min(int(k), self.k)
+        self.stats['queries'] += 1
+        if self.stale:
+            self.refresh(grid)
+        if not self.is_valid() and self.loose_bound:
+            self.refresh(grid)
+        if not self.is_valid():
+            self.rebuild(grid)
+        order = np.lexsort((self.cells, -self.values))[:k]
+        return self.cells[order], self.values[order]
+
+    def get_stats(self):
+        """Contadores de reconstrucciones, refrescos, recorridos, actualizaciones y consultas."""
+        stats = dict(self.stats)
+        stats.update({'k': self.k, 'candidates': len(self.cells), 'stale': self.stale})
+        return stats
+
+    def __repr__(self):
+        return f"HotspotIndex(k={self.k}, candidatas={len(self.cells)}, cota={self.outside_bound:.2f})"
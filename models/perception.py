@@ -0,0 +1,68 @@
+# clan_territorial_simulation/models/perception.py
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def disk_stencil(radius):
+    """Desplazamientos (dx, dy) dentro de un disco de radio `radius` y sus distancias.
+
+    El orden coincide con el recorrido clásico `for dx: for dy:`. El resultado se
+    cachea por radio y los arrays se marcan como de solo lectura.
+    """
+    radius = int(radius)
+    span = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(span, span, indexing='ij')
+    inside = dx * dx + dy * dy <= radius * radius
+    offsets = np.column_stack([dx[inside], dy[inside]])
+    distances = np.sqrt((offsets ** 2).sum(axis=1))
+    offsets.flags.writeable = False
+    distances.flags.writeable = False
+    return offsets, distances
+
+
+def stencil_cells(center, radius, grid_shape):
+    """Celdas (envueltas toroidalmente) cubiertas por el disco centrado en `center`."""
+    offsets, _ = disk_stencil(radius)
+    base = np.floor(np.asarray(center, dtype=float)).astype(int)
+    return np.mod(base + offsets, np.asarray(grid_shape))
+
+
+def perceive_disk(grid, position, radius):
+    """Percibe todas las celdas del disco con un único acceso indexado.
+
+    Retorna `(cells, levels)`: un array (K, 2) de celdas y un array (K,) con el
+    recurso de cada una.
+    """
+    cells = stencil_cells(position, radius, grid.shape)
+    return cells, grid[cells[:, 0], cells[:, 1]]
+
+
+def toroidal_displacement(origin, targets, grid_size):
+    """Vector de desplazamiento mínimo en el toro desde `origin` hacia `targets`."""
+    grid_size = np.asarray(grid_size, dtype=float)
+    delta = np.asarray(targets, dtype=float) - origin
+    return np.mod(delta + grid_size / 2, grid_size) - grid_size / 2
+
+
+def best_resource_direction(cells, levels, position, grid_size=None):
+    """Dirección unitaria hacia la celda con más recurso (argmax vectorizado).
+
+    Ignora la celda propia (desplazamiento nulo) y, en caso de empate, elige la
+    primera celda en orden, igual que el recorrido secuencial original.
+    """
+    if len(levels) == 0:
+        return np.array([0.0, 0.0])
+
+    if grid_size is not None:
+        directions = toroidal_displacement(position, cells, grid_size)
+    else:
+        directions = np.asarray(cells, dtype=float) - position
+    norms = np.sqrt((directions ** 2).sum(axis=1))
+
+    candidates = np.where(norms > 0, np.asarray(levels, dtype=float), -np.inf)
+    best = int(np.argmax(candidates))
+    if not np.isfinite(candidates[best]):
+        return np.array([0.0, 0.0])
+    return directions[best] / norms[best]
@@ -0,0 +1,82 @@
+# clan_territorial_simulation/models/precision.py
+import numpy as np
+
+# Política -> (dtype de cálculo, dtype de almacenamiento/serialización)
+PRECISION_POLICIES = {
+    'float64': (np.float64, np.float64),
+    'float32': (np.float32, np.float32),
+    'uint16': (np.float32, np.uint16)
+}
+
+DEFAULT_PRECISION = 'float64'
+
+# Niveles del formato de punto fijo: 0 .. 65535 cubren [0, max_resource]
+FIXED_POINT_LEVELS = np.iinfo(np.uint16).max
+
+
+class PrecisionPolicy:
+    """Precisión numérica de la rejilla de recursos y los arrays derivados.
+
+    - 'float64': comportamiento original.
+    - 'float32': rejilla, campos derivados y réplicas en simple precisión.
+    - 'uint16': rejilla en punto fijo con paso `max_resource / 65535`. Se
+      calcula en float32 con los valores redondeados a la malla de punto fijo
+      y se serializa/almacena como uint16 (la mitad que float32).
+    """
+
+    def __init__(self, name=DEFAULT_PRECISION):
+        if isinstance(name, PrecisionPolicy):
+            name = name.name
+        if name not in PRECISION_POLICIES:
+            raise ValueError(f"Política de precisión no soportada: {name}")
+        self.name = name
+        self.dtype, self.storage_dtype = (np.dtype(t) for t in PRECISION_POLICIES[name])
+
+    @property
+    def quantized(self):
+        return self.storage_dtype.kind == 'u'
+
+    def step(self, max_resource):
+        """Resolución del formato de punto fijo (0 si no está cuantizado)."""
+        return max_resource / FIXED_POINT_LEVELS if self.quantized else 0.0
+
+    def cast(self, values, max_resource=None, rounding=np.rint):
+        """Convierte `values` al dtype de cálculo (y a la malla de punto fijo si aplica)."""
+        values = np.asarray(values, dtype=self.dtype)
+        if self.quantized:
+            step = self.step(max_resource)
+            values = np.clip(rounding(values / step), 0, FIXED_POINT_LEVELS).astype(self.dtype) * self.dtype.type(step)
+        return values
+
+    def encode(self, values, max_resource=None):
+        """Representación de almacenamiento (uint16 para punto fijo)."""
+        if self.quantized:
+            return np.clip(np.rint(np.asarray(values, dtype=np.float64) / self.step(max_resource)), 0, FIXED_POINT_LEVELS).astype(self.storage_dtype)
+        return np.asarray(values, dtype=self.storage_dtype)
+
+    def decode(self, stored, max_resource=None):
+        """Inversa de `encode`, en el dtype de cálculo."""
+        if self.quantized:
+            return np.asarray(stored, dtype=self.dtype) * self.dtype.type(self.step(max_resource))
+        return np.asarray(stored, dtype=self.dtype)
+
+    def bytes_per_cell(self):
+        return self.storage_dtype.itemsize
+
+    def __eq__(self, other):
+        return isinstance(other, PrecisionPolicy) and other.name == self.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return f"PrecisionPolicy({self.name!r})"
+
+
+def decode_resource_grid(state):
+    """Rejilla de recursos de un estado de `get_simulation_state` (codificada con `export_grid`).
+
+    Los estados sin 'precision' (formato anterior) se leen tal cual en float64.
+    """
+    policy = PrecisionPolicy(state.get('precision', DEFAULT_PRECISION))
+    return policy.decode(state.get('resource_grid', []), state.get('max_resource'))
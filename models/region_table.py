@@ -0,0 +1,100 @@
+# clan_territorial_simulation/models/region_table.py
+import numpy as np
+
+from models.perception import disk_stencil
+
+# Cambios puntuales acumulados antes de reconstruir la tabla completa
+MAX_PENDING_CHANGES = 64
+
+
+class RegionSumTable:
+    """Tabla de sumas acumuladas (summed-area table) periódica sobre una rejilla toroidal.
+
+    Cualquier suma sobre un rectángulo (con envoltura y de cualquier tamaño) se
+    responde con cuatro consultas a la tabla, en lote para muchos rectángulos a
+    la vez. Los cambios puntuales de la rejilla (consumo de un clan) se guardan
+    como correcciones pendientes y la tabla solo se reconstruye cuando se
+    acumulan demasiados.
+    """
+
+    def __init__(self, grid):
+        self.shape = np.array(grid.shape)
+        self.rebuild(grid)
+
+    def rebuild(self, grid):
+        """Recalcula la tabla a partir de la rejilla y descarta las correcciones."""
+        height, width = grid.shape
+        table = np.zeros((height + 1, width + 1))
+        np.cumsum(np.cumsum(grid, axis=0, dtype=np.float64), axis=1, out=table[1:, 1:])
+        self.table = table
+        self.total = table[height, width]
+        self._pending_cells = []
+        self._pending_deltas = []
+
+    def record_change(self, cell, delta):
+        """Registra `grid[cell] += delta`. Retorna False si conviene reconstruir."""
+        self._pending_cells.append(cell)
+        self._pending_deltas.append(delta)
+        return len(self._pending_deltas) <= MAX_PENDING_CHANGES
+
+    def _prefix(self, rows, cols):
+        """Suma de grid[0:rows, 0:cols] extendida periódicamente a cualquier entero."""
+        height, width = self.shape
+        row_laps, row_rest = np.divmod(rows, height)
+        col_laps, col_rest = np.divmod(cols, width)
+        return (row_laps * col_laps * self.total
+                + row_laps * self.table[height, col_rest]
+                + col_laps * self.table[row_rest, width]
+                + self.table[row_rest, col_rest])
+
+    def box_sum(self, row_start, col_start, height, width):
+        """Sumas de los rectángulos [row_start, row_start+height) × [col_start, col_start+width).
+
+        Los argumentos son enteros o arrays que se combinan por broadcasting.
+        """
+        row_start = np.asarray(row_start, dtype=np.int64)
+        col_start = np.asarray(col_start, dtype=np.int64)
+        row_end = row_start + height
+        col_end = col_start + width
+        sums = (self._prefix(row_end, col_end) - self._prefix(row_start, col_end)
+                - self._prefix(row_end, col_start) + self._prefix(row_start, col_start))
+
+        if self._pending_deltas:
+            sums = sums + self._pending_correction(row_start, col_start, height, width)
+        return sums
+
+    def _pending_correction(self, row_start, col_start, height, width):
+        """Aporte de los cambios puntuales pendientes a cada rectángulo."""
+        cells = np.asarray(self._pending_cells, dtype=np.int64)
+        deltas = np.asarray(self._pending_deltas, dtype=float)
+        height = np.asarray(height)[..., None]
+        width = np.asarray(width)[..., None]
+
+        # Veces que cada celda cae dentro del rectángulo (puede ser > 1 si envuelve el toro)
+        row_offset = np.mod(cells[:, 0] - row_start[..., None], self.shape[0])
+        col_offset = np.mod(cells[:, 1] - col_start[..., None], self.shape[1])
+        row_hits = np.maximum(0, -((row_offset - height) // self.shape[0]))
+        col_hits = np.maximum(0, -((col_offset - width) // self.shape[1]))
+        return (row_hits * col_hits * deltas).sum(axis=-1)
+
+    def box_mean(self, centers, half_size):
+        """Media del cuadrado de lado 2·half_size+1 centrado en cada celda de `centers` (..., 2)."""
+        centers = np.asarray(centers, dtype=np.int64)
+        side = 2 * half_size + 1
+        return self.box_sum(centers[..., 0] - half_size, centers[..., 1] - half_size, side, side) / (side * side)
+
+    def disk_sum(self, centers, radius):
+        """Suma exacta sobre el disco dx²+dy² <= radius² (una consulta por fila del disco)."""
+        centers = np.asarray(centers, dtype=np.int64)
+        dx = np.arange(-radius, radius + 1)
+        half_widths = np.floor(np.sqrt(radius * radius - dx * dx)).astype(np.int64)
+        rows = centers[..., 0, None] + dx
+        cols = centers[..., 1, None] - half_widths
+        return self.box_sum(rows, cols, 1, 2 * half_widths + 1).sum(axis=-1)
+
+    def disk_mean(self, centers, radius):
+        """Media sobre el mismo disco de celdas que `disk_stencil(radius)`."""
+        return self.disk_sum(centers, radius) / len(disk_stencil(radius)[0])
+
+    def __repr__(self):
+        return f"RegionSumTable(forma={self.shape.tolist()}, pendientes={len(self._pending_deltas)})"
@@ -1,11 +1,11 @@
 # clan_territorial_simulation/models/resource.py
 import numpy as np
-from config import GRID_SIZE, RESOURCE_MAX, RESOURCE_REGEN_RATE
+from config import GRID_SIZE, RESOURCE_MAX, RESOURCE_REGENERATION_RATE as RESOURCE_REGEN_RATE
 
 class ResourceGrid:
-    def __init__(self, initial_distribution='uniform'):
-        self.grid_size = np.array(GRID_SIZE)
-        self.grid = np.zeros(GRID_SIZE)
+    def __init__(self, grid_size=GRID_SIZE, initial_distribution='uniform'):
+        self.grid_size = np.array(grid_size)
+        self.grid = np.zeros(grid_size)
         if initial_distribution == 'uniform':
             self.grid[:] = RESOURCE_MAX  # Inicialmente recursos máximos en todas las celdas
 
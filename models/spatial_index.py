@@ -0,0 +1,178 @@
+# clan_territorial_simulation/models/spatial_index.py
+import time
+
+import numpy as np
+
+from models.perception import toroidal_displacement
+
+
+class SpatialIndex:
+    """Lista de celdas (cell list) toroidal para consultas de vecinos por radio.
+
+    Se reconstruye una vez por paso a partir de las posiciones de los clanes y
+    responde consultas por radio (amenazas, objetivos de combate) y la lista de
+    pares cercanos (interacciones) usando distancias sobre el toro. Los
+    resultados se devuelven en orden de índice, igual que un recorrido
+    exhaustivo de la lista.
+
+    Los elementos que se mueven después de reconstruir (`move_item`) actualizan
+    su posición; si cambian de bin se comprueban en todas las consultas hasta
+    la siguiente reconstrucción, de modo que nunca se responde con posiciones
+    antiguas.
+    """
+
+    def __init__(self, grid_size, bin_size=5.0):
+        self.grid_size = np.asarray(grid_size, dtype=float)
+        self.bin_size = float(bin_size)
+        self.num_bins = np.maximum(1, (self.grid_size // self.bin_size).astype(int))
+        self.bin_extent = self.grid_size / self.num_bins
+
+        self.items = []
+        self.positions = np.zeros((0, 2))
+        self._slots = {}
+        self._bins = np.zeros(0, dtype=int)
+        self._displaced = set()
+        self._sorted_items = np.zeros(0, dtype=int)
+        self._bin_starts = np.zeros(int(np.prod(self.num_bins)) + 1, dtype=int)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reinicia los contadores de tiempo y de trabajo."""
+        self.stats = {
+            'builds': 0,
+            'build_time': 0.0,
+            'queries': 0,
+            'query_time': 0.0,
+            'candidates_checked': 0
+        }
+
+    def __len__(self):
+        return len(self.items)
+
+    def _bin_cells_of(self, positions):
+        cells = np.floor(np.mod(positions, self.grid_size) / self.bin_extent).astype(int)
+        return np.minimum(cells, self.num_bins - 1)
+
+    def _bin_of(self, positions):
+        cells = self._bin_cells_of(positions)
+        return cells[..., 0] * self.num_bins[1] + cells[..., 1]
+
+    def rebuild(self, items, positions=None):
+        """Reconstruye el índice. `items` suele ser la lista de clanes."""
+        start = time.perf_counter()
+        self.items = list(items)
+        if positions is None:
+            positions = [item.position for item in self.items]
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+
+        bins = self._bin_of(self.positions)
+        self._sorted_items = np.argsort(bins, kind='stable')
+        counts = np.bincount(bins, minlength=int(np.prod(self.num_bins)))
+        self._bin_starts = np.concatenate([[0], np.cumsum(counts)])
+        self._bins = bins
+        self._slots = {id(item): slot for slot, item in enumerate(self.items)}
+        self._displaced = set()
+
+        self.stats['builds'] += 1
+        self.stats['build_time'] += time.perf_counter() - start
+
+    def move_item(self, item, position):
+        """Actualiza la posición de `item` tras la reconstrucción (ignorado si no está indexado)."""
+        slot = self._slots.get(id(item))
+        if slot is None:
+            return
+        self.positions[slot] = position
+        if self._bin_of(self.positions[slot]) != self._bins[slot]:
+            self._displaced.add(slot)
+
+    def _neighbor_bins(self, bin_cells, radius):
+        """Bins (únicos, envueltos) a distancia suficiente para cubrir `radius`."""
+        reach = np.ceil(radius / self.bin_extent).astype(int)
+        offsets_x = np.unique(np.mod(np.arange(-reach[0], reach[0] + 1), self.num_bins[0]))
+        offsets_y = np.unique(np.mod(np.arange(-reach[1], reach[1] + 1), self.num_bins[1]))
+        bx = np.mod(bin_cells[..., 0, None, None] + offsets_x[:, None], self.num_bins[0])
+        by = np.mod(bin_cells[..., 1, None, None] + offsets_y[None, :], self.num_bins[1])
+        return (bx * self.num_bins[1] + by).reshape(bin_cells.shape[:-1] + (-1,))
+
+    def query_radius(self, position, radius):
+        """Índices y distancias de los elementos a distancia <= `radius` de `position`."""
+        start = time.perf_counter()
+        if not self.items:
+            return np.zeros(0, dtype=int), np.zeros(0)
+
+        position = np.asarray(position, dtype=float)
+        bins = self._neighbor_bins(self._bin_cells_of(position), radius)
+        starts = self._bin_starts[bins]
+        ends = self._bin_starts[bins + 1]
+        candidates = np.concatenate([self._sorted_items[s:e] for s, e in zip(starts, ends)])
+        if self._displaced:
+            # Los elementos que cambiaron de bin pueden estar en cualquier parte
+            candidates = np.union1d(candidates, np.fromiter(self._displaced, dtype=int))
+        candidates.sort()
+
+        distances = np.sqrt((toroidal_displacement(position, self.positions[candidates], self.grid_size) ** 2).sum(axis=1))
+        within = distances <= radius
+
+        self.stats['queries'] += 1
+        self.stats['candidates_checked'] += len(candidates)
+        self.stats['query_time'] += time.perf_counter() - start
+        return candidates[within], distances[within]
+
+    def query_items(self, position, radius):
+        """Como `query_radius`, pero retorna pares (elemento, distancia)."""
+        indices, distances = self.query_radius(position, radius)
+        return [(self.items[i], d) for i, d in zip(indices, distances)]
+
+    def query_pairs(self, radius):
+        """Todos los pares (i, j), i < j, a distancia <= `radius`, en orden lexicográfico."""
+        start = time.perf_counter()
+        n = len(self.items)
+        if n < 2:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+        if self._displaced:
+            self.rebuild(self.items, self.positions)
+
+        bins = self._neighbor_bins(self._bin_cells_of(self.positions), radius)
+        starts = self._bin_starts[bins].ravel()
+        counts = self._bin_starts[bins + 1].ravel() - starts
+        owners = np.repeat(np.arange(n), bins.shape[1])
+
+        # Expandir cada (elemento, bin vecino) en sus elementos candidatos
+        total = int(counts.sum())
+        first = np.repeat(owners, counts)
+        run_offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = self._sorted_items[np.repeat(starts, counts) + run_offsets]
+
+        keep = first < second
+        first, second = first[keep], second[keep]
+        delta = toroidal_displacement(np.zeros(2), self.positions[second] - self.positions[first], self.grid_size)
+        distances = np.sqrt((delta ** 2).sum(axis=1))
+        within = distances <= radius
+        first, second, distances = first[within], second[within], distances[within]
+
+        order = np.lexsort((second, first))
+        self.stats['queries'] += 1
+        self.stats['candidates_checked'] += total
+        self.stats['query_time'] += time.perf_counter() - start
+        return first[order], second[order], distances[order]
+
+    def get_stats(self):
+        """Estadísticas de uso y tiempos acumulados del índice."""
+        stats = dict(self.stats)
+        stats['items'] = len(self.items)
+        stats['bins'] = int(np.prod(self.num_bins))
+        return stats
+
+    def __repr__(self):
+        return f"SpatialIndex(elementos={len(self.items)}, bins={self.num_bins.tolist()})"
+
+
+def brute_force_pairs(positions, radius, grid_size):
+    """Referencia O(n²) de `SpatialIndex.query_pairs` (mismas distancias toroidales)."""
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    n = len(positions)
+    first, second = np.triu_indices(n, k=1)
+    delta = toroidal_displacement(np.zeros(2), positions[second] - positions[first], grid_size)
+    distances = np.sqrt((delta ** 2).sum(axis=1))
+    within = distances <= radius
+    return first[within], second[within], distances[within]
@@ -1,48 +1,329 @@
+import math
+
 import numpy as np
 
+from models.perception import toroidal_displacement
+
 class Territory:
-    """Representa el territorio controlado por un clan"""
-    
-    def __init__(self):
+    """Representa el territorio controlado por un clan
+
+    Mantiene en O(1) por celda añadida/quitada (o por lote vectorizado) el área, el contador de bordes
+    (perímetro) y sumas acumuladas para el centroide. Con `grid_size` las
+    celdas se envuelven sobre el toro, la vecindad es toroidal y el centroide es
+    una media circular. Los territorios grandes pasan a un bitmap del tamaño de
+    la rejilla en lugar de un conjunto de tuplas.
+    """
+
+    NEIGHBOR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+    def __init__(self, grid_size=None, use_bitmap=None):
         self.area = 0
-        self.controlled_cells = set()
         self.boundary_strength = 1.0
-    
+        self.perimeter = 0
+        self.grid_size = tuple(int(n) for n in grid_size) if grid_size is not None else None
+
+        self._cells = set()
+        self._bitmap = None
+        # Por defecto el bitmap se activa cuando el conjunto ocuparía más memoria
+        self.bitmap_threshold = None
+        if self.grid_size is not None and use_bitmap is not False:
+            self.bitmap_threshold = 0 if use_bitmap else self.grid_size[0] * self.grid_size[1] // 16
+            if use_bitmap:
+                self._switch_to_bitmap()
+
+        self._sum = np.zeros(2)
+        self._sin_sum = np.zeros(2)
+        self._cos_sum = np.zeros(2)
+
+    @property
+    def controlled_cells(self):
+        """Conjunto de celdas (en modo bitmap se construye bajo demanda)."""
+        if self._bitmap is not None:
+            return set(map(tuple, np.argwhere(self._bitmap).tolist()))
+        return self._cells
+
+    @property
+    def uses_bitmap(self):
+        return self._bitmap is not None
+
+    def _switch_to_bitmap(self):
+        self._bitmap = np.zeros(self.grid_size, dtype=bool)
+        for cell in self._cells:
+            self._bitmap[cell] = True
+        self._cells = set()
+
+    def _normalize(self, position):
+        x, y = int(position[0]), int(position[1])
+        if self.grid_size is not None:
+            return x % self.grid_size[0], y % self.grid_size[1]
+        return x, y
+
+    def _has(self, cell):
+        if self._bitmap is not None:
+            return bool(self._bitmap[cell])
+        return cell in self._cells
+
+    def _neighbors_inside(self, cell):
+        x, y = cell
+        count = 0
+        for dx, dy in self.NEIGHBOR_OFFSETS:
+            if self._has(self._normalize((x + dx, y + dy))):
+                count += 1
+        return count
+
+    def _accumulate(self, cell, sign):
+        for axis in (0, 1):
+            self._sum[axis] += sign * cell[axis]
+            if self.grid_size is not None:
+                angle = 2 * math.pi * cell[axis] / self.grid_size[axis]
+                self._sin_sum[axis] += sign * math.sin(angle)
+                self._cos_sum[axis] += sign * math.cos(angle)
+
+    def _apply_cells(self, cells, sign, perimeter_delta):
+        """Añade (sign=1) o quita (sign=-1) un lote de celdas (K, 2) ya envueltas.
+
+        Las celdas deben ser distintas y estar todas ausentes (o todas
+        presentes); el cambio de perímetro lo calcula quien llama.
+        """
+        if self._bitmap is None and self.bitmap_threshold is not None and self.area + sign * len(cells) > self.bitmap_threshold:
+            self._switch_to_bitmap()
+        if self._bitmap is not None:
+            self._bitmap[cells[:, 0], cells[:, 1]] = sign > 0
+        elif sign > 0:
+            self._cells.update(map(tuple, cells.tolist()))
+        else:
+            self._cells.difference_update(map(tuple, cells.tolist()))
+        self.area += sign * len(cells)
+        self.perimeter += perimeter_delta
+        self._sum += sign * cells.sum(axis=0)
+        if self.grid_size is not None:
+            angles = 2 * np.pi * cells / np.asarray(self.grid_size, dtype=float)
+            self._sin_sum += sign * np.sin(angles).sum(axis=0)
+            self._cos_sum += sign * np.cos(angles).sum(axis=0)
+        if self.area == 0:
+            self._sum[:] = self._sin_sum[:] = self._cos_sum[:] = 0
+
     def add_cell(self, position):
         """Añade una celda al territorio"""
-        self.controlled_cells.add(tuple(position))
-        self.area = len(self.controlled_cells)
-    
+        cell = self._normalize(position)
+        if self._has(cell):
+            return
+        # Cada vecino ya presente convierte un borde compartido en interior
+        self.perimeter += 4 - 2 * self._neighbors_inside(cell)
+        if self._bitmap is not None:
+            self._bitmap[cell] = True
+        else:
+            self._cells.add(cell)
+        self.area += 1
+        self._accumulate(cell, 1)
+        if self._bitmap is None and self.bitmap_threshold is not None and self.area > self.bitmap_threshold:
+            self._switch_to_bitmap()
+
     def remove_cell(self, position):
         """Remueve una celda del territorio"""
-        self.controlled_cells.discard(tuple(position))
-        self.area = len(self.controlled_cells)
-    
+        cell = self._normalize(position)
+        if not self._has(cell):
+            return
+        if self._bitmap is not None:
+            self._bitmap[cell] = False
+        else:
+            self._cells.discard(cell)
+        self.perimeter -= 4 - 2 * self._neighbors_inside(cell)
+        self.area -= 1
+        self._accumulate(cell, -1)
+        if self.area == 0:
+            # Evita arrastrar error de redondeo en las sumas
+            self._sum[:] = self._sin_sum[:] = self._cos_sum[:] = 0
+
     def contains(self, position):
         """Verifica si una posición está en el territorio"""
-        return tuple(position) in self.controlled_cells
-    
+        return self._has(self._normalize(position))
+
     def get_perimeter(self):
         """Calcula el perímetro del territorio"""
-        if not self.controlled_cells:
-            return 0
-        
-        perimeter = 0
-        for cell in self.controlled_cells:
-            x, y = cell
-            # Contar celdas adyacentes que no están en el territorio
-            for dx, dy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                if (x+dx, y+dy) not in self.controlled_cells:
-                    perimeter += 1
-        
-        return perimeter
-    
+        return self.perimeter
+
     def get_centroid(self):
-        """Calcula el centroide del territorio"""
-        if not self.controlled_cells:
+        """Calcula el centroide del territorio (media circular si hay `grid_size`)"""
+        if self.area == 0:
             return np.array([0, 0])
-        
-        x_coords = [cell[0] for cell in self.controlled_cells]
-        y_coords = [cell[1] for cell in self.controlled_cells]
-        
-        return np.array([np.mean(x_coords), np.mean(y_coords)])
\ No newline at end of file
+
+        centroid = self._sum / self.area
+        if self.grid_size is not None:
+            period = np.array(self.grid_size, dtype=float)
+            resultant = np.hypot(self._sin_sum, self._cos_sum)
+            # Si las celdas se reparten por todo el toro en un eje, la media circular no está definida
+            defined = resultant > 1e-9 * self.area
+            circular = np.mod(np.arctan2(self._sin_sum, self._cos_sum) * period / (2 * np.pi), period)
+            circular = np.where(circular >= period, circular - period, circular)
+            centroid = np.where(defined, circular, centroid)
+        return centroid
+
+    def get_compactness(self):
+        """Compacidad isoperimétrica 4πA/P² (1 para un círculo ideal)"""
+        if self.perimeter == 0:
+            return 0.0
+        return 4 * np.pi * self.area / self.perimeter ** 2
+
+    def get_boundary_info(self):
+        """Resumen para `territorial_boundaries` del renderizador"""
+        return {
+            'territory_size': self.area,
+            'perimeter_size': self.perimeter,
+            'compactness': round(float(self.get_compactness()), 4),
+            'center': [float(c) for c in self.get_centroid()]
+        }
+
+
+# Valor de `owner` para celdas sin dueño
+NO_OWNER = -1
+
+
+class TerritoryRaster:
+    """Ráster compartido de propiedad territorial (id del clan dueño por celda).
+
+    Es la fuente de verdad del territorio: reclamar, disputar y recortar son
+    operaciones sobre arrays. La capa opcional `strength` guarda la fuerza con
+    la que se reclamó cada celda; una celda ajena solo cambia de dueño si la
+    nueva reclamación es más fuerte. Las coordenadas se envuelven siempre sobre
+    el toro. Cada clan tiene además un `Territory` incremental con área,
+    perímetro y centroide, actualizado solo con las celdas que cambian.
+    """
+
+    def __init__(self, grid_shape, track_strength=True):
+        self.shape = tuple(int(n) for n in grid_shape)
+        self.owner = np.full(self.shape, NO_OWNER, dtype=np.int32)
+        self.strength = np.zeros(self.shape, dtype=np.float32) if track_strength else None
+        self.version = 0
+        self.territories = {}
+
+    def _wrap(self, cells):
+        cells = np.asarray(cells).reshape(-1, 2).astype(int)
+        return np.mod(cells, self.shape)
+
+    def _territory(self, clan_id):
+        territory = self.territories.get(clan_id)
+        if territory is None:
+            territory = self.territories[clan_id] = Territory(self.shape)
+        return territory
+
+    def _reassign(self, cells, previous_owners, new_owner):
+        """Actualiza los `Territory` afectados por un lote de celdas que cambian de dueño.
+
+        Se llama antes de escribir `owner`. El perímetro se ajusta con el
+        recuento vectorizado de vecinos a 4: al entrar en un territorio, cada
+        celda aporta 4 - 2·(vecinos ya dentro) - (vecinos del mismo lote), y
+        al salir resta lo mismo con los vecinos que permanecen.
+        """
+        rows, cols = self.shape
+        offsets = np.array(Territory.NEIGHBOR_OFFSETS)
+        neighbors = np.mod(cells[:, None, :] + offsets[None], self.shape)
+        flat = cells[:, 0] * cols + cells[:, 1]
+        neighbor_flat = neighbors[..., 0] * cols + neighbors[..., 1]
+        in_batch = np.isin(neighbor_flat, flat)
+        neighbor_owner = self.owner[neighbors[..., 0], neighbors[..., 1]]
+
+        previous_owners = np.asarray(previous_owners)
+        left = previous_owners != NO_OWNER
+        if left.any():
+            same = neighbor_owner == previous_owners[:, None]
+            delta = 4 - 2 * (same & ~in_batch).sum(axis=1) - (same & in_batch).sum(axis=1)
+            owners, group = np.unique(previous_owners[left], return_inverse=True)
+            perimeter_deltas = np.bincount(group, weights=delta[left], minlength=len(owners))
+            order = np.argsort(group, kind='stable')
+            groups = np.split(cells[left][order], np.cumsum(np.bincount(group))[:-1])
+            for previous, lost, perimeter_delta in zip(owners.tolist(), groups, perimeter_deltas.tolist()):
+                territory = self.territories[previous]
+                territory._apply_cells(lost, -1, -int(perimeter_delta))
+                if territory.area == 0:
+                    del self.territories[previous]
+        if new_owner != NO_OWNER:
+            delta = 4 - 2 * (neighbor_owner == new_owner).sum(axis=1) - in_batch.sum(axis=1)
+            self._territory(new_owner)._apply_cells(cells, 1, int(delta.sum()))
+        self.version += 1
+
+    def claim(self, clan_id, cells, strength=1.0):
+        """Reclama celdas para `clan_id`. Retorna cuántas cambiaron de dueño."""
+        cells = np.unique(self._wrap(cells), axis=0)
+        index = (cells[:, 0], cells[:, 1])
+        current = self.owner[index]
+        if self.strength is not None:
+            # Disputa: una celda ajena cambia de dueño solo ante una reclamación más fuerte
+            won = (current == NO_OWNER) | ((current != clan_id) & (self.strength[index] < strength))
+            held = current == clan_id
+            self.strength[index[0][held], index[1][held]] = np.maximum(self.strength[index][held], strength)
+            self.strength[index[0][won], index[1][won]] = strength
+        else:
+            won = current == NO_OWNER
+
+        if not won.any():
+            return 0
+        self._reassign(cells[won], current[won], clan_id)
+        self.owner[index[0][won], index[1][won]] = clan_id
+        return int(won.sum())
+
+    def release(self, clan_id, cells=None):
+        """Libera las celdas indicadas (o todas) de `clan_id`."""
+        if cells is None:
+            return self.release_owners([clan_id])
+        cells = np.unique(self._wrap(cells), axis=0)
+        cells = cells[self.owner[cells[:, 0], cells[:, 1]] == clan_id]
+        if len(cells):
+            index = (cells[:, 0], cells[:, 1])
+            self._reassign(cells, np.full(len(cells), clan_id), NO_OWNER)
+            self.owner[index] = NO_OWNER
+            if self.strength is not None:
+                self.strength[index] = 0
+        return len(cells)
+
+    def release_owners(self, clan_ids):
+        """Libera todo el territorio de varios clanes (p. ej. extintos) en una pasada."""
+        clan_ids = [clan_id for clan_id in clan_ids if clan_id in self.territories]
+        if not clan_ids:
+            return 0
+        mask = np.isin(self.owner, clan_ids)
+        self.owner[mask] = NO_OWNER
+        if self.strength is not None:
+            self.strength[mask] = 0
+        released = sum(self.territories.pop(clan_id).area for clan_id in clan_ids)
+        self.version += 1
+        return released
+
+    def size_of(self, clan_id):
+        """Número de celdas de un clan (O(1))."""
+        territory = self.territories.get(clan_id)
+        return territory.area if territory else 0
+
+    def cells_of(self, clan_id):
+        """Celdas (K, 2) de un clan en orden de recorrido."""
+        return np.argwhere(self.owner == clan_id)
+
+    def trim(self, clan_id, max_cells, position):
+        """Conserva las `max_cells` celdas más cercanas a `position` (distancia toroidal)."""
+        max_cells = max(0, int(max_cells))
+        if self.size_of(clan_id) <= max_cells:
+            return 0
+        cells = self.cells_of(clan_id)
+        distances = (toroidal_displacement(position, cells, self.shape) ** 2).sum(axis=1)
+        order = np.argsort(distances, kind='stable')
+        return self.release(clan_id, cells[order[max_cells:]])
+
+    def summary(self):
+        """{id: (tamaño, centro)} para todos los clanes con territorio.
+
+        El centro es la media circular sobre el toro, de modo que un territorio
+        que cruza el borde no se desplaza al centro de la rejilla.
+        """
+        return {clan_id: (territory.area, territory.get_centroid()) for clan_id, territory in self.territories.items()}
+
+    def center_of(self, clan_id):
+        """Centro (media circular) del territorio de un clan, o None si no tiene."""
+        territory = self.territories.get(clan_id)
+        return None if territory is None else territory.get_centroid()
+
+    def get_boundaries(self):
+        """Datos `territorial_boundaries` (tamaño, perímetro, compacidad, centro) por clan."""
+        return {clan_id: territory.get_boundary_info() for clan_id, territory in self.territories.items()}
+
+    def __repr__(self):
+        return f"TerritoryRaster(forma={self.shape}, clanes={len(self.territories)}, celdas={sum(t.area for t in self.territories.values())})"
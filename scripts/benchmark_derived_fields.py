@@ -0,0 +1,53 @@
+# clan_territorial_simulation/scripts/benchmark_derived_fields.py
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.clan import Clan
+from models.environment import Environment
+from simulation.engine import SimulationEngine
+from simulation.modes import HybridMode
+from simulation.random_generators import MersenneTwister
+
+NUM_STEPS = 5
+# Rejilla grande con pocos clanes (escenario large_scale) y rejilla pequeña muy poblada
+SCENARIOS = [((500, 500), 20), ((60, 60), 400)]
+
+
+def run(grid_size, num_clans, policy):
+    """Segundos por paso con la caché de campos según `policy`.
+
+    'celdas': memoización por celda (por defecto); 'campo completo': cualquier
+    consulta fijada calcula el campo entero; 'sin fijar': sin caché por paso.
+    """
+    environment = Environment(grid_size=grid_size)
+    environment.set_rng(MersenneTwister(0))
+    environment.grid = np.random.default_rng(0).uniform(0, 100, grid_size)
+    if policy == 'campo completo':
+        environment.derived.full_field_fraction = 0.0
+    elif policy == 'sin fijar':
+        environment.derived.pin = lambda: None
+    positions = np.random.default_rng(1).uniform(0, grid_size[0], (num_clans, 2))
+    clans = [Clan(i, 30, position) for i, position in enumerate(positions)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = SimulationEngine(environment, clans, HybridMode(seed=1), seed=1)
+        engine.step()
+        start = time.perf_counter()
+        for _ in range(NUM_STEPS):
+            engine.step()
+    return (time.perf_counter() - start) / NUM_STEPS
+
+
+if __name__ == '__main__':
+    policies = ('celdas', 'campo completo', 'sin fijar')
+    print(f"Milisegundos por paso (media de {NUM_STEPS} pasos, HybridMode)\n")
+    print(f"{'rejilla':>12} {'clanes':>7} " + " ".join(f"{policy:>15}" for policy in policies))
+    for grid_size, num_clans in SCENARIOS:
+        times = [run(grid_size, num_clans, policy) * 1000 for policy in policies]
+        print(f"{str(grid_size):>12} {num_clans:>7} " + " ".join(f"{t:>15.1f}" for t in times))
@@ -0,0 +1,82 @@
+# clan_territorial_simulation/scripts/benchmark_domain_decomposition.py
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.clan import Clan
+from models.environment import Environment
+from simulation.domain_decomposition import DomainDecompositionEngine
+from simulation.engine import create_engine
+from simulation.modes import DeterministicMode
+
+NUM_STEPS = 10
+STRONG_GRID = (2000, 2000)
+STRONG_CLANS = 2000
+WEAK_BLOCK = (500, 500)  # Rejilla por proceso en el escalado débil
+WEAK_CLANS_PER_TILE = 250
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def build_scenario(grid_size, num_clans, seed=0):
+    environment = Environment(grid_size=grid_size, precision='float32')
+    environment.grid = np.random.default_rng(seed).uniform(20, 80, grid_size)
+    positions = np.random.default_rng(seed + 1).uniform(0, 1, (num_clans, 2)) * np.array(grid_size)
+    clans = [Clan(i, 20, position) for i, position in enumerate(positions)]
+    return environment, clans
+
+
+def run_decomposed(grid_size, num_clans, tiles, processes=True, seed=0):
+    """Segundos por paso y recursos finales del motor con teselas."""
+    environment, clans = build_scenario(grid_size, num_clans)
+    with contextlib.redirect_stdout(io.StringIO()):
+        with DomainDecompositionEngine(environment, clans, tiles=tiles, seed=seed, processes=processes) as engine:
+            start = time.perf_counter()
+            for _ in range(NUM_STEPS):
+                engine.step()
+            elapsed = time.perf_counter() - start
+            resources = engine.resource_history[-1]
+    return elapsed / NUM_STEPS, resources
+
+
+def run_single_process_engine(grid_size, num_clans, steps=2, seed=0):
+    """Referencia: motor vectorizado de un solo proceso (modelo de comportamiento completo)."""
+    environment, clans = build_scenario(grid_size, num_clans)
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = create_engine(environment, clans, DeterministicMode(seed=seed), seed=seed, backend='vectorized')
+        start = time.perf_counter()
+        for _ in range(steps):
+            engine.step()
+    return (time.perf_counter() - start) / steps
+
+
+if __name__ == '__main__':
+    print(f"CPUs disponibles: {os.cpu_count()}, {NUM_STEPS} pasos por medición\n")
+
+    print(f"Escalado fuerte: rejilla {STRONG_GRID}, {STRONG_CLANS} clanes")
+    engine_time = run_single_process_engine(STRONG_GRID, STRONG_CLANS)
+    reference, reference_resources = run_decomposed(STRONG_GRID, STRONG_CLANS, (1, 1), processes=False)
+    print(f"{'procesos':>9} {'s/paso':>9} {'aceleración':>12} {'eficiencia':>11} {'mismo resultado':>16}")
+    print(f"{'motor':>9} {engine_time:>9.3f}")
+    print(f"{'0':>9} {reference:>9.3f} {1.0:>12.2f}")
+    for workers in WORKER_COUNTS:
+        per_step, resources = run_decomposed(STRONG_GRID, STRONG_CLANS, (workers, 1))
+        speedup = reference / per_step
+        print(f"{workers:>9} {per_step:>9.3f} {speedup:>12.2f} {speedup / workers:>11.2f} "
+              f"{str(np.isclose(resources, reference_resources, rtol=1e-9)):>16}")
+
+    print(f"\nEscalado débil: {WEAK_BLOCK} celdas y {WEAK_CLANS_PER_TILE} clanes por proceso")
+    print(f"{'procesos':>9} {'rejilla':>13} {'s/paso':>9} {'eficiencia':>11}")
+    base = None
+    for workers in WORKER_COUNTS:
+        grid_size = (WEAK_BLOCK[0] * workers, WEAK_BLOCK[1])
+        per_step, _ = run_decomposed(grid_size, WEAK_CLANS_PER_TILE * workers, (workers, 1))
+        base = base or per_step
+        print(f"{workers:>9} {str(grid_size):>13} {per_step:>9.3f} {base / per_step:>11.2f}")
+    print("\n'0 procesos' es el motor con teselas (1, 1) en el proceso principal; 'motor' es")
+    print("VectorizedSimulationEngine, que además modela estados, interacciones y territorio.")
@@ -0,0 +1,69 @@
+# clan_territorial_simulation/scripts/benchmark_ensemble.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.clan import Clan
+from models.environment import Environment
+from simulation.engine import SimulationEngine
+from simulation.ensemble import EnsembleEngine
+from simulation.modes import DeterministicMode
+from simulation.random_generators import MersenneTwister
+
+REPLICA_COUNTS = [1, 8, 32, 64]
+NUM_STEPS = 50
+NUM_CLANS = 20
+GRID_SIZE = (100, 100)
+
+
+def build_scenario(seed=0):
+    environment = Environment(grid_size=GRID_SIZE)
+    environment.grid = MersenneTwister(seed).random_uniform(20, 80, GRID_SIZE)
+    positions = MersenneTwister(seed + 1).random_uniform(0, GRID_SIZE[0], (NUM_CLANS, 2))
+    clans = [Clan(i, 20, position) for i, position in enumerate(positions)]
+    return environment, clans
+
+
+def run_batched(replicas, seed=0):
+    environment, clans = build_scenario()
+    ensemble = EnsembleEngine(environment, clans, num_replicas=replicas, seed=seed)
+    start = time.perf_counter()
+    ensemble.run(NUM_STEPS)
+    return time.perf_counter() - start
+
+
+def run_sequential(replicas, seed=0):
+    """Referencia: un `SimulationEngine` por réplica avanzado con bucles del intérprete."""
+    engines = []
+    for replica in range(replicas):
+        environment, clans = build_scenario()
+        environment.set_rng(MersenneTwister(seed + replica))
+        engines.append(SimulationEngine(environment, clans, DeterministicMode(seed=seed + replica)))
+    start = time.perf_counter()
+    for engine in engines:
+        for _ in range(NUM_STEPS):
+            engine.step()
+    return time.perf_counter() - start
+
+
+def run_one_by_one(replicas, seed=0):
+    """Las mismas réplicas del ensemble avanzadas una a una."""
+    environment, clans = build_scenario()
+    seeds = EnsembleEngine(environment, clans, num_replicas=replicas, seed=seed).replica_seeds
+    start = time.perf_counter()
+    for replica_seed in seeds:
+        EnsembleEngine(environment, clans, replica_seeds=[replica_seed]).run(NUM_STEPS)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    print(f"Rejilla {GRID_SIZE}, {NUM_CLANS} clanes, {NUM_STEPS} pasos")
+    print(f"{'réplicas':>9} {'lote (s)':>10} {'una a una (s)':>14} {'motor (s)':>10} {'aceleración':>12}")
+    for replicas in REPLICA_COUNTS:
+        batched = run_batched(replicas)
+        one_by_one = run_one_by_one(replicas)
+        sequential = run_sequential(replicas)
+        print(f"{replicas:>9} {batched:>10.3f} {one_by_one:>14.3f} {sequential:>10.3f} {sequential / batched:>11.1f}x")
+    print("\n'aceleración' compara el lote con un SimulationEngine por réplica.")
@@ -0,0 +1,65 @@
+# clan_territorial_simulation/scripts/benchmark_grid_kernels.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.environment import Environment
+from simulation.random_generators import GeneratorRNG
+
+GRID_SIZES = [(256, 256), (1024, 1024), (2048, 2048), (4096, 4096)]
+THREAD_COUNTS = [1, 2, 4, 8]
+REPEATS = 5
+DT = 0.2
+
+
+def legacy_regenerate(environment, dt):
+    """Pasadas de arrays completos (implementación anterior de `Environment.regenerate`)."""
+    growth = environment.regeneration_rate * environment.grid * (1 - environment.grid / environment.max_resource) * dt
+    environment.grid = np.minimum(environment.grid + growth, environment.max_resource)
+    noise = environment.rng.random_normal(0, 0.05, size=environment.grid.shape) * dt
+    environment.grid = np.maximum(0, environment.grid + noise.astype(environment.grid.dtype, copy=False))
+
+
+def build(grid_size, threads=None, seed=0):
+    environment = Environment(grid_size=grid_size, grid_threads=threads)
+    environment.grid = np.random.default_rng(seed).uniform(0, 100, grid_size)
+    environment.set_rng(GeneratorRNG(seed))
+    return environment
+
+
+def timed(environment, update):
+    """Mejor tiempo de `REPEATS` pasos (separando el sorteo del ruido, que es serie en ambos)."""
+    best = np.inf
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        update(environment)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    print(f"CPUs disponibles: {os.cpu_count()}, mejor de {REPEATS} pasos de regeneración\n")
+    print(f"{'rejilla':>13} {'ruido (s)':>10} {'anterior (s)':>13} " + " ".join(f"{f'{t} hilo(s)':>11}" for t in THREAD_COUNTS) + f" {'idéntico':>9}")
+    for grid_size in GRID_SIZES:
+        noise_time = timed(build(grid_size), lambda env: env.rng.random_normal(0, 0.05, size=env.grid.shape))
+        legacy = timed(build(grid_size), lambda env: legacy_regenerate(env, DT))
+        row = []
+        for threads in THREAD_COUNTS:
+            environment = build(grid_size, threads)
+            row.append(timed(environment, lambda env: env.regenerate(DT)))
+            environment.grid_kernels.close()
+
+        reference, tiled = build(grid_size), build(grid_size, THREAD_COUNTS[-1])
+        legacy_regenerate(reference, DT)
+        tiled.regenerate(DT)
+        identical = np.array_equal(reference.grid, tiled.grid)
+        tiled.grid_kernels.close()
+
+        speedups = " ".join(f"{t:>6.3f} {legacy / t:>3.1f}x" for t in row)
+        print(f"{str(grid_size):>13} {noise_time:>10.3f} {legacy:>13.3f} {speedups} {str(identical):>9}")
+    print("\nCada columna de hilos muestra segundos y aceleración frente a la versión anterior;")
+    print("el sorteo del ruido ('ruido') se mantiene en serie para conservar el flujo aleatorio.")
@@ -0,0 +1,60 @@
+# clan_territorial_simulation/scripts/benchmark_precision.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.clan import Clan
+from models.environment import Environment
+from models.precision import PRECISION_POLICIES
+from simulation.ensemble import EnsembleEngine
+from simulation.random_generators import MersenneTwister
+
+NUM_REPLICAS = 16
+NUM_STEPS = 50
+NUM_CLANS = 20
+GRID_SIZE = (200, 200)
+
+
+def build_scenario(precision, seed=0):
+    environment = Environment(grid_size=GRID_SIZE, precision=precision)
+    environment.grid = MersenneTwister(seed).random_uniform(20, 80, GRID_SIZE)
+    positions = MersenneTwister(seed + 1).random_uniform(0, GRID_SIZE[0], (NUM_CLANS, 2))
+    clans = [Clan(i, 20, position) for i, position in enumerate(positions)]
+    return environment, clans
+
+
+def run(precision, seed=0):
+    """Tiempo, memoria de la rejilla y trayectorias de un ensemble con la precisión dada."""
+    environment, clans = build_scenario(precision)
+    ensemble = EnsembleEngine(environment, clans, num_replicas=NUM_REPLICAS, seed=seed)
+    start = time.perf_counter()
+    ensemble.run(NUM_STEPS)
+    elapsed = time.perf_counter() - start
+    return {
+        'time': elapsed,
+        'grid_bytes': ensemble.grids.nbytes,
+        'stored_bytes': environment.export_grid().nbytes,
+        'population': np.array(ensemble.population_history),
+        'resources': np.array(ensemble.resource_history)
+    }
+
+
+def relative_error(values, reference):
+    return float(np.max(np.abs(values - reference) / np.maximum(np.abs(reference), 1e-12)))
+
+
+if __name__ == '__main__':
+    print(f"Rejilla {GRID_SIZE}, {NUM_REPLICAS} réplicas, {NUM_CLANS} clanes, {NUM_STEPS} pasos")
+    results = {name: run(name) for name in PRECISION_POLICIES}
+    reference = results['float64']
+    print(f"{'precisión':>10} {'tiempo (s)':>11} {'réplicas (MB)':>14} {'guardada (KB)':>14} {'err. recursos':>14} {'err. población':>15}")
+    for name, result in results.items():
+        print(f"{name:>10} {result['time']:>11.3f} {result['grid_bytes'] / 2**20:>14.1f} "
+              f"{result['stored_bytes'] / 2**10:>14.1f} "
+              f"{relative_error(result['resources'], reference['resources']):>14.2e} "
+              f"{relative_error(result['population'], reference['population']):>15.2e}")
+    print("\nLos errores son el máximo error relativo de las trayectorias frente a float64.")
@@ -0,0 +1,83 @@
+# clan_territorial_simulation/scripts/benchmark_rng.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.random_generators import MersenneTwister, BufferedMersenneTwister, create_generator
+
+CALLS = 200000
+SEED = 12345
+
+# Generadores comparados en rendimiento por lotes y calidad
+BATCH_GENERATORS = ('mersenne', 'pcg64', 'philox', 'lcg', 'xorshift')
+BATCH_SIZE = 1_000_000
+BATCH_REPEATS = 10
+
+
+def time_calls(rng, call):
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        call(rng)
+    return time.perf_counter() - start
+
+
+# Patrones de llamada de los caminos calientes (modes.py y engine._handle_interaction)
+WORKLOADS = {
+    'random_float()': lambda rng: rng.random_float(),
+    'random_normal(0, 0.1, size=2)': lambda rng: rng.random_normal(0, 0.1, size=2),
+    'random_uniform(0, 2π)': lambda rng: rng.random_uniform(0, 6.283185307179586),
+    'random_normal(0, 0.1)': lambda rng: rng.random_normal(0, 0.1)
+}
+
+if __name__ == '__main__':
+    print(f"{CALLS} llamadas por patrón\n")
+    print(f"{'patrón':<32} {'por llamada (µs)':>18} {'buffer (µs)':>12} {'aceleración':>12}")
+    for name, call in WORKLOADS.items():
+        direct = time_calls(MersenneTwister(SEED), call)
+        buffered = time_calls(BufferedMersenneTwister(SEED), call)
+        print(f"{name:<32} {direct / CALLS * 1e6:>18.3f} {buffered / CALLS * 1e6:>12.3f} {direct / buffered:>11.1f}x")
+
+
+
+def batch_throughput(name):
+    """Millones de uniformes y normales por segundo llenando bloques de BATCH_SIZE."""
+    rng = create_generator(name, SEED)
+    results = []
+    for draw in (lambda: rng.random_uniform(0, 1, size=BATCH_SIZE), lambda: rng.random_normal(0, 1, size=BATCH_SIZE)):
+        draw()
+        start = time.perf_counter()
+        for _ in range(BATCH_REPEATS):
+            draw()
+        results.append(BATCH_SIZE * BATCH_REPEATS / (time.perf_counter() - start) / 1e6)
+    return results
+
+
+def quality(name, samples=BATCH_SIZE, bins=100):
+    """Media, varianza, chi² de uniformidad, autocorrelación lag-1 y curtosis normal."""
+    rng = create_generator(name, SEED)
+    uniforms = np.asarray(rng.random_uniform(0, 1, size=samples))
+    counts = np.bincount((uniforms * bins).astype(int), minlength=bins)
+    expected = samples / bins
+    normals = np.asarray(rng.random_normal(0, 1, size=samples))
+    return {
+        'mean': uniforms.mean(),
+        'var': uniforms.var(),
+        'chi2': ((counts - expected) ** 2 / expected).sum(),
+        'lag1': np.corrcoef(uniforms[:-1], uniforms[1:])[0, 1],
+        'kurtosis': (normals ** 4).mean() / (normals ** 2).mean() ** 2
+    }
+
+
+if __name__ == '__main__':
+    print(f"\nGeneración por lotes ({BATCH_SIZE} valores por llamada) y calidad")
+    print(f"{'generador':<10} {'uniformes (M/s)':>16} {'normales (M/s)':>15} {'media':>8} {'varianza':>9} {'chi² (99 gl)':>13} {'lag-1':>8} {'curtosis':>9}")
+    for name in BATCH_GENERATORS:
+        uniform_rate, normal_rate = batch_throughput(name)
+        q = quality(name)
+        print(f"{name:<10} {uniform_rate:>16.1f} {normal_rate:>15.1f} {q['mean']:>8.4f} {q['var']:>9.4f} "
+              f"{q['chi2']:>13.1f} {q['lag1']:>8.4f} {q['kurtosis']:>9.3f}")
+    print("\nReferencia: media 0.5, varianza 1/12 ≈ 0.0833, chi² ≈ 99, lag-1 ≈ 0, curtosis normal 3.")
@@ -0,0 +1,68 @@
+# clan_territorial_simulation/scripts/benchmark_spatial_index.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.clan import Clan
+from models.environment import Environment
+from models.spatial_index import SpatialIndex, brute_force_pairs
+from simulation.engine import SimulationEngine
+from simulation.modes import DeterministicMode
+
+INTERACTION_RADIUS = 5.0
+CLAN_COUNTS = [8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+MAX_LOOP_CLANS = 1024  # El bucle O(n²) en Python se vuelve prohibitivo por encima
+REPEATS = 5
+
+
+def time_call(func, repeats=REPEATS):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(clan_count, density=0.01, seed=0):
+    """Compara la búsqueda de pares del motor (bucle) con el índice espacial."""
+    side = int(np.sqrt(clan_count / density))
+    rng = np.random.RandomState(seed)
+    positions = rng.uniform(0, side, (clan_count, 2))
+
+    environment = Environment(grid_size=(side, side))
+    clans = [Clan(i, 10, position) for i, position in enumerate(positions)]
+    engine = SimulationEngine(environment, clans, DeterministicMode(seed=seed))
+
+    engine.use_spatial_index = False
+    if clan_count <= MAX_LOOP_CLANS:
+        loop_time = time_call(lambda: engine._find_interaction_pairs(INTERACTION_RADIUS), repeats=1 if clan_count > 256 else REPEATS)
+    else:
+        loop_time = float('nan')
+
+    index = SpatialIndex((side, side), bin_size=INTERACTION_RADIUS)
+
+    def indexed():
+        index.rebuild(clans, positions)
+        return index.query_pairs(INTERACTION_RADIUS)
+
+    index_time = time_call(indexed)
+    matrix_time = time_call(lambda: brute_force_pairs(positions, INTERACTION_RADIUS, (side, side)))
+    return loop_time, matrix_time, index_time
+
+
+if __name__ == '__main__':
+    print(f"{'clanes':>8} {'bucle (ms)':>12} {'matriz (ms)':>12} {'índice (ms)':>12} {'aceleración':>12}")
+    crossover = None
+    for clan_count in CLAN_COUNTS:
+        loop_time, matrix_time, index_time = benchmark(clan_count)
+        speedup = loop_time / index_time
+        if crossover is None and speedup > 1:
+            crossover = clan_count
+        print(f"{clan_count:>8} {loop_time * 1e3:>12.3f} {matrix_time * 1e3:>12.3f} {index_time * 1e3:>12.3f} {speedup:>11.1f}x")
+    print(f"\nCruce (índice más rápido que el bucle exhaustivo): {crossover} clanes")
+    print("La columna 'matriz' es la referencia O(n²) vectorizada de brute_force_pairs.")
@@ -0,0 +1,61 @@
+# clan_territorial_simulation/scripts/benchmark_startup.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NUM_RUNS = 5
+
+# Dependencias pesadas que el motor no debería cargar al importarse
+HEAVY_MODULES = ('pandas', 'scipy', 'plotly', 'flask', 'numba')
+
+# Se ejecuta en un intérprete nuevo para medir la importación en frío
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import numpy
+numpy_done = time.perf_counter()
+from models.clan import Clan
+from models.environment import Environment
+from simulation.engine import SimulationEngine
+from simulation.modes import DeterministicMode
+import analysis.statistics, visualization.charts, utils.logger
+import_done = time.perf_counter()
+
+import contextlib, io
+with contextlib.redirect_stdout(io.StringIO()):
+    environment = Environment(grid_size=(50, 50))
+    environment.grid = numpy.full((50, 50), 50.0)
+    clans = [Clan(i, 20, numpy.array([5.0 * i, 10.0])) for i in range(5)]
+    engine = SimulationEngine(environment, clans, DeterministicMode(seed=0), seed=0)
+    setup_done = time.perf_counter()
+    engine.step()
+step_done = time.perf_counter()
+
+print(json.dumps({
+    'numpy': numpy_done - start,
+    'engine_import': import_done - numpy_done,
+    'first_step': step_done - setup_done,
+    'heavy_loaded': sorted(name for name in HEAVY if name in sys.modules)
+}))
+"""
+
+
+def measure():
+    """Tiempos de una importación en frío y del primer paso en un proceso nuevo."""
+    code = f"HEAVY = {HEAVY_MODULES!r}\n" + PROBE
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=ROOT), check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    runs = [measure() for _ in range(NUM_RUNS)]
+    print(f"Arranque en frío (mediana de {NUM_RUNS} procesos)")
+    for key, label in [('numpy', 'importar numpy'), ('engine_import', 'importar motor + análisis'),
+                       ('first_step', 'primer paso')]:
+        print(f"  {label:<28} {statistics.median(run[key] for run in runs) * 1000:>8.1f} ms")
+    loaded = runs[-1]['heavy_loaded']
+    print(f"  dependencias pesadas cargadas: {', '.join(loaded) if loaded else 'ninguna'}")
@@ -0,0 +1,62 @@
+# clan_territorial_simulation/scripts/benchmark_surrogate.py
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.surrogate import (
+    build_parameter_grid, integrate_mean_field, screen_parameters, run_handoff, calibrate_surrogate,
+    generate_surrogate_report, REGIMES
+)
+
+NUM_CLANS = 5
+T_END = 40.0
+SCREEN_T_END = 100.0
+DT = 0.2
+POINT_COUNTS = (100, 1000, 10000)
+INITIAL_CONDITIONS = {
+    'grid_size': (30, 30),
+    'clans': [{'id': i + 1, 'size': 20 + 10 * i, 'position': [6 * i + 2, 5 * i + 3]} for i in range(NUM_CLANS)]
+}
+
+
+def surrogate_rate(num_points):
+    side = int(round(np.sqrt(num_points)))
+    points, _ = build_parameter_grid(birth_rate=np.linspace(0.0, 0.3, side), regeneration_rate=np.linspace(0.05, 1.5, side))
+    start = time.perf_counter()
+    integrate_mean_field(points, [clan['size'] for clan in INITIAL_CONDITIONS['clans']], T_END, dt=DT,
+                         grid_size=INITIAL_CONDITIONS['grid_size'])
+    return side * side, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    num_steps = int(round(T_END / DT))
+    print(f"{NUM_CLANS} clanes, t = {T_END} ({num_steps} pasos de dt = {DT})\n")
+    print(f"{'puntos':>8} {'tiempo (s)':>11} {'puntos/s':>10}")
+    for count in POINT_COUNTS:
+        points, elapsed = surrogate_rate(count)
+        print(f"{points:>8} {elapsed:>11.3f} {points / elapsed:>10.0f}")
+
+    screen = screen_parameters(INITIAL_CONDITIONS, SCREEN_T_END, dt=DT, max_handoff=4,
+                               birth_rate=np.linspace(0.0, 0.3, 40), regeneration_rate=np.linspace(0.05, 1.5, 40))
+    counts = np.bincount(screen['regime'], minlength=len(REGIMES))
+    print("\nRegímenes: " + ", ".join(f"{name}={count}" for name, count in zip(REGIMES, counts)))
+    print(f"Puntos en fronteras de régimen: {int(screen['boundary'].sum())}, enviados al motor: {len(screen['handoff'])}")
+
+    start = time.perf_counter()
+    runs = run_handoff(screen['handoff'], INITIAL_CONDITIONS, int(round(SCREEN_T_END / DT)), dt=DT,
+                       demographic_integrator='exact')
+    engine_time = (time.perf_counter() - start) / max(1, len(runs))
+    print(f"Motor completo: {engine_time:.3f} s por punto\n")
+    for scenario, run in zip(screen['handoff'], runs):
+        print(f"  birth_rate={scenario['clan_parameters']['birth_rate']:.3f} "
+              f"regen={scenario['environment']['regeneration_rate']:.3f}: "
+              f"predicho {scenario['predicted_regime']}, motor {run['regime']}")
+
+    calibration = calibrate_surrogate({'birth_rate': np.array([0.0, 0.05, 0.1, 0.2])}, INITIAL_CONDITIONS, num_steps,
+                                      dt=DT, demographic_integrator='exact',
+                                      closure_candidates={'forage_rate': [0.5, 1.0, 1.5, 2.0], 'hostility': [0.0, 1.0, 4.0]})
+    print("\n" + generate_surrogate_report(calibration))
@@ -0,0 +1,48 @@
+# clan_territorial_simulation/scripts/benchmark_two_phase.py
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.clan import Clan
+from models.environment import Environment
+from simulation.engine import create_engine
+from simulation.modes import StochasticMode
+from simulation.random_generators import GeneratorRNG
+
+NUM_CLANS = 400
+NUM_STEPS = 20
+GRID_SIZE = (200, 200)
+
+
+def run(update_scheme, max_workers=None, seed=0):
+    environment = Environment(grid_size=GRID_SIZE)
+    environment.set_rng(GeneratorRNG(seed))
+    environment.grid = np.random.default_rng(seed).uniform(20, 80, GRID_SIZE)
+    positions = np.random.default_rng(seed + 1).uniform(0, GRID_SIZE[0], (NUM_CLANS, 2))
+    clans = [Clan(i, 20, position) for i, position in enumerate(positions)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = create_engine(environment, clans, StochasticMode(seed=seed), seed=seed,
+                               update_scheme=update_scheme, max_workers=max_workers)
+        start = time.perf_counter()
+        for _ in range(NUM_STEPS):
+            engine.step()
+        elapsed = time.perf_counter() - start
+        engine.close()
+    return elapsed, environment.get_total_resources()
+
+
+if __name__ == '__main__':
+    print(f"Rejilla {GRID_SIZE}, {NUM_CLANS} clanes, {NUM_STEPS} pasos")
+    baseline, _ = run('sequential')
+    print(f"{'esquema':>12} {'hilos':>6} {'tiempo (s)':>11} {'aceleración':>12} {'recursos':>12}")
+    print(f"{'sequential':>12} {1:>6} {baseline:>11.3f} {1.0:>12.2f}")
+    for workers in (1, 2, 4, 8):
+        elapsed, total = run('two_phase', workers)
+        print(f"{'two_phase':>12} {workers:>6} {elapsed:>11.3f} {baseline / elapsed:>12.2f} {total:>12.1f}")
+    print("\nLos recursos finales de two_phase son idénticos para cualquier número de hilos.")
@@ -0,0 +1,446 @@
+# clan_territorial_simulation/simulation/domain_decomposition.py
+import multiprocessing as mp
+import weakref
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from models.clan_store import PARAMETER_COLUMNS
+from models.perception import disk_stencil
+from models.precision import PrecisionPolicy
+from simulation.random_generators import CounterRNG
+from simulation import kernels
+
+# Flujos del generador por contador; se combinan con el número de paso
+NOISE_STREAMS = {'regeneration': 0, 'movement': 1, 'revival': 2}
+
+# Columnas del lote de clanes que viaja entre procesos
+CLAN_COLUMNS = ('ids', 'positions', 'sizes', 'energy') + tuple(PARAMETER_COLUMNS)
+
+# Nombre del modelo reducido en `get_simulation_state` (solo forrajeo)
+REDUCED_MODEL = 'forage'
+
+# Vista de solo lectura de un clan para quien espera `engine.clans` (p. ej. app.py)
+DecomposedClan = namedtuple('DecomposedClan', ('id', 'size', 'energy', 'position', 'state'))
+
+
+def tile_edges(length, parts):
+    """Bordes de `parts` bloques contiguos lo más iguales posible sobre `length` celdas."""
+    return np.array([i * length // parts for i in range(parts + 1)], dtype=int)
+
+
+def tile_of(positions, row_edges, col_edges, grid_shape):
+    """Índice de tesela (fila mayor) propietaria de cada posición."""
+    cells = kernels.grid_cells(positions, grid_shape)
+    tile_rows = np.searchsorted(row_edges, cells[:, 0], side='right') - 1
+    tile_cols = np.searchsorted(col_edges, cells[:, 1], side='right') - 1
+    return tile_rows * (len(col_edges) - 1) + tile_cols
+
+
+def empty_batch():
+    batch = {'ids': np.zeros(0, dtype=np.int64), 'positions': np.zeros((0, 2)),
+             'sizes': np.zeros(0), 'energy': np.zeros(0)}
+    batch.update({name: np.zeros(0, dtype=dtype) for name, dtype in PARAMETER_COLUMNS.items()})
+    return batch
+
+
+def take_batch(batch, selection):
+    return {name: values[selection] for name, values in batch.items()}
+
+
+def concat_batches(batches):
+    batches = [batch for batch in batches if len(batch['ids'])]
+    if not batches:
+        return empty_batch()
+    return {name: np.concatenate([batch[name] for batch in batches]) for name in CLAN_COLUMNS}
+
+
+def batch_from_clans(clans, grid_shape):
+    """Lote de arrays con el estado numérico de una lista de `Clan`."""
+    if not clans:
+        return empty_batch()
+    batch = {
+        'ids': np.array([clan.id for clan in clans], dtype=np.int64),
+        'positions': np.mod(np.array([clan.position for clan in clans], dtype=float).reshape(-1, 2), grid_shape),
+        'sizes': np.array([clan.size for clan in clans], dtype=float),
+        'energy': np.array([clan.energy for clan in clans], dtype=float)
+    }
+    batch.update({name: np.array([clan.parameters[name] for clan in clans], dtype=dtype)
+                  for name, dtype in PARAMETER_COLUMNS.items()})
+    return batch
+
+
+class TileWorker:
+    """Estado y cálculo de una tesela toroidal de la rejilla.
+
+    La rejilla completa vive en memoria compartida; cada tesela solo escribe
+    sus propias celdas. Antes del movimiento copia su tesela más un halo de
+    ancho `halo` (con envoltura toroidal) a un búfer local, que es el
+    intercambio de halo: todas las teselas han terminado de regenerar y nadie
+    escribe hasta la fase de consumo.
+    """
+
+    def __init__(self, grid, index, row_edges, col_edges, halo, config):
+        self.grid = grid
+        self.index = index
+        self.row_edges = row_edges
+        self.col_edges = col_edges
+        tiles_x = len(col_edges) - 1
+        self.r0, self.r1 = row_edges[index // tiles_x], row_edges[index // tiles_x + 1]
+        self.c0, self.c1 = col_edges[index % tiles_x], col_edges[index % tiles_x + 1]
+        self.halo = halo
+        self.dt = config['dt']
+        self.max_resource = config['max_resource']
+        self.regeneration_rate = config['regeneration_rate']
+        self.movement_noise_std = config['movement_noise_std']
+        self.precision = PrecisionPolicy(config['precision'])
+        self.rng = CounterRNG(config['seed'])
+        self.clans = empty_batch()
+
+        height, width = grid.shape
+        self.halo_rows = np.arange(self.r0 - halo, self.r1 + halo) % height
+        self.halo_cols = np.arange(self.c0 - halo, self.c1 + halo) % width
+        # Contadores del ruido de regeneración: índice global de cada celda
+        self.cell_ids = (np.arange(self.r0, self.r1)[:, None] * width + np.arange(self.c0, self.c1)[None, :]).astype(np.uint64)
+
+    @property
+    def tile(self):
+        return self.grid[self.r0:self.r1, self.c0:self.c1]
+
+    def _stream(self, name, step):
+        return step * len(NOISE_STREAMS) + NOISE_STREAMS[name]
+
+    def _quantize(self):
+        if self.precision.quantized:
+            self.tile[...] = self.precision.cast(self.tile, self.max_resource)
+
+    def load(self, batch):
+        """Asigna los clanes iniciales de la tesela."""
+        self.clans = batch
+
+    def regenerate(self, step):
+        """Crecimiento logístico y ruido sobre las celdas propias (igual que `Environment.regenerate`)."""
+        tile = self.tile
+        growth = self.regeneration_rate * tile * (1 - tile / self.max_resource) * self.dt
+        np.minimum(tile + growth, self.max_resource, out=tile)
+        noise = self.rng.normal(self._stream('regeneration', step), self.cell_ids, 0, 0.05) * self.dt
+        np.maximum(0, tile + noise.astype(tile.dtype, copy=False), out=tile)
+        self._quantize()
+
+    def move(self, step):
+        """Forrajeo sobre el búfer con halo; retorna los clanes que salen de la tesela."""
+        clans = self.clans
+        if len(clans['ids']) == 0:
+            return empty_batch()
+
+        local = self.grid[np.ix_(self.halo_rows, self.halo_cols)]
+        radii = clans['perception_radius']
+        offsets, distances = disk_stencil(int(radii.max()))
+        within_radius = distances[None, :] <= radii[:, None]
+
+        positions = clans['positions']
+        base = kernels.grid_cells(positions, self.grid.shape)
+        local_base = base - np.array([self.r0 - self.halo, self.c0 - self.halo])
+        cells = local_base[:, None, :] + offsets
+        levels = local[cells[..., 0], cells[..., 1]]
+
+        displacement = (base[:, None, :] + offsets) - positions[:, None, :]
+        norms = np.sqrt((displacement ** 2).sum(axis=-1))
+        candidates = np.where((norms > 0) & within_radius, levels, -np.inf)
+        best = np.argmax(candidates, axis=-1)
+        rows = np.arange(len(best))
+        direction = displacement[rows, best] / np.maximum(norms[rows, best], 1e-12)[:, None]
+
+        counters = clans['ids'].astype(np.uint64)[:, None] * np.uint64(2) + np.arange(2, dtype=np.uint64)
+        noise = self.rng.normal(self._stream('movement', step), counters, 0, self.movement_noise_std)
+        movement = (direction + noise) * clans['movement_speed'][:, None] * self.dt
+        clans['positions'] = np.mod(positions + movement, self.grid.shape)
+
+        leaving = tile_of(clans['positions'], self.row_edges, self.col_edges, self.grid.shape) != self.index
+        self.clans = take_batch(clans, ~leaving)
+        return take_batch(clans, leaving)
+
+    def consume(self, step, immigrants):
+        """Incorpora los inmigrantes, consume en orden de id y aplica la demografía."""
+        clans = concat_batches([self.clans, immigrants])
+        clans = take_batch(clans, np.argsort(clans['ids'], kind='stable'))
+        extinct = 0
+        if len(clans['ids']):
+            dt = self.dt
+            sizes, energy = clans['sizes'], clans['energy']
+            demand = kernels.consumption_demand(sizes, clans['resource_required_per_individual'],
+                                                clans['cooperation_tendency'], dt)
+            cells = kernels.grid_cells(clans['positions'], self.grid.shape)
+            consumed = kernels.consume_in_order(self.grid, cells, demand)
+            self._quantize()
+
+            kernels.apply_consumption_outcome(sizes, energy, consumed, demand,
+                                              clans['birth_rate'], clans['natural_death_rate'], dt)
+            revival = self.rng.uniform(self._stream('revival', step), clans['ids'].astype(np.uint64))
+            sizes[(sizes == 0) & (energy > 50) & (revival < 0.1)] = 1
+            kernels.apply_energy_decay(energy, dt)
+
+            alive = sizes > 0
+            extinct = int((~alive).sum())
+            clans = take_batch(clans, alive)
+        self.clans = clans
+        return {
+            'clans': len(clans['ids']),
+            'population': float(clans['sizes'].sum()),
+            'energy': float(clans['energy'].sum()),
+            'extinct': extinct,
+            'resources': float(self.tile.sum(dtype=np.float64))
+        }
+
+    def snapshot(self):
+        """Clanes actuales de la tesela."""
+        return self.clans
+
+
+def _serve_tile(conn, shm_name, shape, dtype, index, row_edges, col_edges, halo, config):
+    """Bucle del proceso trabajador: ejecuta los comandos que llegan por `conn`."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        grid = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        worker = TileWorker(grid, index, row_edges, col_edges, halo, config)
+        while True:
+            command, args = conn.recv()
+            if command == 'close':
+                break
+            try:
+                conn.send(('ok', getattr(worker, command)(*args)))
+            except Exception as e:
+                conn.send(('error', f"{type(e).__name__}: {e}"))
+        del grid, worker
+    finally:
+        shm.close()
+        conn.close()
+
+
+def _release_resources(shm, connections, processes):
+    """Detiene los procesos y libera la memoria compartida (desde `close`, el recolector o atexit)."""
+    for conn in connections:
+        try:
+            conn.send(('close', ()))
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    for conn in connections:
+        conn.close()
+    try:
+        shm.close()
+    except BufferError:
+        # Sin `close` el entorno aún ve la rejilla compartida; el bloque se libera al soltarla
+        pass
+    shm.unlink()
+
+
+class DomainDecompositionEngine:
+    """Motor para rejillas muy grandes repartidas en teselas toroidales.
+
+    `Environment.grid` pasa a vivir en memoria compartida y se divide en
+    `tiles = (filas, columnas)` teselas, cada una propiedad de un proceso
+    trabajador. Cada paso tiene tres fases separadas por sincronización:
+    regeneración de las celdas propias, movimiento leyendo el halo de las
+    vecinas, y consumo y demografía. Los clanes que cruzan un borde se envían
+    al proceso principal, que los entrega a la tesela de destino antes del
+    consumo.
+
+    Es un modelo reducido, no una ejecución en paralelo de `SimulationEngine`:
+    los clanes siguen el modelo de forrajeo de `EnsembleEngine` (sin modo de
+    simulación, estados de migración, defensa ni combate, ni territorio), y
+    `get_simulation_state` lo indica con `'model': 'forage'`. Se crea con
+    `create_engine(..., backend='decomposed')`. Todo el azar sale de un
+    generador por contador indexado por celda o por id de clan, de modo que el
+    resultado no depende del número de teselas: `tiles=(1, 1)` con
+    `processes=False` es la referencia en un solo proceso.
+
+    Los procesos y la memoria compartida se liberan con `close` (o el bloque
+    `with`); si el motor se descarta sin cerrarlo, un finalizador los libera al
+    recolectarlo o al salir del intérprete.
+    """
+
+    def __init__(self, environment, initial_clans, tiles=(2, 2), dt=0.2, seed=None,
+                 processes=True, movement_noise_std=0.1):
+        tiles = (int(tiles[0]), int(tiles[1]))
+        height, width = environment.grid.shape
+        if min(tiles) < 1 or tiles[0] > height or tiles[1] > width:
+            raise ValueError(f"Teselado no válido para una rejilla {height}x{width}: {tiles}")
+
+        self.environment = environment
+        self.tiles = tiles
+        self.dt = dt
+        self.time = 0.0
+        self.step_count = 0
+        self.max_steps = 500
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().generate_state(1)[0])
+        self.processes = processes
+        self.row_edges = tile_edges(height, tiles[0])
+        self.col_edges = tile_edges(width, tiles[1])
+
+        clans = list(initial_clans)
+        batch = batch_from_clans(clans, environment.grid.shape)
+        # El halo cubre el mayor radio de percepción
+        self.halo = int(batch['perception_radius'].max()) if clans else 0
+
+        # Rejilla en memoria compartida; el entorno la sigue viendo como `grid`
+        grid = environment.grid
+        self._shm = shared_memory.SharedMemory(create=True, size=max(grid.nbytes, 1))
+        self._workers = []
+        self._connections = []
+        self._processes = []
+        self._finalizer = weakref.finalize(self, _release_resources, self._shm, self._connections, self._processes)
+        shared = np.ndarray(grid.shape, dtype=grid.dtype, buffer=self._shm.buf)
+        shared[...] = grid
+        environment.grid = shared
+
+        config = {
+            'dt': dt,
+            'max_resource': environment.max_resource,
+            'regeneration_rate': environment.regeneration_rate,
+            'movement_noise_std': movement_noise_std,
+            'precision': environment.precision.name,
+            'seed': self.seed
+        }
+        self.num_tiles = tiles[0] * tiles[1]
+        for index in range(self.num_tiles):
+            if processes:
+                parent_conn, child_conn = mp.Pipe()
+                process = mp.Process(target=_serve_tile, daemon=True, args=(
+                    child_conn, self._shm.name, grid.shape, grid.dtype, index,
+                    self.row_edges, self.col_edges, self.halo, config))
+                process.start()
+                child_conn.close()
+                self._workers.append(process)
+                self._processes.append(process)
+                self._connections.append(parent_conn)
+            else:
+                self._workers.append(TileWorker(shared, index, self.row_edges, self.col_edges, self.halo, config))
+
+        owners = tile_of(batch['positions'], self.row_edges, self.col_edges, grid.shape)
+        self._broadcast('load', [(take_batch(batch, owners == index),) for index in range(self.num_tiles)])
+
+        self.active_clans = len(clans)
+        self.population_history = []
+        self.resource_history = []
+
+        print(f"🧩 Motor con descomposición de dominio inicializado:")
+        print(f" - Entorno: {environment.grid_size}, teselas: {tiles[0]}x{tiles[1]}, halo: {self.halo}")
+        print(f" - Clanes: {len(clans)}, procesos: {self.num_tiles if processes else 0}, Semilla: {self.seed}")
+        print(f" - ⚠️ Modelo reducido de forrajeo: sin modo de simulación, migración, combate ni territorio")
+
+    def _broadcast(self, command, args_per_tile):
+        """Ejecuta `command` en todas las teselas (en paralelo con procesos) y retorna los resultados."""
+        if not self.processes:
+            return [getattr(worker, command)(*args) for worker, args in zip(self._workers, args_per_tile)]
+
+        for conn, args in zip(self._connections, args_per_tile):
+            conn.send((command, args))
+        results = []
+        for index, conn in enumerate(self._connections):
+            status, result = conn.recv()
+            if status == 'error':
+                raise RuntimeError(f"Error en la tesela {index} ({command}): {result}")
+            results.append(result)
+        return results
+
+    def step(self):
+        """Ejecuta un paso: regeneración, movimiento con halo, migración entre teselas y consumo."""
+        self.step_count += 1
+        step = self.step_count
+        every_tile = [(step,)] * self.num_tiles
+
+        # 1. Regeneración de las celdas propias
+        self._broadcast('regenerate', every_tile)
+
+        # 2. Movimiento leyendo el halo; los clanes que cruzan un borde vuelven al principal
+        emigrants = concat_batches(self._broadcast('move', every_tile))
+
+        # 3. Migración a la tesela de destino, consumo y demografía
+        owners = tile_of(emigrants['positions'], self.row_edges, self.col_edges, self.environment.grid.shape)
+        summaries = self._broadcast('consume', [(step, take_batch(emigrants, owners == index))
+                                                for index in range(self.num_tiles)])
+        self.environment.mark_grid_modified()
+
+        # 4. Métricas agregadas de las teselas
+        self.active_clans = sum(summary['clans'] for summary in summaries)
+        extinct = sum(summary['extinct'] for summary in summaries)
+        if extinct:
+            print(f"🪦 {extinct} clan(es) removido(s) por extinción")
+        total_population = sum(summary['population'] for summary in summaries)
+        self.population_history.append(total_population)
+        self.resource_history.append(sum(summary['resources'] for summary in summaries))
+        if len(self.population_history) > 1000:
+            self.population_history = self.population_history[-500:]
+            self.resource_history = self.resource_history[-500:]
+
+        self.time += self.dt
+        if self.step_count % 50 == 0:
+            avg_energy = sum(summary['energy'] for summary in summaries) / self.active_clans if self.active_clans else 0
+            print(f"📊 Paso {self.step_count}: {self.active_clans} clanes, {total_population:.1f} población, {avg_energy:.1f}% energía promedio")
+
+    def run_step(self):
+        """Alias para compatibilidad."""
+        self.step()
+
+    def gather_clans(self):
+        """Clanes de todas las teselas en un solo lote ordenado por id."""
+        clans = concat_batches(self._broadcast('snapshot', [()] * self.num_tiles))
+        return take_batch(clans, np.argsort(clans['ids'], kind='stable'))
+
+    @property
+    def clans(self):
+        """Clanes vivos como `DecomposedClan` (recogidos de las teselas)."""
+        clans = self.gather_clans()
+        return [DecomposedClan(int(clan_id), int(size), float(energy), position, 'foraging')
+                for clan_id, size, energy, position in zip(clans['ids'], clans['sizes'], clans['energy'], clans['positions'])]
+
+    def get_simulation_state(self):
+        """Estado coherente de toda la rejilla con el formato de `SimulationEngine`."""
+        clans = self.gather_clans()
+        clans_data = [{
+            'id': int(clan_id),
+            'size': int(size),
+            'position': position.tolist(),
+            'state': 'foraging',
+            'energy': round(float(energy), 1)
+        } for clan_id, size, position, energy in zip(clans['ids'], clans['sizes'], clans['positions'], clans['energy'])]
+        return {
+            'time': self.time,
+            'step': self.step_count,
+            'clans': clans_data,
+            'resource_grid': self.environment.export_grid().tolist(),
+            'precision': self.environment.precision.name,
+            'max_resource': float(self.environment.max_resource),
+            'model': REDUCED_MODEL,
+            'tiles': list(self.tiles),
+            'system_metrics': {
+                'total_population': float(clans['sizes'].sum()),
+                'active_clans': len(clans['ids']),
+                'avg_energy': float(clans['energy'].mean()) if len(clans['ids']) else 0,
+                'total_resources': self.environment.get_total_resources()
+            }
+        }
+
+    def close(self):
+        """Detiene los procesos y devuelve al entorno una copia privada de la rejilla."""
+        if self._shm is None:
+            return
+        self.environment.grid = np.array(self.environment.grid)
+        self._workers = []
+        self._finalizer()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"DomainDecompositionEngine(t={self.time:.2f}, clanes={self.active_clans}, teselas={self.tiles})"
@@ -1,9 +1,100 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from models.environment import Environment 
 from models.clan import Clan 
+from models.spatial_index import SpatialIndex
+from models.territory import TerritoryRaster
+from simulation import kernels
+
+# 'sequential': cada clan actúa y consume en orden de lista sobre la rejilla compartida.
+# 'two_phase': todos proponen sobre la misma rejilla y el consumo se confirma en bloque.
+UPDATE_SCHEMES = ('sequential', 'two_phase')
+
+# Celdas con más recurso que se envían al frontend en cada estado (índice top-k incremental)
+STATE_HOTSPOTS = 10
+
+
+class CombatBatch:
+    """Combates de un paso acumulados para resolverlos en una llamada a `combat_pairs`.
+
+    El ruido de cada par se extrae en el mismo orden que en el combate escalar.
+    Como el coste de energía de un combate es fijo, el umbral de energía de los
+    pares siguientes se evalúa sin resolver los pendientes; el lote solo se
+    resuelve antes de tiempo si otra interacción necesita los tamaños o si no
+    se puede asegurar que el par llegará a combatir (fuerza total positiva).
+    """
+
+    def __init__(self, engine, dt):
+        self.engine = engine
+        self.dt = dt
+        self.pairs = []
+        self.noise = []
+        self.energy = {}   # id(clan) -> energía tras los combates pendientes
+        self.pending = {}  # id(clan) -> número de combates pendientes
+
+    def energy_of(self, clan):
+        return self.energy.get(id(clan), clan.energy)
+
+    def settle(self, *clans):
+        """Resuelve el lote si alguno de `clans` tiene combates pendientes."""
+        if any(id(clan) in self.pending for clan in clans):
+            self.flush()
+
+    def propose(self, clan1, clan2, rng):
+        """Añade el combate entre `clan1` y `clan2` si ambos tienen energía para combatir."""
+        if self.energy_of(clan1) <= 20 or self.energy_of(clan2) <= 20:
+            return
+        noise = (rng.random_normal(0, 0.1), rng.random_normal(0, 0.1))
+        if not self._fights_for_sure(clan1, clan2, noise):
+            self.flush()
+            if self._total_strength(clan1, clan2, noise) <= 0:
+                return
+        self.pairs.append((clan1, clan2))
+        self.noise.append(noise)
+        for clan in (clan1, clan2):
+            self.energy[id(clan)] = max(0.0, self.energy_of(clan) - 20 * self.dt)
+            self.pending[id(clan)] = self.pending.get(id(clan), 0) + 1
+
+    def _fights_for_sure(self, clan1, clan2, noise):
+        """Fuerza total positiva garantizada aunque falten daños pendientes (cada uno resta como mucho 5·dt)."""
+        sure = False
+        for clan, clan_noise in zip((clan1, clan2), noise):
+            aggressiveness = clan.parameters.get('aggressiveness', 0.5)
+            if aggressiveness < 0 or clan_noise <= -1:
+                return False
+            size_bound = clan.size - 5 * self.dt * self.pending.get(id(clan), 0)
+            sure = sure or (aggressiveness > 0 and size_bound > 1e-9)
+        return sure
+
+    def _total_strength(self, clan1, clan2, noise):
+        """Fuerza total con el estado actual (mismas operaciones que el kernel)."""
+        return sum(clan.size * (clan.energy / 100) * clan.parameters.get('aggressiveness', 0.5) * (1 + clan_noise)
+                   for clan, clan_noise in zip((clan1, clan2), noise))
+
+    def flush(self):
+        """Resuelve los combates pendientes con el kernel del motor."""
+        if not self.pairs:
+            return
+        first, second = (list(clans) for clans in zip(*self.pairs))
+        fought = self.engine._run_combats(first, second, np.array(self.noise), self.dt)
+        for (clan1, clan2), clan_fought in zip(self.pairs, fought):
+            if clan_fought:
+                clan1.enemies.add(clan2.id)
+                clan2.enemies.add(clan1.id)
+                clan1.allies.discard(clan2.id)
+                clan2.allies.discard(clan1.id)
+        self.engine.combat_stats['pairs'] += len(self.pairs)
+        self.engine.combat_stats['kernel_calls'] += 1
+        self.pairs, self.noise = [], []
+        self.energy.clear()
+        self.pending.clear()
 
 class SimulationEngine:
-    def __init__(self, environment: Environment, initial_clans: list, simulation_mode, dt: float = 0.2, seed: int = None):
+    def __init__(self, environment: Environment, initial_clans: list, simulation_mode, dt: float = 0.2, seed: int = None,
+                 update_scheme: str = 'sequential', max_workers: int = None, kernel_backend: str = 'auto'):
+        if update_scheme not in UPDATE_SCHEMES:
+            raise ValueError(f"Esquema de actualización no soportado: {update_scheme}")
         self.environment = environment
         self.clans = list(initial_clans)
         self.time = 0.0
@@ -13,14 +104,45 @@ class SimulationEngine:
         self.step_count = 0
         self.max_steps = 500
 
+        # Paso en dos fases (propuesta en paralelo + confirmación con reparto proporcional)
+        self.update_scheme = update_scheme
+        self.max_workers = max_workers
+        self._proposal_pool = None
+
+        # Kernels por agente (numba si está disponible y seleccionado, NumPy si no)
+        self.kernels = kernels.select_backend(kernel_backend)
+
         self.population_history = []
         self.resource_history = []
 
+        # Índice espacial para interacciones, amenazas y objetivos de combate
+        self.interaction_radius = 5.0
+        self.use_spatial_index = True
+        self.spatial_index_min_clans = 8  # Cruce medido con scripts/benchmark_spatial_index.py
+        self.spatial_index = SpatialIndex(self.environment.grid_size, bin_size=self.interaction_radius)
+        self.interaction_timing = {'spatial_index': 0.0, 'brute_force': 0.0, 'index_steps': 0, 'brute_force_steps': 0}
+
+        # Combates de cada paso resueltos en lote con el kernel (False: combate escalar par a par)
+        self.batch_combat = True
+        self.combat_stats = {'pairs': 0, 'kernel_calls': 0}
+
+        # Ráster territorial compartido (fuente de verdad del territorio)
+        self.territory = TerritoryRaster(self.environment.grid.shape)
+        self.environment.territory = self.territory
+        for clan in self.clans:
+            clan.set_territory_map(self.territory)
+            clan.set_kernels(self.kernels)
+
+        # Con flujos por subsistema el ruido de regeneración sale del flujo 'environment'
+        if getattr(self.simulation_mode, 'streams', None) is not None:
+            self.environment.set_rng(self.simulation_mode.subsystem_rng('environment'))
+
         print(f"Motor de simulación inicializado:")
         print(f" - {len(self.clans)} clanes")
         print(f" - Entorno: {self.environment.grid_size}")
         print(f" - dt: {self.dt}")
         print(f" - Modo: {type(self.simulation_mode).__name__}, Semilla: {self.seed}")
+        print(f" - Actualización: {self.update_scheme}, kernels: {self.kernels.BACKEND_NAME}")
 
     def step(self):
         """Ejecuta un paso completo de simulación."""
@@ -30,23 +152,37 @@ class SimulationEngine:
 
             # 1. Regenerar recursos del entorno
             self.environment.regenerate(dt)
+            self._rebuild_spatial_index()
 
             # 2. Actualizar comportamiento de cada clan usando el modo
-            for clan in self.clans[:]:
-                if clan.size > 0:
-                    try:
-                        self.simulation_mode.apply_clan_behavior(clan, self.environment, dt)
-                        clan._consume_resources(self.environment, dt)
-
-                        if clan.energy > 0:
-                            energy_decay = min(clan.energy, 3 * dt) 
-                            clan.energy = max(0, clan.energy - energy_decay)
-
-                        if clan.size <= 0:
-                            print(f"💀 Clan {clan.id} se ha extinguido (tamaño: {clan.size})")
-
-                    except Exception as e:
-                        print(f"Error actualizando clan {clan.id}: {e}")
+            # (los campos derivados del entorno se calculan una vez y se comparten)
+            self.environment.derived.pin()
+            if self.update_scheme == 'two_phase':
+                self._two_phase_update(dt)
+            elif getattr(self.simulation_mode, 'streams', None) is not None:
+                # Con flujos por clan el resultado del consumo se puede diferir y resolver en lote
+                fed = []
+                for clan in self.clans[:]:
+                    if clan.size > 0:
+                        try:
+                            self.simulation_mode.apply_clan_behavior(clan, self.environment, dt)
+                            fed.append((clan,) + clan._take_resources(self.environment, dt))
+                        except Exception as e:
+                            print(f"Error actualizando clan {clan.id}: {e}")
+                if fed:
+                    clans, consumed, demand = zip(*fed)
+                    self._settle_consumption(list(clans), np.array(consumed, dtype=float), np.array(demand, dtype=float), dt)
+            else:
+                for clan in self.clans[:]:
+                    if clan.size > 0:
+                        try:
+                            self.simulation_mode.apply_clan_behavior(clan, self.environment, dt)
+                            clan._consume_resources(self.environment, dt)
+                            self._apply_energy_decay(clan, dt)
+                        except Exception as e:
+                            print(f"Error actualizando clan {clan.id}: {e}")
+
+            self.environment.derived.unpin()
 
             # 3. Procesar interacciones entre clanes cercanos
             self._process_interactions(dt)
@@ -56,13 +192,14 @@ class SimulationEngine:
 
             # 5. Remover clanes extintos
             initial_clan_count = len(self.clans)
+            self.territory.release_owners([clan.id for clan in self.clans if clan.size <= 0])
             self.clans = [clan for clan in self.clans if clan.size > 0]
             if len(self.clans) < initial_clan_count:
                 extinct_count = initial_clan_count - len(self.clans)
                 print(f"🪦 {extinct_count} clan(es) removido(s) por extinción")
             
             # 6. Actualizar territorio para todos los clanes restantes
-            for clan in self.clans:
+            for clan in self._canonical_order(self.clans):
                 clan._update_territory()
 
             # 7. Registrar métricas
@@ -77,25 +214,167 @@ class SimulationEngine:
                 print(f"📊 Paso {self.step_count}: {len(self.clans)} clanes, {total_pop:.1f} población, {avg_energy:.1f}% energía promedio")
 
         except Exception as e:
+            self.environment.derived.unpin()
             print(f"Error en paso de simulación: {e}")
             import traceback
             traceback.print_exc()
 
-    def _process_interactions(self, dt):
-        """Procesa interacciones entre clanes cercanos."""
-        interaction_radius = 5.0
+    def _apply_energy_decay(self, clan, dt):
+        """Decaimiento de energía tras consumir y aviso de extinción."""
+        if clan.energy > 0:
+            energy_decay = min(clan.energy, 3 * dt) 
+            clan.energy = max(0, clan.energy - energy_decay)
+
+        if clan.size <= 0:
+            print(f"💀 Clan {clan.id} se ha extinguido (tamaño: {clan.size})")
+
+    def _canonical_order(self, clans):
+        """Orden de procesamiento: por id en el paso en dos fases, de lista si no."""
+        if self.update_scheme == 'two_phase':
+            return sorted(clans, key=lambda clan: clan.id)
+        return clans
+
+    def _propose_behaviors(self, clans, dt):
+        """Fase de propuesta: aplica el modo a cada clan sin tocar la rejilla.
+
+        Con flujos aleatorios por clan la fase se divide en decisión de estado,
+        dirección de migración de todos los clanes que migran en una sola
+        llamada al kernel y acción; con `max_workers` > 1 la decisión y la
+        acción se reparten en bloques sobre un pool de hilos. Con un RNG
+        compartido se ejecuta en serie, clan a clan, para no alterar el orden
+        de las extracciones.
+        """
+        mode = self.simulation_mode
+
+        def run_chunk(step, chunk):
+            failed = []
+            for clan in chunk:
+                try:
+                    step(clan, self.environment, dt)
+                except Exception as e:
+                    print(f"Error actualizando clan {clan.id}: {e}")
+                    failed.append(clan)
+            return failed
+
+        if getattr(mode, 'streams', None) is None:
+            run_chunk(mode.apply_clan_behavior, clans)
+            return
+
+        def run_all(step, clans):
+            if (self.max_workers or 1) <= 1 or len(clans) < 2:
+                return run_chunk(step, clans)
+            if self._proposal_pool is None:
+                self._proposal_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            chunks = [chunk for chunk in (clans[i::self.max_workers] for i in range(self.max_workers)) if chunk]
+            return [clan for failed in self._proposal_pool.map(lambda chunk: run_chunk(step, chunk), chunks) for clan in failed]
+
+        failed = {id(clan) for clan in run_all(mode.decide_clan_state, clans)}
+        deciding = [clan for clan in clans if id(clan) not in failed]
+        mode.plan_migrations([clan for clan in deciding if clan.state == 'migrating'], self.environment, self.kernels)
+        run_all(mode.act_on_state, deciding)
+        for clan in deciding:
+            clan.planned_migration = None
+
+    def _two_phase_update(self, dt):
+        """Propuesta de todos los clanes y confirmación del consumo en bloque."""
+        active = [clan for clan in self.clans if clan.size > 0]
+        self._propose_behaviors(active, dt)
+        if not active:
+            return
+
+        # Confirmación: las celdas disputadas se reparten en proporción a la demanda
+        demand = np.array([clan._consumption_demand(dt) for clan in active], dtype=float)
+        positions = np.array([clan.position for clan in active], dtype=float).reshape(-1, 2)
+        cells = kernels.grid_cells(positions, self.environment.grid.shape)
+        consumed = kernels.consume_proportional(self.environment.grid, cells, demand)
+        self.environment.mark_grid_modified()
+        self._settle_consumption(active, consumed, demand, dt)
+
+    def _settle_consumption(self, clans, consumed, demand, dt):
+        """Energía, demografía y decaimiento de `clans` en lote con el kernel del backend.
+
+        Equivale a `Clan._apply_consumption` seguido de `_apply_energy_decay`
+        clan por clan; la recuperación de clanes extintos usa el RNG de cada
+        clan en el orden de la lista.
+        """
+        sizes = np.array([clan.size for clan in clans], dtype=float)
+        energy = np.array([clan.energy for clan in clans], dtype=float)
+        birth_rate = np.array([clan.parameters['birth_rate'] for clan in clans], dtype=float)
+        natural_death_rate = np.array([clan.parameters['natural_death_rate'] for clan in clans], dtype=float)
+        self.kernels.apply_consumption_outcome(sizes, energy, consumed, demand, birth_rate, natural_death_rate, dt)
+
+        for i in np.flatnonzero((sizes == 0) & (energy > 50)):
+            if clans[i].rng and clans[i].rng.random_float() < 0.1:
+                sizes[i] = 1
+        kernels.apply_energy_decay(energy, dt)
+
+        for clan, size, clan_energy in zip(clans, sizes.tolist(), energy.tolist()):
+            clan.size, clan.energy = int(size), clan_energy
+            if clan.size <= 0:
+                print(f"💀 Clan {clan.id} se ha extinguido (tamaño: {clan.size})")
 
-        rng = self.simulation_mode.rng 
+    def close(self):
+        """Libera el pool de hilos de la fase de propuesta."""
+        if self._proposal_pool is not None:
+            self._proposal_pool.shutdown()
+            self._proposal_pool = None
 
+    def _clan_positions(self):
+        """Posiciones actuales de los clanes como array (N, 2)."""
+        return np.array([clan.position for clan in self.clans], dtype=float).reshape(-1, 2)
+
+    def _rebuild_spatial_index(self):
+        """Reconstruye el índice espacial y lo inyecta en los clanes."""
+        self.spatial_index.rebuild(self.clans, self._clan_positions())
+        for clan in self.clans:
+            clan.set_neighbor_index(self.spatial_index)
+
+    def _find_interaction_pairs(self, radius):
+        """Pares (i, j, distancia) de clanes a distancia toroidal <= radius, en orden i < j."""
+        if self.use_spatial_index and len(self.clans) >= self.spatial_index_min_clans:
+            start = time.perf_counter()
+            self._rebuild_spatial_index()
+            pairs = list(zip(*self.spatial_index.query_pairs(radius)))
+            self.interaction_timing['spatial_index'] += time.perf_counter() - start
+            self.interaction_timing['index_steps'] += 1
+            return pairs
+
+        start = time.perf_counter()
+        pairs = []
         for i, clan1 in enumerate(self.clans):
             for j, clan2 in enumerate(self.clans[i+1:], i+1):
-                distance = np.linalg.norm(clan1.position - clan2.position)
-
-                if distance <= interaction_radius:
-                    self._handle_interaction(clan1, clan2, distance, dt, rng)
+                distance = self.environment.get_toroidal_distance(clan1.position, clan2.position)
+                if distance <= radius:
+                    pairs.append((i, j, distance))
+        self.interaction_timing['brute_force'] += time.perf_counter() - start
+        self.interaction_timing['brute_force_steps'] += 1
+        return pairs
 
-    def _handle_interaction(self, clan1, clan2, distance, dt, rng):
-        """Maneja interacción específica entre dos clanes."""
+    def _process_interactions(self, dt):
+        """Procesa interacciones entre clanes cercanos."""
+        rng = self.simulation_mode.subsystem_rng('interactions')
+
+        pairs = self._find_interaction_pairs(self.interaction_radius)
+        if self.update_scheme == 'two_phase':
+            # Orden canónico por ids para que el resultado no dependa del orden de la lista
+            pairs = sorted((tuple(sorted((self.clans[i], self.clans[j]), key=lambda clan: clan.id)) + (distance,)
+                            for i, j, distance in pairs), key=lambda pair: (pair[0].id, pair[1].id))
+        else:
+            pairs = [(self.clans[i], self.clans[j], distance) for i, j, distance in pairs]
+        batch = CombatBatch(self, dt) if self.batch_combat else None
+        for clan1, clan2, distance in pairs:
+            self._handle_interaction(clan1, clan2, distance, dt, rng, batch)
+        if batch is not None:
+            batch.flush()
+
+    def get_spatial_index_stats(self):
+        """Tiempos del índice espacial frente a la búsqueda exhaustiva de pares."""
+        stats = self.spatial_index.get_stats()
+        stats.update(self.interaction_timing)
+        return stats
+
+    def _handle_interaction(self, clan1, clan2, distance, dt, rng, batch=None):
+        """Maneja interacción específica entre dos clanes (combate diferido a `batch` si se da)."""
         interaction_radius = 5.0
         interaction_strength = max(0.1, 1.0 - (distance / interaction_radius))
 
@@ -114,11 +393,15 @@ class SimulationEngine:
              (clan1.enemies.intersection({clan2.id}) or clan2.enemies.intersection({clan1.id})): # Si son enemigos
             # Interacción agresiva/combate
             if distance < 2.5: # Reducir distancia para combate directo
-                if clan1.energy > 20 and clan2.energy > 20: # Requiere energía para combatir
+                if batch is not None:
+                    batch.propose(clan1, clan2, rng)
+                elif clan1.energy > 20 and clan2.energy > 20: # Requiere energía para combatir
                     self._combat_interaction(clan1, clan2, dt, rng)
 
         else: # Interacción neutral - competencia por recursos
             if distance < 1.5:
+                if batch is not None:
+                    batch.settle(clan1, clan2)
                 self._resource_competition(clan1, clan2, dt)
 
 
@@ -151,6 +434,19 @@ class SimulationEngine:
         clan2.allies.discard(clan1.id)
   
 
+    def _run_combats(self, first, second, noise, dt):
+        """Combates (first[k], second[k]) en orden con el kernel del backend; retorna qué pares combatieron."""
+        clans = list({id(clan): clan for clan in first + second}.values())
+        index = {id(clan): i for i, clan in enumerate(clans)}
+        sizes = np.array([clan.size for clan in clans], dtype=float)
+        energy = np.array([clan.energy for clan in clans], dtype=float)
+        aggressiveness = np.array([clan.parameters.get('aggressiveness', 0.5) for clan in clans], dtype=float)
+        fought = self.kernels.combat_pairs(sizes, energy, aggressiveness, [index[id(clan)] for clan in first],
+                                           [index[id(clan)] for clan in second], noise, dt)
+        for clan, size, clan_energy in zip(clans, sizes.tolist(), energy.tolist()):
+            clan.size, clan.energy = size, clan_energy
+        return fought
+
     def _resource_competition(self, clan1, clan2, dt):
         """Maneja competencia por recursos (no es combate directo)."""
         score1 = clan1.size * (clan1.energy / 100)
@@ -194,18 +490,24 @@ class SimulationEngine:
         try:
             clans_data = [clan.get_state_info() for clan in self.clans]
 
-            resource_grid_data = self.environment.grid.tolist()
+            # Formato de almacenamiento de la política (uint16 en punto fijo); ver `decode_resource_grid`
+            resource_grid_data = self.environment.export_grid().tolist()
 
             state = {
                 'time': self.time,
                 'step': self.step_count,
                 'clans': clans_data,
                 'resource_grid': resource_grid_data,
+                'precision': self.environment.precision.name,
+                'max_resource': float(self.environment.max_resource),
+                'territorial_boundaries': self.territory.get_boundaries(),
+                'resource_hotspots': self.environment.get_top_hotspots(STATE_HOTSPOTS),
                 'system_metrics': {
                     'total_population': sum(clan.size for clan in self.clans),
                     'active_clans': len(self.clans),
                     'avg_energy': np.mean([clan.energy for clan in self.clans]) if self.clans else 0,
-                    'total_resources': self.environment.get_total_resources()
+                    'total_resources': self.environment.get_total_resources(),
+                    'total_territory': sum(territory.area for territory in self.territory.territories.values())
                 }
             }
             return state
@@ -228,4 +530,36 @@ class SimulationEngine:
         self.step()
 
     def __repr__(self):
-        return f"SimulationEngine(t={self.time:.2f}, clanes={len(self.clans)})"
\ No newline at end of file
+        return f"SimulationEngine(t={self.time:.2f}, clanes={len(self.clans)})"
+
+
+ENGINE_BACKENDS = ('object', 'vectorized', 'decomposed')
+
+def create_engine(environment, initial_clans, simulation_mode, dt=0.2, seed=None, backend='object',
+                  update_scheme='sequential', max_workers=None, kernel_backend='auto',
+                  demographic_integrator='legacy', tiles=(2, 2)):
+    """Factory para crear el motor según el backend configurado.
+
+    'object' y 'vectorized' ejecutan el modelo completo. 'decomposed' reparte la
+    rejilla en `tiles` procesos pero ejecuta el modelo reducido de forrajeo de
+    `DomainDecompositionEngine`: ignora `simulation_mode` y no hay migración,
+    combate ni territorio, así que sus trayectorias no son comparables.
+    """
+    if backend == 'object':
+        if demographic_integrator != 'legacy':
+            raise ValueError("El backend 'object' solo admite el integrador demográfico 'legacy'")
+        return SimulationEngine(environment, initial_clans, simulation_mode, dt=dt, seed=seed,
+                                update_scheme=update_scheme, max_workers=max_workers, kernel_backend=kernel_backend)
+    elif backend == 'vectorized':
+        from simulation.vectorized_engine import VectorizedSimulationEngine
+        return VectorizedSimulationEngine(environment, initial_clans, simulation_mode, dt=dt, seed=seed,
+                                          update_scheme=update_scheme, max_workers=max_workers, kernel_backend=kernel_backend,
+                                          demographic_integrator=demographic_integrator)
+    elif backend == 'decomposed':
+        if update_scheme != 'sequential' or demographic_integrator != 'legacy':
+            raise ValueError("El backend 'decomposed' no admite esquemas de actualización ni integradores demográficos")
+        from simulation.domain_decomposition import DomainDecompositionEngine
+        print(f"⚠️ Backend 'decomposed': modelo reducido de forrajeo, se ignora el modo {simulation_mode.__class__.__name__}")
+        return DomainDecompositionEngine(environment, initial_clans, tiles=tuple(tiles), dt=dt, seed=seed)
+    else:
+        raise ValueError(f"Backend de motor no soportado: {backend}")
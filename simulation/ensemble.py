@@ -0,0 +1,193 @@
+# clan_territorial_simulation/simulation/ensemble.py
+import numpy as np
+
+from models.clan_store import PARAMETER_COLUMNS
+from models.perception import disk_stencil
+from simulation.random_generators import GeneratorRNG
+from simulation import kernels
+
+
+class EnsembleEngine:
+    """Avanza R réplicas independientes de un escenario como un único lote de arrays.
+
+    Los recursos se guardan como un tensor R×H×W y los clanes como arrays R×N.
+    Regeneración, ruido, forrajeo, consumo y demografía avanzan todas las réplicas
+    con una llamada vectorizada por paso. Cada réplica tiene su propio flujo
+    aleatorio (derivado con `SeedSequence.spawn`) y las réplicas extintas quedan
+    enmascaradas y congeladas.
+
+    El comportamiento de los clanes es el forrajeo determinista (moverse hacia la
+    celda con más recurso del disco de percepción) más ruido de movimiento; los
+    estados de migración, defensa y combate del motor completo no se modelan.
+    """
+
+    def __init__(self, environment, initial_clans, num_replicas=None, dt=0.2, seed=None,
+                 replica_seeds=None, movement_noise_std=0.1):
+        if replica_seeds is None:
+            children = np.random.SeedSequence(seed).spawn(num_replicas)
+            replica_seeds = [int(child.generate_state(1)[0]) for child in children]
+        self.replica_seeds = list(replica_seeds)
+        self.num_replicas = len(self.replica_seeds)
+        self.rngs = [GeneratorRNG(replica_seed) for replica_seed in self.replica_seeds]
+
+        self.dt = dt
+        self.time = 0.0
+        self.step_count = 0
+        self.grid_size = np.array(environment.grid.shape)
+        self.max_resource = environment.max_resource
+        self.regeneration_rate = environment.regeneration_rate
+        self.movement_noise_std = movement_noise_std
+        # Las réplicas heredan la política de precisión del entorno
+        self.precision = environment.precision
+        dtype = self.precision.dtype
+
+        replicas = self.num_replicas
+        self.grids = np.repeat(np.asarray(environment.grid, dtype=dtype)[None], replicas, axis=0)
+
+        clans = list(initial_clans)
+        self.clan_ids = np.array([clan.id for clan in clans], dtype=np.int64)
+        self.positions = np.repeat(np.array([clan.position for clan in clans], dtype=dtype).reshape(1, -1, 2), replicas, axis=0)
+        self.sizes = np.repeat(np.array([clan.size for clan in clans], dtype=float)[None], replicas, axis=0)
+        self.energy = np.repeat(np.array([clan.energy for clan in clans], dtype=float)[None], replicas, axis=0)
+        self.parameters = {
+            name: np.array([clan.parameters[name] for clan in clans], dtype=dtype)
+            for name, dtype in PARAMETER_COLUMNS.items()
+        }
+
+        self.replica_active = self.sizes.sum(axis=1) > 0
+        self.population_history = []
+        self.resource_history = []
+
+    def _regenerate(self, dt):
+        """Crecimiento logístico y ruido por réplica (solo réplicas activas)."""
+        active = self.replica_active
+        growth = self.regeneration_rate * self.grids * (1 - self.grids / self.max_resource) * dt
+        growth[~active] = 0.0
+        np.minimum(self.grids + growth, self.max_resource, out=self.grids)
+
+        for r in np.flatnonzero(active):
+            noise = self.rngs[r].random_normal(0, 0.05, size=self.grids[r].shape) * dt
+            np.maximum(0, self.grids[r] + noise.astype(self.grids.dtype, copy=False), out=self.grids[r])
+        if self.precision.quantized:
+            self.grids[active] = self.precision.cast(self.grids[active], self.max_resource)
+
+    def _forage(self, alive, dt):
+        """Mueve cada clan vivo hacia la celda más rica de su disco de percepción."""
+        radii = self.parameters['perception_radius']
+        offsets, distances = disk_stencil(int(radii.max()))
+        within_radius = distances[None, :] <= radii[:, None]
+
+        base = np.floor(self.positions).astype(int)
+        cells = np.mod(base[:, :, None, :] + offsets, self.grid_size)
+        replica_index = np.arange(self.num_replicas)[:, None, None]
+        levels = self.grids[replica_index, cells[..., 0], cells[..., 1]]
+
+        displacement = (base[:, :, None, :] + offsets) - self.positions[:, :, None, :]
+        norms = np.sqrt((displacement ** 2).sum(axis=-1))
+        candidates = np.where((norms > 0) & within_radius[None], levels, -np.inf)
+        best = np.argmax(candidates, axis=-1)
+
+        best_displacement = np.take_along_axis(displacement, best[..., None, None], axis=2)[:, :, 0]
+        best_norm = np.take_along_axis(norms, best[..., None], axis=2)[..., 0]
+        direction = best_displacement / np.maximum(best_norm, 1e-12)[..., None]
+
+        noise = np.stack([
+            self.rngs[r].random_normal(0, self.movement_noise_std, size=direction.shape[1:])
+            if self.replica_active[r] else np.zeros(direction.shape[1:])
+            for r in range(self.num_replicas)
+        ])
+        movement = (direction + noise) * self.parameters['movement_speed'][None, :, None] * dt
+        movement[~alive] = 0.0
+        self.positions = np.mod(self.positions + movement, self.grid_size).astype(self.positions.dtype, copy=False)
+
+    def step(self):
+        """Ejecuta un paso de simulación para todas las réplicas."""
+        self.step_count += 1
+        dt = self.dt
+        alive = (self.sizes > 0) & self.replica_active[:, None]
+
+        # 1. Regenerar recursos (todas las réplicas activas a la vez)
+        self._regenerate(dt)
+
+        # 2. Forrajeo vectorizado
+        self._forage(alive, dt)
+
+        # 3. Consumo sobre el tensor R×H×W visto como (R·H)×W
+        replica_rows, clan_cols = np.nonzero(alive)
+        if len(replica_rows) > 0:
+            sizes = self.sizes[replica_rows, clan_cols]
+            energy = self.energy[replica_rows, clan_cols]
+            demand = kernels.consumption_demand(
+                sizes,
+                self.parameters['resource_required_per_individual'][clan_cols],
+                self.parameters['cooperation_tendency'][clan_cols],
+                dt
+            )
+            cells = kernels.grid_cells(self.positions[replica_rows, clan_cols], self.grid_size)
+            cells[:, 0] += replica_rows * self.grid_size[0]
+            stacked = self.grids.reshape(-1, self.grid_size[1])
+            consumed = kernels.consume_in_order(stacked, cells, demand)
+
+            # 4. Demografía y decaimiento de energía
+            kernels.apply_consumption_outcome(
+                sizes, energy, consumed, demand,
+                self.parameters['birth_rate'][clan_cols],
+                self.parameters['natural_death_rate'][clan_cols],
+                dt
+            )
+            for i in np.flatnonzero((sizes == 0) & (energy > 50)):
+                if self.rngs[replica_rows[i]].random_float() < 0.1:
+                    sizes[i] = 1
+            kernels.apply_energy_decay(energy, dt)
+
+            self.sizes[replica_rows, clan_cols] = sizes
+            self.energy[replica_rows, clan_cols] = energy
+
+        # 5. Enmascarar réplicas extintas
+        self.replica_active &= self.sizes.sum(axis=1) > 0
+
+        self.population_history.append(self.sizes.sum(axis=1))
+        self.resource_history.append(self.grids.sum(axis=(1, 2), dtype=np.float64))
+        self.time += dt
+
+    def run(self, num_steps):
+        """Avanza `num_steps` pasos (se detiene si todas las réplicas se extinguen)."""
+        for _ in range(num_steps):
+            if not self.replica_active.any():
+                break
+            self.step()
+
+    def get_replica_summary(self):
+        """Métricas por réplica (población, clanes activos, recursos)."""
+        return {
+            'total_population': self.sizes.sum(axis=1).tolist(),
+            'active_clans': (self.sizes > 0).sum(axis=1).tolist(),
+            'total_resources': self.grids.sum(axis=(1, 2), dtype=np.float64).tolist(),
+            'replica_active': self.replica_active.tolist()
+        }
+
+    def get_replica_state(self, replica):
+        """Estado de una réplica con el mismo formato de `get_simulation_state`."""
+        alive = self.sizes[replica] > 0
+        clans = [{
+            'id': int(self.clan_ids[i]),
+            'size': int(self.sizes[replica, i]),
+            'position': self.positions[replica, i].tolist(),
+            'state': 'foraging',
+            'energy': round(float(self.energy[replica, i]), 1)
+        } for i in np.flatnonzero(alive)]
+        return {
+            'time': self.time,
+            'step': self.step_count,
+            'clans': clans,
+            'resource_grid': self.grids[replica].tolist(),
+            'system_metrics': {
+                'total_population': float(self.sizes[replica].sum()),
+                'active_clans': int(alive.sum()),
+                'avg_energy': float(self.energy[replica, alive].mean()) if alive.any() else 0,
+                'total_resources': float(self.grids[replica].sum(dtype=np.float64))
+            }
+        }
+
+    def __repr__(self):
+        return f"EnsembleEngine(réplicas={self.num_replicas}, activas={int(self.replica_active.sum())}, t={self.time:.2f})"
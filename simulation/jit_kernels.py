@@ -0,0 +1,104 @@
+# clan_territorial_simulation/simulation/jit_kernels.py
+"""Kernels compilados con numba (backend 'numba').
+
+Mismas funciones y firmas que `simulation.kernels`; las que dependen de la
+lógica por agente (demografía tras el consumo, elección del candidato de
+migración y combates en secuencia) se reescriben como bucles compilados y
+el resto se reutiliza tal cual. Solo se importa si numba está instalado
+(ver `kernels.select_backend`).
+"""
+import numba
+import numpy as np
+
+from simulation.kernels import (  # noqa: F401  (reexportados para completar el backend)
+    ENERGY_CONVERSION_EFFICIENCY, ENERGY_IDLE_GAIN, ENERGY_DECAY_RATE,
+    STARVATION_MORTALITY_ZERO_ENERGY, STARVATION_MORTALITY_LOW_ENERGY,
+    LOW_ENERGY_THRESHOLD, REPRODUCTION_ENERGY_THRESHOLD,
+    grid_cells, consumption_demand, consume_in_order, consume_proportional, apply_energy_decay
+)
+
+BACKEND_NAME = 'numba'
+
+
+@numba.njit(cache=True)
+def _consumption_outcome(sizes, energy, consumed, demand, birth_rate, natural_death_rate, dt):
+    for i in range(sizes.shape[0]):
+        if demand[i] > 0:
+            efficiency = consumed[i] / demand[i]
+            gain = efficiency * ENERGY_CONVERSION_EFFICIENCY * dt
+        else:
+            gain = ENERGY_IDLE_GAIN * dt
+        energy[i] = min(energy[i] + gain, 100.0)
+
+        size = sizes[i]
+        if energy[i] <= 0:
+            size = max(size - STARVATION_MORTALITY_ZERO_ENERGY * dt * size, 0.0)
+        elif energy[i] < LOW_ENERGY_THRESHOLD:
+            mortality = (1.0 - energy[i] / LOW_ENERGY_THRESHOLD) * STARVATION_MORTALITY_LOW_ENERGY * dt
+            size = max(size - mortality * size, 0.0)
+
+        if energy[i] > REPRODUCTION_ENERGY_THRESHOLD:
+            birth_modifier = min(1.0, (energy[i] - REPRODUCTION_ENERGY_THRESHOLD) / 70.0)
+            size += birth_rate[i] * birth_modifier * size * dt
+
+        size = max(size - natural_death_rate[i] * size * dt, 0.0)
+        sizes[i] = np.rint(size)
+
+
+def apply_consumption_outcome(sizes, energy, consumed, demand, birth_rate, natural_death_rate, dt):
+    """Versión compilada de `kernels.apply_consumption_outcome` (en el lugar)."""
+    _consumption_outcome(sizes, energy, np.asarray(consumed, dtype=np.float64), np.asarray(demand, dtype=np.float64),
+                         np.asarray(birth_rate, dtype=np.float64), np.asarray(natural_death_rate, dtype=np.float64), float(dt))
+    return sizes, energy
+
+
+@numba.njit(cache=True)
+def _migration_choice(area_means, memory_levels, exploration_bonus, threshold):
+    best = np.zeros(area_means.shape[0], dtype=np.int64)
+    for i in range(area_means.shape[0]):
+        best_score = -np.inf
+        for j in range(area_means.shape[1]):
+            score = area_means[i, j] + (exploration_bonus[i] if memory_levels[i, j] < threshold else 0.0)
+            if score > best_score:
+                best_score = score
+                best[i] = j
+    return best
+
+
+def migration_choice(area_means, memory_levels, exploration_bonus, threshold=10.0):
+    """Versión compilada de `kernels.migration_choice`."""
+    area_means = np.atleast_2d(np.asarray(area_means, dtype=np.float64))
+    memory_levels = np.asarray(memory_levels, dtype=np.float64).reshape(area_means.shape)
+    bonus = np.asarray(exploration_bonus, dtype=np.float64).reshape(-1)
+    return _migration_choice(area_means, memory_levels, bonus, float(threshold))
+
+
+@numba.njit(cache=True)
+def _combat_pairs(sizes, energy, aggressiveness, first, second, noise, dt, fought):
+    for k in range(first.shape[0]):
+        a, b = first[k], second[k]
+        strength1 = sizes[a] * (energy[a] / 100) * aggressiveness[a]
+        strength2 = sizes[b] * (energy[b] / 100) * aggressiveness[b]
+        strength1 *= (1 + noise[k, 0])
+        strength2 *= (1 + noise[k, 1])
+
+        total = strength1 + strength2
+        if total <= 0:
+            continue
+        fought[k] = True
+        damage1 = (strength2 / total) * 5 * dt
+        damage2 = (strength1 / total) * 5 * dt
+        sizes[a] = max(0.0, sizes[a] - damage1)
+        sizes[b] = max(0.0, sizes[b] - damage2)
+        energy[a] = max(0.0, energy[a] - 20 * dt)
+        energy[b] = max(0.0, energy[b] - 20 * dt)
+
+
+def combat_pairs(sizes, energy, aggressiveness, first, second, noise, dt):
+    """Versión compilada de `kernels.combat_pairs`: un bucle secuencial sobre los pares."""
+    first = np.asarray(first, dtype=np.int64)
+    second = np.asarray(second, dtype=np.int64)
+    noise = np.asarray(noise, dtype=np.float64).reshape(-1, 2)
+    fought = np.zeros(len(first), dtype=np.bool_)
+    _combat_pairs(sizes, energy, np.asarray(aggressiveness, dtype=np.float64), first, second, noise, float(dt), fought)
+    return fought
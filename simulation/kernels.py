@@ -0,0 +1,212 @@
+# clan_territorial_simulation/simulation/kernels.py
+import importlib.util
+import sys
+
+import numpy as np
+
+from models.equations import (
+    STARVATION_MORTALITY_ZERO_ENERGY, STARVATION_MORTALITY_LOW_ENERGY,
+    LOW_ENERGY_THRESHOLD, REPRODUCTION_ENERGY_THRESHOLD
+)
+
+# Backends de kernels: 'numpy' (este módulo) o 'numba' (simulation.jit_kernels, opcional).
+# 'auto' elige numba si está instalado.
+KERNEL_BACKENDS = ('auto', 'numpy', 'numba')
+BACKEND_NAME = 'numpy'
+
+# Constantes del modelo demográfico (idénticas a Clan._consume_resources)
+ENERGY_CONVERSION_EFFICIENCY = 15.0
+ENERGY_IDLE_GAIN = 2.0
+ENERGY_DECAY_RATE = 3.0
+
+
+def grid_cells(positions, grid_shape):
+    """Convierte posiciones continuas en índices de celda (misma regla que Environment.consume)."""
+    cells = np.asarray(positions).astype(int)
+    return np.mod(cells, np.asarray(grid_shape))
+
+
+def consumption_demand(sizes, resource_required, cooperation_tendency, dt):
+    """Demanda efectiva de recursos de cada clan para un paso dt."""
+    group_efficiency_bonus = cooperation_tendency * 0.3
+    effective_rate = resource_required * (1.0 - group_efficiency_bonus)
+    return sizes * effective_rate * dt
+
+
+def consume_in_order(grid, cells, demand):
+    """Consume `demand` de las celdas `cells` del grid, en el orden de la lista.
+
+    Equivale a llamar `Environment.consume` clan por clan: cuando varios clanes
+    comparten celda, los primeros de la lista se sirven primero. Modifica `grid`
+    en el lugar y retorna lo consumido por cada clan.
+    """
+    demand = np.asarray(demand, dtype=float)
+    if len(demand) == 0:
+        return np.zeros(0)
+
+    flat = np.ravel_multi_index((cells[:, 0], cells[:, 1]), grid.shape)
+    order = np.argsort(flat, kind='stable')
+    sorted_flat = flat[order]
+    sorted_demand = demand[order]
+
+    # Demanda acumulada de los clanes previos dentro de la misma celda
+    cumulative = np.cumsum(sorted_demand) - sorted_demand
+    group_start = np.ones(len(sorted_flat), dtype=bool)
+    group_start[1:] = sorted_flat[1:] != sorted_flat[:-1]
+    group_index = np.cumsum(group_start) - 1
+    demand_before = cumulative - cumulative[group_start][group_index]
+
+    available = grid[cells[order, 0], cells[order, 1]]
+    consumed_sorted = np.clip(available - demand_before, 0.0, sorted_demand)
+
+    consumed = np.empty_like(consumed_sorted)
+    consumed[order] = consumed_sorted
+
+    index = (cells[:, 0], cells[:, 1])
+    np.subtract.at(grid, index, consumed)
+    grid[index] = np.maximum(grid[index], 0.0)
+    return consumed
+
+
+def consume_proportional(grid, cells, demand):
+    """Consume `demand` de las celdas `cells` repartiendo las celdas disputadas.
+
+    Fase de confirmación del paso en dos fases: si la demanda total de una
+    celda supera lo disponible, cada clan recibe la misma fracción de su
+    demanda, de modo que el resultado no depende del orden de la lista.
+    Modifica `grid` en el lugar y retorna lo consumido por cada clan.
+    """
+    demand = np.asarray(demand, dtype=float)
+    if len(demand) == 0:
+        return np.zeros(0)
+
+    flat = np.ravel_multi_index((cells[:, 0], cells[:, 1]), grid.shape)
+    unique_cells, inverse = np.unique(flat, return_inverse=True)
+    total_demand = np.bincount(inverse, weights=demand)
+    rows, cols = np.unravel_index(unique_cells, grid.shape)
+    available = grid[rows, cols].astype(float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(total_demand > 0, np.minimum(1.0, available / total_demand), 0.0)
+    grid[rows, cols] = np.maximum(available - np.minimum(available, total_demand), 0.0)
+    return demand * share[inverse]
+
+
+def apply_energy_gain(energy, consumed, demand, dt):
+    """Ganancia de energía por lo consumido frente a lo demandado (en el lugar)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        efficiency = np.where(demand > 0, consumed / demand, 0.0)
+    gain = np.where(demand > 0, efficiency * ENERGY_CONVERSION_EFFICIENCY * dt, ENERGY_IDLE_GAIN * dt)
+    np.minimum(energy + gain, 100.0, out=energy)
+    return energy
+
+
+def apply_consumption_outcome(sizes, energy, consumed, demand, birth_rate, natural_death_rate, dt):
+    """Actualiza energía y tamaño de todos los clanes tras consumir (vectorizado).
+
+    Reproduce la lógica de `Clan._consume_resources`: ganancia de energía,
+    mortalidad por inanición, natalidad dependiente de energía, mortalidad
+    natural y redondeo al entero más cercano. Modifica los arrays en el lugar.
+    """
+    apply_energy_gain(energy, consumed, demand, dt)
+
+    starving = energy <= 0
+    weak = ~starving & (energy < LOW_ENERGY_THRESHOLD)
+    mortality = np.zeros_like(sizes)
+    mortality[starving] = STARVATION_MORTALITY_ZERO_ENERGY * dt
+    mortality[weak] = (1.0 - energy[weak] / LOW_ENERGY_THRESHOLD) * STARVATION_MORTALITY_LOW_ENERGY * dt
+    np.maximum(sizes - mortality * sizes, 0.0, out=sizes)
+
+    fertile = energy > REPRODUCTION_ENERGY_THRESHOLD
+    birth_modifier = np.minimum(1.0, (energy - REPRODUCTION_ENERGY_THRESHOLD) / 70.0)
+    sizes += np.where(fertile, birth_rate * birth_modifier * sizes * dt, 0.0)
+
+    np.maximum(sizes - natural_death_rate * sizes * dt, 0.0, out=sizes)
+    np.round(sizes, out=sizes)
+    return sizes, energy
+
+
+def apply_energy_decay(energy, dt, rate=ENERGY_DECAY_RATE):
+    """Decaimiento de energía por paso (vectorizado, en el lugar)."""
+    decay = np.minimum(energy, rate * dt)
+    np.maximum(energy - np.where(energy > 0, decay, 0.0), 0.0, out=energy)
+    return energy
+
+
+def migration_choice(area_means, memory_levels, exploration_bonus, threshold=10.0):
+    """Índice del mejor candidato de migración de cada clan (misma regla que `Clan`).
+
+    `area_means` y `memory_levels` son (N, K): recurso medio alrededor de cada
+    candidato y último nivel recordado en él. Los candidatos poco explorados
+    (memoria < `threshold`) suman `exploration_bonus` (N,).
+    """
+    area_means = np.asarray(area_means, dtype=float)
+    bonus = np.asarray(exploration_bonus, dtype=float).reshape(-1, 1)
+    scores = area_means + np.where(np.asarray(memory_levels) < threshold, bonus, 0)
+    return np.argmax(scores, axis=1)
+
+
+def combat_waves(first, second, num_clans):
+    """Agrupa los pares en oleadas sin clanes repetidos respetando el orden de cada clan."""
+    waves = np.empty(len(first), dtype=np.int64)
+    last_wave = np.full(num_clans, -1, dtype=np.int64)
+    for pair, (a, b) in enumerate(zip(first.tolist(), second.tolist())):
+        wave = max(last_wave[a], last_wave[b]) + 1
+        waves[pair] = last_wave[a] = last_wave[b] = wave
+    return waves
+
+
+def combat_pairs(sizes, energy, aggressiveness, first, second, noise, dt):
+    """Combate entre los pares (first[k], second[k]) en el orden dado (en el lugar).
+
+    Reproduce `SimulationEngine._combat_interaction`: fuerza por tamaño,
+    energía y agresividad con ruido multiplicativo `noise` (P, 2), daño
+    proporcional a la fuerza rival y coste fijo de energía. Un clan puede
+    aparecer en varios pares; los pares se agrupan en oleadas disjuntas, de
+    modo que el resultado es el mismo que procesarlos uno a uno. Retorna qué
+    pares llegaron a combatir (fuerza total positiva).
+    """
+    first = np.asarray(first, dtype=np.int64)
+    second = np.asarray(second, dtype=np.int64)
+    noise = np.asarray(noise, dtype=float).reshape(-1, 2)
+    fought = np.zeros(len(first), dtype=bool)
+    if len(first) == 0:
+        return fought
+
+    waves = combat_waves(first, second, len(sizes))
+    for wave in range(int(waves.max()) + 1):
+        selected = waves == wave
+        a, b = first[selected], second[selected]
+        strength1 = sizes[a] * (energy[a] / 100) * aggressiveness[a]
+        strength2 = sizes[b] * (energy[b] / 100) * aggressiveness[b]
+        strength1 = strength1 * (1 + noise[selected, 0])
+        strength2 = strength2 * (1 + noise[selected, 1])
+
+        total = strength1 + strength2
+        fights = total > 0
+        fought[selected] = fights
+        with np.errstate(divide='ignore', invalid='ignore'):
+            damage1 = (strength2 / total) * 5 * dt
+            damage2 = (strength1 / total) * 5 * dt
+        sizes[a] = np.where(fights, np.maximum(0, sizes[a] - damage1), sizes[a])
+        sizes[b] = np.where(fights, np.maximum(0, sizes[b] - damage2), sizes[b])
+        energy[a] = np.where(fights, np.maximum(0, energy[a] - 20 * dt), energy[a])
+        energy[b] = np.where(fights, np.maximum(0, energy[b] - 20 * dt), energy[b])
+    return fought
+
+
+def numba_available():
+    """Indica si numba está instalado (sin importarlo)."""
+    return importlib.util.find_spec('numba') is not None
+
+
+def select_backend(name='auto'):
+    """Módulo de kernels para el backend `name`; sin numba se usa el de NumPy."""
+    if name not in KERNEL_BACKENDS:
+        raise ValueError(f"Backend de kernels no soportado: {name}")
+    if name == 'numpy' or not numba_available():
+        if name == 'numba':
+            print("⚠️ Numba no está instalado; se usan los kernels de NumPy")
+        return sys.modules[__name__]
+    from simulation import jit_kernels
+    return jit_kernels
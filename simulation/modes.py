@@ -2,13 +2,46 @@ import numpy as np
 import random
 import json
 import os
-from .random_generators import MersenneTwister
+import threading
+from collections import OrderedDict
+from .random_generators import MersenneTwister, BufferedMersenneTwister, RNGStreams
+from models.perception import toroidal_displacement
+from models.clan import plan_migrations
+from data.configs.config_default import DETERMINISTIC_CACHE_LIMIT, DETERMINISTIC_USE_CACHING, RNG_BACKEND, RNG_BIT_GENERATOR
 
 class SimulationMode:
     def __init__(self, config_path=None, seed=None):
         self.config = self.load_mode_config(config_path) if config_path else {}
         self.seed = seed
-        self.rng = MersenneTwister(seed) if seed is not None else MersenneTwister(random.randint(0, 10000000))
+        rng_seed = seed if seed is not None else random.randint(0, 10000000)
+        self.streams = None
+        if self.config.get('rng_backend', RNG_BACKEND) == 'generator':
+            # Un flujo por clan y por subsistema, independientes del orden de actualización
+            self.streams = RNGStreams(rng_seed, self.config.get('rng_bit_generator', RNG_BIT_GENERATOR))
+            self.rng = self.streams.stream('mode')
+        else:
+            buffer_size = self.config.get('rng_buffer_size', 0)
+            if buffer_size:
+                self.rng = BufferedMersenneTwister(rng_seed, block_size=buffer_size)
+            else:
+                self.rng = MersenneTwister(rng_seed)
+
+    def rng_for(self, clan):
+        """Generador que usa `clan` (su propio flujo, o el compartido en modo 'mersenne')."""
+        if self.streams is None:
+            return self.rng
+        return self.streams.stream('clan', clan.id)
+
+    def subsystem_rng(self, name):
+        """Generador de un subsistema del motor (p. ej. 'interactions')."""
+        if self.streams is None:
+            return self.rng
+        return self.streams.stream(name)
+
+    def share_streams(self, other):
+        """Usa los mismos flujos que `other` (modos anidados de HybridMode)."""
+        self.streams = other.streams
+        self.rng = other.rng
 
     def load_mode_config(self, config_path):
         if config_path and os.path.exists(config_path):
@@ -17,8 +50,22 @@ class SimulationMode:
         return {}
 
     def apply_clan_behavior(self, clan, environment, dt):
+        self.decide_clan_state(clan, environment, dt)
+        self.act_on_state(clan, environment, dt)
+
+    def decide_clan_state(self, clan, environment, dt):
+        """Percepción y elección de estado (primera mitad de `apply_clan_behavior`)."""
+        clan.set_rng(self.rng_for(clan))
+        clan.update_behavior(environment, [], dt)
+
+    def act_on_state(self, clan, environment, dt):
+        """Acción del estado elegido (segunda mitad de `apply_clan_behavior`)."""
         raise NotImplementedError("Subclasses must implement this method")
 
+    def plan_migrations(self, clans, environment, kernels):
+        """Precalcula en lote la dirección de migración de `clans` (ya en estado 'migrating')."""
+        plan_migrations(clans, environment, kernels)
+
 class StochasticMode(SimulationMode):
     def __init__(self, config_path=None, seed=None):
         super().__init__(config_path, seed)
@@ -33,9 +80,7 @@ class StochasticMode(SimulationMode):
             if key not in self.config:
                 self.config[key] = value
 
-    def apply_clan_behavior(self, clan, environment, dt):
-        clan.set_rng(self.rng)
-        clan.update_behavior(environment, [], dt)
+    def act_on_state(self, clan, environment, dt):
         self._apply_stochastic_behavior(clan, environment, dt)
 
     def _apply_stochastic_behavior(self, clan, environment, dt):
@@ -51,11 +96,12 @@ class StochasticMode(SimulationMode):
             self._stochastic_fighting_movement(clan, environment, dt)
 
     def _stochastic_foraging(self, clan, environment, dt):
+        rng = self.rng_for(clan)
         forage_probability = self.config.get('forage_probability', 0.8)
-        if self.rng.random_float() < forage_probability:
+        if rng.random_float() < forage_probability:
             resource_direction = clan._find_resource_direction(environment)
             movement_noise_std = self.config.get('movement_noise_std', 0.1)
-            noise = self.rng.random_normal(0, movement_noise_std, size=2)
+            noise = rng.random_normal(0, movement_noise_std, size=2)
             if np.linalg.norm(resource_direction) > 0:
                 effective_direction = resource_direction + noise
                 if np.linalg.norm(effective_direction) > 0:
@@ -66,57 +112,64 @@ class StochasticMode(SimulationMode):
                     effective_direction = effective_direction / np.linalg.norm(effective_direction)
             movement = effective_direction * clan.parameters['movement_speed'] * dt
         else:
-            random_angle = self.rng.random_uniform(0, 2 * np.pi)
+            random_angle = rng.random_uniform(0, 2 * np.pi)
             random_direction = np.array([np.cos(random_angle), np.sin(random_angle)])
             movement = random_direction * clan.parameters['movement_speed'] * 0.5 * dt
         clan._move(movement, environment)
 
     def _stochastic_migration(self, clan, environment, dt):
+        rng = self.rng_for(clan)
         migration_direction = clan._find_migration_direction(environment)
         noise_factor = self.config.get('decision_noise_factor', 0.15)
-        noise = self.rng.random_normal(0, noise_factor, size=2)
+        noise = rng.random_normal(0, noise_factor, size=2)
         if np.linalg.norm(migration_direction) > 0:
             noisy_direction = migration_direction + noise
             if np.linalg.norm(noisy_direction) > 0:
                 noisy_direction = noisy_direction / np.linalg.norm(noisy_direction)
         else:
-            random_angle = self.rng.random_uniform(0, 2 * np.pi)
+            random_angle = rng.random_uniform(0, 2 * np.pi)
             noisy_direction = np.array([np.cos(random_angle), np.sin(random_angle)])
         movement = noisy_direction * clan.parameters['movement_speed'] * 1.5 * dt
         clan._move(movement, environment)
-        energy_cost_variation = self.rng.random_normal(0, 3) * dt
+        energy_cost_variation = rng.random_normal(0, 3) * dt
         clan.energy = max(0, clan.energy - (10 + energy_cost_variation) * dt)
 
     def _stochastic_resting(self, clan, dt):
+        rng = self.rng_for(clan)
         base_recovery = 25
-        recovery_variation = self.rng.random_normal(0, 5)
+        recovery_variation = rng.random_normal(0, 5)
         energy_gain = (base_recovery + recovery_variation) * dt
         clan.energy = min(100, clan.energy + energy_gain)
-        moral_recovery = self.rng.random_normal(10, 2) * dt
+        moral_recovery = rng.random_normal(10, 2) * dt
         clan.morale = min(100, clan.morale + moral_recovery)
-        noise = self.rng.random_normal(0, 0.05, size=2) * dt
+        noise = rng.random_normal(0, 0.05, size=2) * dt
         clan._move(noise, None)
 
     def _stochastic_defending(self, clan, environment, dt):
-        if len(clan.territory_cells) > 0:
-            territory_cells = list(clan.territory_cells)
-            if territory_cells:
-                target_cell_idx = self.rng.random_randint(0, len(territory_cells) - 1)
-                target_cell = np.array(territory_cells[target_cell_idx])
-                direction = target_cell - clan.position
+        rng = self.rng_for(clan)
+        if clan.get_territory_size() > 0:
+            territory_cells = clan.get_territory_cells()
+            if len(territory_cells):
+                target_cell_idx = rng.random_randint(0, len(territory_cells) - 1)
+                target_cell = territory_cells[target_cell_idx]
+                if clan.territory_map is not None:
+                    direction = toroidal_displacement(clan.position, target_cell, environment.grid_size)
+                else:
+                    direction = target_cell - clan.position
                 if np.linalg.norm(direction) > 1:
                     direction = direction / np.linalg.norm(direction)
-                    noise = self.rng.random_normal(0, 0.1, size=2)
+                    noise = rng.random_normal(0, 0.1, size=2)
                     noisy_direction = direction + noise
                     if np.linalg.norm(noisy_direction) > 0:
                         noisy_direction = noisy_direction / np.linalg.norm(noisy_direction)
                     movement = noisy_direction * clan.parameters['movement_speed'] * 0.5 * dt
                     clan._move(movement, environment)
-        moral_gain = self.rng.random_normal(1, 0.3) * dt
+        moral_gain = rng.random_normal(1, 0.3) * dt
         clan.morale = min(100, clan.morale + moral_gain)
 
     def _stochastic_fighting_movement(self, clan, environment, dt):
-        random_angle = self.rng.random_uniform(0, 2 * np.pi)
+        rng = self.rng_for(clan)
+        random_angle = rng.random_uniform(0, 2 * np.pi)
         random_direction = np.array([np.cos(random_angle), np.sin(random_angle)])
         movement = random_direction * clan.parameters['movement_speed'] * 0.3 * dt
         clan._move(movement, environment)
@@ -124,22 +177,34 @@ class StochasticMode(SimulationMode):
 class DeterministicMode(SimulationMode):
     def __init__(self, config_path=None, seed=None):
         super().__init__(config_path, seed)
-        self.optimal_step_cache = {}
         default_deterministic_config = {
             'movement_noise_std': 0.0,
             'forage_probability': 1.0,
             'optimization_level': 'basic',
-            'use_caching': True
+            'use_caching': DETERMINISTIC_USE_CACHING,
+            'cache_limit': DETERMINISTIC_CACHE_LIMIT,
+            # Cambio máximo de una media candidata (relativo a la mayor) antes de invalidar
+            'cache_tolerance': 0.02
         }
         for key, value in default_deterministic_config.items():
             if key not in self.config:
                 self.config[key] = value
 
-    def apply_clan_behavior(self, clan, environment, dt):
-        clan.set_rng(self.rng)
-        clan.update_behavior(environment, [], dt)
+        # Memoización LRU de direcciones de migración: (id, x, y) -> (huella de la región, dirección)
+        self.optimal_step_cache = OrderedDict()
+        self.cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+        # La fase de propuesta del paso en dos fases puede consultar la caché desde varios hilos
+        self._cache_lock = threading.Lock()
+
+    def act_on_state(self, clan, environment, dt):
         self._apply_deterministic_behavior(clan, environment, dt)
 
+    def plan_migrations(self, clans, environment, kernels):
+        """Solo planifica los clanes cuya dirección no está ya en la caché."""
+        if self.config.get('use_caching', True):
+            clans = [clan for clan in clans if not self._is_cached(clan, environment)]
+        super().plan_migrations(clans, environment, kernels)
+
     def _apply_deterministic_behavior(self, clan, environment, dt):
         if clan.state == 'foraging':
             self._optimal_foraging(clan, environment, dt)
@@ -159,26 +224,84 @@ class DeterministicMode(SimulationMode):
             clan._move(movement, environment)
 
     def _optimal_migration(self, clan, environment, dt):
-        cache_key = f"migration_{clan.id}_{int(clan.position[0])}_{int(clan.position[1])}"
-        if self.config.get('use_caching', True) and cache_key in self.optimal_step_cache:
-            optimal_direction = self.optimal_step_cache[cache_key]
+        if self.config.get('use_caching', True):
+            optimal_direction = self._cached_migration_direction(clan, environment)
         else:
             optimal_direction = clan._find_migration_direction(environment)
-            if self.config.get('use_caching', True):
-                self.optimal_step_cache[cache_key] = optimal_direction
         if np.linalg.norm(optimal_direction) > 0:
             movement = optimal_direction * clan.parameters['movement_speed'] * 1.5 * dt
             clan._move(movement, environment)
         clan.energy = max(0, clan.energy - 10 * dt)
 
+    def _region_fingerprint(self, clan, cell, environment):
+        """Huella de lo que decide `_find_migration_direction` desde `cell`.
+
+        Medias 5x5 en puntos del anillo de candidatos (a 1.5·radio de
+        percepción, uno cada ~2 celdas para que las áreas se solapen) y qué
+        puntos de ese anillo ya están explorados en la memoria del clan.
+        """
+        radius = clan.parameters['perception_radius'] * 1.5
+        count = max(8, int(np.ceil(np.pi * radius)))
+        angles = np.linspace(0, 2 * np.pi, count, endpoint=False)
+        ring = np.asarray(cell, dtype=float) + np.column_stack([np.cos(angles), np.sin(angles)]) * radius
+        ring_cells = environment.get_toroidal_position(ring).astype(int)
+        means = environment.get_box_means(ring_cells, half_size=2)
+        explored = clan.resource_memory.lookup(ring_cells, default=0) >= 10
+        return means, explored
+
+    def _fingerprint_matches(self, fingerprint, cached_fingerprint):
+        """Cada media del anillo dentro de la tolerancia (relativa al máximo) y la misma exploración."""
+        means, explored = fingerprint
+        cached_means, cached_explored = cached_fingerprint
+        if means.shape != cached_means.shape or not np.array_equal(explored, cached_explored):
+            return False
+        tolerance = self.config.get('cache_tolerance', 0.02) * max(float(np.abs(cached_means).max()), 1e-9)
+        return bool(np.all(np.abs(means - cached_means) <= tolerance))
+
+    def _is_cached(self, clan, environment):
+        """Indica si la caché tiene una dirección válida para `clan` (sin contar estadísticas)."""
+        cell = (int(clan.position[0]), int(clan.position[1]))
+        with self._cache_lock:
+            entry = self.optimal_step_cache.get((clan.id,) + cell)
+        return entry is not None and self._fingerprint_matches(self._region_fingerprint(clan, cell, environment), entry[0])
+
+    def _cached_migration_direction(self, clan, environment):
+        """Dirección de migración memoizada por (clan, celda) e invalidada si cambia la región."""
+        cell = (int(clan.position[0]), int(clan.position[1]))
+        cache_key = (clan.id,) + cell
+        fingerprint = self._region_fingerprint(clan, cell, environment)
+
+        with self._cache_lock:
+            entry = self.optimal_step_cache.get(cache_key)
+            if entry is not None:
+                cached_fingerprint, direction = entry
+                if self._fingerprint_matches(fingerprint, cached_fingerprint):
+                    self.optimal_step_cache.move_to_end(cache_key)
+                    self.cache_stats['hits'] += 1
+                    return direction.copy()
+                self.cache_stats['invalidations'] += 1
+            self.cache_stats['misses'] += 1
+
+        direction = np.asarray(clan._find_migration_direction(environment), dtype=float)
+        with self._cache_lock:
+            self.optimal_step_cache[cache_key] = (fingerprint, direction.copy())
+            self.optimal_step_cache.move_to_end(cache_key)
+            self._evict(self.config.get('cache_limit', DETERMINISTIC_CACHE_LIMIT))
+        return direction
+
+    def _evict(self, max_entries):
+        """Descarta las entradas usadas hace más tiempo hasta quedar en `max_entries`."""
+        while len(self.optimal_step_cache) > max(0, int(max_entries)):
+            self.optimal_step_cache.popitem(last=False)
+            self.cache_stats['evictions'] += 1
+
     def _optimal_resting(self, clan, dt):
         clan.energy = min(100, clan.energy + 25 * dt)
         clan.morale = min(100, clan.morale + 10 * dt)
 
     def _optimal_defending(self, clan, environment, dt):
-        if len(clan.territory_cells) > 0:
-            territory_center = np.mean([np.array(cell) for cell in clan.territory_cells], axis=0)
-            direction = territory_center - clan.position
+        direction = clan.get_territory_direction(environment)
+        if direction is not None:
             if np.linalg.norm(direction) > 1:
                 direction = direction / np.linalg.norm(direction)
                 movement = direction * clan.parameters['movement_speed'] * 0.5 * dt
@@ -189,27 +312,41 @@ class DeterministicMode(SimulationMode):
         pass
 
     def get_optimization_stats(self):
+        lookups = self.cache_stats['hits'] + self.cache_stats['misses']
+        # Memoria aproximada: clave (3 enteros) + huella del anillo + dirección (2 floats) por entrada
+        memory_bytes = sum(3 * 8 + means.nbytes + explored.nbytes + 2 * 8
+                          for (means, explored), _ in self.optimal_step_cache.values())
         return {
             'cache_size': len(self.optimal_step_cache),
+            'cache_limit': self.config.get('cache_limit', DETERMINISTIC_CACHE_LIMIT),
             'cache_enabled': self.config.get('use_caching', True),
+            'cache_hits': self.cache_stats['hits'],
+            'cache_misses': self.cache_stats['misses'],
+            'cache_hit_rate': self.cache_stats['hits'] / lookups if lookups else 0.0,
+            'cache_invalidations': self.cache_stats['invalidations'],
+            'cache_evictions': self.cache_stats['evictions'],
+            'cache_memory_bytes': memory_bytes,
             'optimization_level': self.config.get('optimization_level', 'basic')
         }
 
     def clear_cache(self):
         self.optimal_step_cache.clear()
 
-    def update_cache_limit(self, max_entries=1000):
-        if len(self.optimal_step_cache) > max_entries:
-            items_to_remove = len(self.optimal_step_cache) - max_entries
-            keys_to_remove = list(self.optimal_step_cache.keys())[:items_to_remove]
-            for key in keys_to_remove:
-                del self.optimal_step_cache[key]
+    def update_cache_limit(self, max_entries=DETERMINISTIC_CACHE_LIMIT):
+        self.config['cache_limit'] = max_entries
+        self._evict(max_entries)
 
 class HybridMode(SimulationMode):
     def __init__(self, config_path=None, seed=None):
         super().__init__(config_path, seed)
         self.stochastic_mode = StochasticMode(config_path, seed)
         self.deterministic_mode = DeterministicMode(config_path, seed)
+        # Submodo elegido para cada clan entre `decide_clan_state` y `act_on_state`
+        self._submodes = {}
+        if self.streams is not None:
+            # Los submodos comparten los flujos para no repetir la secuencia de cada clan
+            self.stochastic_mode.share_streams(self)
+            self.deterministic_mode.share_streams(self)
         default_hybrid_config = {
             'stochastic_ratio': 0.3,
             'decision_threshold': 0.5,
@@ -219,19 +356,24 @@ class HybridMode(SimulationMode):
             if key not in self.config:
                 self.config[key] = value
 
-    def apply_clan_behavior(self, clan, environment, dt):
-        clan.set_rng(self.rng)
-        clan.update_behavior(environment, [], dt)
-        if self._should_use_stochastic_mode(clan, environment):
-            self.stochastic_mode.apply_clan_behavior(clan, environment, dt)
-        else:
-            self.deterministic_mode.apply_clan_behavior(clan, environment, dt)
+    def decide_clan_state(self, clan, environment, dt):
+        super().decide_clan_state(clan, environment, dt)
+        submode = self.stochastic_mode if self._should_use_stochastic_mode(clan, environment) else self.deterministic_mode
+        self._submodes[clan.id] = submode
+        submode.decide_clan_state(clan, environment, dt)
+
+    def act_on_state(self, clan, environment, dt):
+        self._submodes.pop(clan.id).act_on_state(clan, environment, dt)
+
+    def plan_migrations(self, clans, environment, kernels):
+        for submode in (self.stochastic_mode, self.deterministic_mode):
+            submode.plan_migrations([clan for clan in clans if self._submodes.get(clan.id) is submode], environment, kernels)
 
     def _should_use_stochastic_mode(self, clan, environment):
         if not self.config.get('adaptive_switching', True):
-            return self.rng.random_float() < self.config.get('stochastic_ratio', 0.3)
+            return self.rng_for(clan).random_float() < self.config.get('stochastic_ratio', 0.3)
         energy_factor = 1.0 - (clan.energy / 100.0)
         resource_factor = 1.0 - min(1.0, environment.get_local_resource_density(clan.position, 3) / 50.0)
-        territory_factor = 1.0 - min(1.0, len(clan.territory_cells) / 20.0)
+        territory_factor = 1.0 - min(1.0, clan.get_territory_size() / 20.0)
         stochastic_score = (energy_factor + resource_factor + territory_factor) / 3.0
         return stochastic_score > self.config.get('decision_threshold', 0.5)
\ No newline at end of file
@@ -1,6 +1,17 @@
+import zlib
+
 import numpy as np
 
+# Generadores de bits disponibles para `GeneratorRNG`
+BIT_GENERATORS = {
+    'pcg64': np.random.PCG64,
+    'philox': np.random.Philox
+}
+DEFAULT_BIT_GENERATOR = 'pcg64'
+
 class MersenneTwister:
+    """Interfaz original sobre `np.random.RandomState` (se mantiene por compatibilidad)."""
+
     def __init__(self, seed):
         self.rng = np.random.RandomState(seed)
         self.seed = seed
@@ -97,65 +108,421 @@ class MersenneTwister:
         """Establece el estado del generador."""
         self.rng.set_state(state)
 
-class LinearCongruentialGenerator:
-    """Implementación simple de un generador congruencial lineal para casos específicos."""
-    
+class BufferedMersenneTwister(MersenneTwister):
+    """MersenneTwister que sirve escalares y vectores pequeños desde bloques pre-generados.
+
+    Los uniformes y normales se generan en bloques de `block_size` valores con una
+    sola llamada a `RandomState`, evitando el coste de despacho por llamada en los
+    caminos calientes. La secuencia es reproducible para una semilla dada y
+    `get_state`/`set_state` incluyen el contenido de los buffers.
+    """
+
+    def __init__(self, seed, block_size=4096):
+        super().__init__(seed)
+        self.block_size = int(block_size)
+        self._clear_buffers()
+
+    def _clear_buffers(self):
+        self._uniform_buffer = np.empty(0)
+        self._uniform_pos = 0
+        self._normal_buffer = np.empty(0)
+        self._normal_pos = 0
+
+    def _refill_uniform(self):
+        remaining = self._uniform_buffer[self._uniform_pos:]
+        self._uniform_buffer = np.concatenate([remaining, self.rng.random_sample(self.block_size)])
+        self._uniform_pos = 0
+
+    def _refill_normal(self):
+        remaining = self._normal_buffer[self._normal_pos:]
+        self._normal_buffer = np.concatenate([remaining, self.rng.standard_normal(self.block_size)])
+        self._normal_pos = 0
+
+    def _take_uniform(self, count):
+        if self._uniform_pos + count > len(self._uniform_buffer):
+            self._refill_uniform()
+        values = self._uniform_buffer[self._uniform_pos:self._uniform_pos + count]
+        self._uniform_pos += count
+        return values
+
+    def _buffered_count(self, size):
+        """Número de valores para `size` si cabe en un bloque; None si no."""
+        count = size if size.__class__ is int else int(np.prod(size))
+        return count if count <= self.block_size else None
+
+    def random_float(self):
+        """Genera un flotante aleatorio entre 0.0 y 1.0."""
+        if self._uniform_pos >= len(self._uniform_buffer):
+            self._refill_uniform()
+        value = self._uniform_buffer[self._uniform_pos]
+        self._uniform_pos += 1
+        return value
+
+    def random_uniform(self, low=0.0, high=1.0, size=None):
+        """Genera números aleatorios de una distribución uniforme."""
+        if size is None:
+            return low + (high - low) * self.random_float()
+        count = self._buffered_count(size)
+        if count is None:
+            return self.rng.uniform(low, high, size=size)
+        values = self._take_uniform(count)
+        return low + (high - low) * (values if isinstance(size, int) else values.reshape(size))
+
+    def random_normal(self, mean=0.0, std_dev=1.0, size=None):
+        """Genera números aleatorios de una distribución normal (gaussiana)."""
+        if size is None:
+            if self._normal_pos >= len(self._normal_buffer):
+                self._refill_normal()
+            value = self._normal_buffer[self._normal_pos]
+            self._normal_pos += 1
+            return mean + std_dev * value
+        count = self._buffered_count(size)
+        if count is None:
+            return self.rng.normal(mean, std_dev, size=size)
+        start = self._normal_pos
+        if start + count > len(self._normal_buffer):
+            self._refill_normal()
+            start = 0
+        self._normal_pos = start + count
+        values = self._normal_buffer[start:start + count] * std_dev
+        if mean:
+            values += mean
+        return values if isinstance(size, int) else values.reshape(size)
+
+    def reset_seed(self, new_seed):
+        """Reinicia el generador con una nueva semilla."""
+        super().reset_seed(new_seed)
+        self._clear_buffers()
+
+    def get_state(self):
+        """Obtiene el estado actual del generador (incluye los buffers)."""
+        return {
+            'rng_state': self.rng.get_state(),
+            'block_size': self.block_size,
+            'uniform_buffer': self._uniform_buffer.copy(),
+            'uniform_pos': self._uniform_pos,
+            'normal_buffer': self._normal_buffer.copy(),
+            'normal_pos': self._normal_pos
+        }
+
+    def set_state(self, state):
+        """Establece el estado del generador (incluye los buffers)."""
+        self.rng.set_state(state['rng_state'])
+        self.block_size = state['block_size']
+        self._uniform_buffer = np.array(state['uniform_buffer'], dtype=float)
+        self._uniform_pos = state['uniform_pos']
+        self._normal_buffer = np.array(state['normal_buffer'], dtype=float)
+        self._normal_pos = state['normal_pos']
+
+class GeneratorRNG(MersenneTwister):
+    """Misma interfaz que `MersenneTwister` sobre `np.random.Generator` (PCG64 o Philox).
+
+    Se construye a partir de una semilla o de un `SeedSequence`, lo que permite
+    derivar flujos independientes con `spawn` o con `RNGStreams`.
+    """
+
+    def __init__(self, seed=None, bit_generator=DEFAULT_BIT_GENERATOR, seed_sequence=None):
+        if bit_generator not in BIT_GENERATORS:
+            raise ValueError(f"Generador de bits no soportado: {bit_generator}")
+        self.seed = seed
+        self.bit_generator = bit_generator
+        self.seed_sequence = seed_sequence if seed_sequence is not None else np.random.SeedSequence(seed)
+        self.rng = np.random.Generator(BIT_GENERATORS[bit_generator](self.seed_sequence))
+
+    def random_float(self):
+        """Genera un flotante aleatorio entre 0.0 y 1.0."""
+        return self.rng.random()
+
+    def random_randint(self, low, high=None, size=None):
+        """Genera enteros aleatorios (`high` excluido, como `RandomState.randint`)."""
+        return self.rng.integers(low, high, size=size)
+
+    def spawn(self, count):
+        """Flujos hijos independientes derivados del `SeedSequence` de este generador."""
+        return [GeneratorRNG(bit_generator=self.bit_generator, seed_sequence=child)
+                for child in self.seed_sequence.spawn(count)]
+
+    def reset_seed(self, new_seed):
+        """Reinicia el generador con una nueva semilla."""
+        self.seed = new_seed
+        self.seed_sequence = np.random.SeedSequence(new_seed)
+        self.rng = np.random.Generator(BIT_GENERATORS[self.bit_generator](self.seed_sequence))
+
+    def get_state(self):
+        """Obtiene el estado actual del generador de bits."""
+        return self.rng.bit_generator.state
+
+    def set_state(self, state):
+        """Establece el estado del generador de bits."""
+        self.rng.bit_generator.state = state
+
+def _stream_key_part(value):
+    """Entero no negativo estable para una parte de la clave de un flujo."""
+    if isinstance(value, str):
+        return zlib.crc32(value.encode('utf-8'))
+    return int(value) % (1 << 64)
+
+class RNGStreams:
+    """Flujos aleatorios con nombre derivados de una semilla raíz.
+
+    Cada flujo se identifica por un subsistema y una clave opcional, p. ej.
+    `stream('clan', clan.id)`, `stream('interactions')` o `stream('replica', r)`.
+    El `SeedSequence` de cada flujo se obtiene de la clave (no del orden de
+    creación), así que los resultados no dependen del orden en que se
+    actualizan los clanes ni del número de hilos o procesos.
+    """
+
+    def __init__(self, seed=None, bit_generator=DEFAULT_BIT_GENERATOR):
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.bit_generator = bit_generator
+        self._streams = {}
+
+    def seed_sequence_for(self, subsystem, *key):
+        """`SeedSequence` del flujo (subsistema, clave...)."""
+        spawn_key = tuple(_stream_key_part(part) for part in (subsystem,) + key)
+        return np.random.SeedSequence(self.seed_sequence.entropy,
+                                      spawn_key=self.seed_sequence.spawn_key + spawn_key)
+
+    def stream(self, subsystem, *key):
+        """Generador del flujo (subsistema, clave...), creado en la primera petición."""
+        stream_key = (subsystem,) + key
+        rng = self._streams.get(stream_key)
+        if rng is None:
+            rng = self._streams[stream_key] = GeneratorRNG(
+                bit_generator=self.bit_generator, seed_sequence=self.seed_sequence_for(subsystem, *key))
+        return rng
+
+    def child(self, subsystem, *key):
+        """Conjunto de flujos anidado (p. ej. uno por réplica)."""
+        return RNGStreams(self.seed_sequence_for(subsystem, *key), self.bit_generator)
+
+    def __len__(self):
+        return len(self._streams)
+
+    def __repr__(self):
+        return f"RNGStreams(entropía={self.seed_sequence.entropy}, generador={self.bit_generator}, flujos={len(self._streams)})"
+
+class ArrayGenerator:
+    """Base de los generadores propios que producen arrays completos por llamada.
+
+    Las subclases implementan `random_ints(count)` (enteros de 32 bits) y
+    `_uniforms(count)` (flotantes en [0, 1)); aquí se construyen sobre ellos las
+    mismas operaciones `random_uniform`/`random_normal`/`random_randint` que
+    ofrece `MersenneTwister`, con o sin `size`.
+    """
+
+    @staticmethod
+    def _count(size):
+        return int(size) if isinstance(size, (int, np.integer)) else int(np.prod(size))
+
+    @staticmethod
+    def _shape(values, size):
+        return values if isinstance(size, (int, np.integer)) else values.reshape(size)
+
+    def random_float(self):
+        """Genera un flotante aleatorio entre 0.0 y 1.0."""
+        return float(self._uniforms(1)[0])
+
+    def random_uniform(self, low=0.0, high=1.0, size=None):
+        """Genera números aleatorios de una distribución uniforme en [low, high)."""
+        if size is None:
+            return low + (high - low) * self.random_float()
+        return low + (high - low) * self._shape(self._uniforms(self._count(size)), size)
+
+    def random_normal(self, mean=0.0, std_dev=1.0, size=None):
+        """Genera números aleatorios normales (transformación de Box-Muller)."""
+        count = 1 if size is None else self._count(size)
+        pairs = (count + 1) // 2
+        uniforms = self._uniforms(2 * pairs)
+        radius = np.sqrt(-2.0 * np.log1p(-uniforms[:pairs]))
+        angle = 2 * np.pi * uniforms[pairs:]
+        values = np.concatenate([radius * np.cos(angle), radius * np.sin(angle)])[:count]
+        values = mean + std_dev * values
+        return float(values[0]) if size is None else self._shape(values, size)
+
+    def random_randint(self, low, high=None, size=None):
+        """Genera enteros aleatorios en [low, high) (o [0, low) si falta `high`)."""
+        if high is None:
+            low, high = 0, low
+        count = 1 if size is None else self._count(size)
+        values = low + (self.random_ints(count).astype(np.int64) % (high - low))
+        return int(values[0]) if size is None else self._shape(values, size)
+
+class LinearCongruentialGenerator(ArrayGenerator):
+    """Generador congruencial lineal x' = (a·x + c) mod m con generación en bloque.
+
+    Un bloque de N valores se calcula con los coeficientes de salto
+    x_{n+k} = A_k·x_n + C_k (mod m), precalculados por duplicación, así que la
+    secuencia es idéntica a la de llamadas escalares sucesivas.
+    """
+
+    JUMP_BLOCK = 1 << 16
+
     def __init__(self, seed, a=1664525, c=1013904223, m=2**32):
+        if m > 2**32:
+            raise ValueError("El módulo del LCG debe ser como mucho 2**32")
         self.seed = seed
-        self.current = seed
+        self.current = seed % m
         self.a = a 
         self.c = c
         self.m = m 
+        # Tabla única de JUMP_BLOCK coeficientes, construida en el primer uso
+        self._jump_table = None
+
+    def _jump_coefficients(self, count):
+        """Coeficientes (A_k, C_k) para k = 1..count (count <= JUMP_BLOCK) en uint64 (productos < 2**64)."""
+        if self._jump_table is None:
+            m = np.uint64(self.m)
+            multipliers = np.array([self.a % self.m], dtype=np.uint64)
+            increments = np.array([self.c % self.m], dtype=np.uint64)
+            while len(multipliers) < self.JUMP_BLOCK:
+                # x_{L+j} = A_j·(A_L·x + C_L) + C_j
+                last_multiplier, last_increment = multipliers[-1], increments[-1]
+                multipliers, increments = (
+                    np.concatenate([multipliers, multipliers * last_multiplier % m]),
+                    np.concatenate([increments, (multipliers * last_increment % m + increments) % m])
+                )
+            self._jump_table = (multipliers[:self.JUMP_BLOCK], increments[:self.JUMP_BLOCK])
+        multipliers, increments = self._jump_table
+        return multipliers[:count], increments[:count]
 
     def random_int(self):
         """Genera el siguiente entero aleatorio."""
         self.current = (self.a * self.current + self.c) % self.m
         return self.current
 
+    def random_ints(self, count):
+        """Los siguientes `count` enteros de la secuencia en una sola operación."""
+        values = np.empty(max(0, count), dtype=np.uint64)
+        m = np.uint64(self.m)
+        # Bloques de como mucho JUMP_BLOCK valores con coeficientes cacheados
+        for start in range(0, len(values), self.JUMP_BLOCK):
+            block = values[start:start + self.JUMP_BLOCK]
+            multipliers, increments = self._jump_coefficients(len(block))
+            np.remainder(multipliers * np.uint64(self.current) % m + increments, m, out=block)
+            self.current = int(block[-1])
+        return values
+
     def random_float(self):
         """Genera un flotante aleatorio entre 0.0 y 1.0."""
         return self.random_int() / self.m
 
-    def random_uniform(self, low=0.0, high=1.0):
-        """Genera un número aleatorio uniforme en el rango [low, high)."""
-        return low + (high - low) * self.random_float()
-
-    def random_randint(self, low, high):
-        """Genera un entero aleatorio en el rango [low, high)."""
-        range_size = high - low
-        return low + (self.random_int() % range_size)
+    def _uniforms(self, count):
+        return self.random_ints(count) / self.m
 
     def reset_seed(self, new_seed):
         """Reinicia el generador con una nueva semilla."""
         self.seed = new_seed
-        self.current = new_seed
-
-class XORShiftGenerator:
-    """Implementación de XORShift para generación rápida de números aleatorios."""
-    
-    def __init__(self, seed):
-        self.seed = seed
-        self.state = seed if seed != 0 else 1
+        self.current = new_seed % self.m
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix64(state):
+    """Finalizador de SplitMix64: biyección bien mezclada sobre uint64."""
+    with np.errstate(over='ignore'):
+        state = (state ^ (state >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        state = (state ^ (state >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return state ^ (state >> np.uint64(31))
+
+
+def _splitmix64(seed, count):
+    """`count` estados iniciales de 64 bits bien mezclados a partir de una semilla."""
+    with np.errstate(over='ignore'):
+        state = _mix64(np.uint64(seed % 2**64) + np.arange(1, count + 1, dtype=np.uint64) * _GOLDEN_GAMMA)
+    state[state == 0] = 1
+    return state
+
+class XORShiftGenerator(ArrayGenerator):
+    """xorshift64* en `lanes` carriles independientes de uint64.
+
+    Cada ronda avanza todos los carriles con operaciones de array y produce
+    `lanes` valores; la secuencia es la concatenación de las rondas, y los
+    valores sobrantes de una llamada se sirven en las siguientes. El estado
+    queda siempre acotado a 64 bits.
+    """
+
+    MULTIPLIER = np.uint64(0x2545F4914F6CDD1D)
+
+    def __init__(self, seed, lanes=8192):
+        self.lanes = int(lanes)
+        self.reset_seed(seed)
+
+    def _round(self, rounds):
+        """Avanza `rounds` rondas y retorna sus salidas de 64 bits (rounds·lanes)."""
+        output = np.empty((rounds, self.lanes), dtype=np.uint64)
+        x = self.state
+        with np.errstate(over='ignore'):
+            for r in range(rounds):
+                x ^= x >> np.uint64(12)
+                x ^= x << np.uint64(25)
+                x ^= x >> np.uint64(27)
+                np.multiply(x, self.MULTIPLIER, out=output[r])
+        return output.ravel()
+
+    def _next_raw(self, count):
+        buffered = len(self._buffer) - self._position
+        if count > buffered:
+            rounds = -(-(count - buffered) // self.lanes)
+            self._buffer = np.concatenate([self._buffer[self._position:], self._round(rounds)])
+            self._position = 0
+        values = self._buffer[self._position:self._position + count]
+        self._position += count
+        return values
 
     def random_int(self):
-        """Genera el siguiente entero aleatorio usando XORShift."""
-        self.state ^= self.state << 13
-        self.state ^= self.state >> 17
-        self.state ^= self.state << 5
-        return self.state & 0xFFFFFFFF 
+        """Genera el siguiente entero aleatorio de 32 bits."""
+        return int(self._next_raw(1)[0] >> np.uint64(32))
 
-    def random_float(self):
-        """Genera un flotante aleatorio entre 0.0 y 1.0."""
-        return self.random_int() / (2**32)
+    def random_ints(self, count):
+        """Los siguientes `count` enteros de 32 bits."""
+        return self._next_raw(count) >> np.uint64(32)
 
-    def random_uniform(self, low=0.0, high=1.0):
-        """Genera un número aleatorio uniforme en el rango [low, high)."""
-        return low + (high - low) * self.random_float()
+    def _uniforms(self, count):
+        # 53 bits altos -> flotante en [0, 1)
+        return (self._next_raw(count) >> np.uint64(11)) * (1.0 / 2**53)
 
     def reset_seed(self, new_seed):
         """Reinicia el generador con una nueva semilla."""
         self.seed = new_seed
-        self.state = new_seed if new_seed != 0 else 1
+        self.state = _splitmix64(new_seed, self.lanes)
+        self._buffer = np.zeros(0, dtype=np.uint64)
+        self._position = 0
+
+class CounterRNG:
+    """Generador basado en contador: cada valor depende solo de (semilla, flujo, contador).
+
+    No tiene estado que avanzar, de modo que cualquier proceso puede generar
+    el valor asociado a una celda o a un clan sin coordinarse con los demás
+    (el resultado no depende de cómo se reparta el trabajo).
+    """
+
+    def __init__(self, seed=0):
+        self.seed = int(seed) % 2**64
+        self._key = _mix64(np.uint64(self.seed) ^ _GOLDEN_GAMMA)
+
+    def _raw(self, stream, counters):
+        counters = np.asarray(counters, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            base = _mix64(self._key + _mix64(np.uint64(int(stream) % 2**64) + _GOLDEN_GAMMA))
+            return _mix64(base + (counters + np.uint64(1)) * _GOLDEN_GAMMA)
+
+    def uniform(self, stream, counters):
+        """Uniformes en [0, 1) con la forma de `counters`."""
+        return (self._raw(stream, counters) >> np.uint64(11)) * (1.0 / 2**53)
+
+    def normal(self, stream, counters, mean=0.0, std_dev=1.0):
+        """Normales (Box-Muller) con la forma de `counters`."""
+        counters = np.asarray(counters, dtype=np.uint64) * np.uint64(2)
+        u1 = 1.0 - self.uniform(stream, counters)
+        u2 = self.uniform(stream, counters + np.uint64(1))
+        return mean + std_dev * np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+    def __repr__(self):
+        return f"CounterRNG(seed={self.seed})"
 
 def create_generator(generator_type='mersenne', seed=None):
     """Factory function para crear diferentes tipos de generadores."""
@@ -165,6 +532,10 @@ def create_generator(generator_type='mersenne', seed=None):
     
     if generator_type.lower() == 'mersenne':
         return MersenneTwister(seed)
+    elif generator_type.lower() == 'buffered':
+        return BufferedMersenneTwister(seed)
+    elif generator_type.lower() in BIT_GENERATORS:
+        return GeneratorRNG(seed, bit_generator=generator_type.lower())
     elif generator_type.lower() == 'lcg':
         return LinearCongruentialGenerator(seed)
     elif generator_type.lower() == 'xorshift':
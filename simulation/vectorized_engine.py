@@ -0,0 +1,175 @@
+# clan_territorial_simulation/simulation/vectorized_engine.py
+import numpy as np
+
+from models import equations
+from models.clan_store import ClanStore
+from simulation.engine import SimulationEngine
+from simulation import kernels
+
+
+class VectorizedSimulationEngine(SimulationEngine):
+    """Motor con estado de clanes en arrays contiguos (backend 'vectorized').
+
+    El comportamiento individual (percepción, decisión de estado, movimiento e
+    interacciones) sigue aplicándose a través del modo de simulación sobre vistas
+    `StoredClan`. El consumo, la demografía, el decaimiento de energía y la
+    eliminación de clanes extintos se ejecutan como operaciones sobre toda la
+    población a la vez.
+
+    A diferencia del motor por objetos, todos los clanes deciden su
+    comportamiento antes de consumir; cuando varios clanes comparten celda se
+    sirven en el orden de la lista, igual que en `SimulationEngine`. Con
+    `update_scheme='two_phase'` la propuesta puede repartirse entre hilos y
+    las celdas disputadas se reparten en proporción a la demanda.
+
+    `demographic_integrator` elige la actualización demográfica: 'legacy'
+    (pasos de Euler encadenados con redondeo, como `Clan`) o la ecuación
+    dN/dt = r(energía)·N de `models.equations` integrada en lote con 'euler',
+    'rk4' o 'exact' (tamaños continuos, estable para dt grandes).
+    """
+
+    def __init__(self, environment, initial_clans, simulation_mode, dt=0.2, seed=None,
+                 update_scheme='sequential', max_workers=None, kernel_backend='auto',
+                 demographic_integrator='legacy'):
+        if demographic_integrator != 'legacy' and demographic_integrator not in equations.POPULATION_INTEGRATORS:
+            raise ValueError(f"Integrador demográfico no soportado: {demographic_integrator}")
+        self.demographic_integrator = demographic_integrator
+        self.store = ClanStore.from_clans(list(initial_clans))
+        super().__init__(environment, self.store.views, simulation_mode, dt, seed,
+                         update_scheme=update_scheme, max_workers=max_workers, kernel_backend=kernel_backend)
+
+    def step(self):
+        """Ejecuta un paso completo de simulación."""
+        try:
+            self.step_count += 1
+            dt = self.dt
+            store = self.store
+
+            # 1. Regenerar recursos del entorno
+            self.environment.regenerate(dt)
+            self._rebuild_spatial_index()
+
+            # 2. Comportamiento individual (modo de simulación sobre las vistas)
+            # (los campos derivados del entorno se calculan una vez y se comparten)
+            self.environment.derived.pin()
+            active = store.sizes > 0
+            self._propose_behaviors([clan for clan, is_active in zip(self.clans, active) if is_active], dt)
+
+            self.environment.derived.unpin()
+
+            # 3. Consumo, demografía y decaimiento de energía para toda la población
+            self._update_population_arrays(active, dt)
+
+            for clan in self.clans:
+                if active[clan.row] and clan.size <= 0:
+                    print(f"💀 Clan {clan.id} se ha extinguido (tamaño: {clan.size})")
+
+            # 4. Procesar interacciones entre clanes cercanos
+            self._process_interactions(dt)
+
+            # 5. Aplicar dinámicas poblacionales adicionales si es necesario
+            self._apply_population_dynamics(dt)
+
+            # 6. Remover clanes extintos
+            initial_clan_count = store.count
+            self.territory.release_owners(store.ids[store.sizes <= 0].tolist())
+            store.compact(store.sizes > 0)
+            self.clans = list(store.views)
+            if store.count < initial_clan_count:
+                extinct_count = initial_clan_count - store.count
+                print(f"🪦 {extinct_count} clan(es) removido(s) por extinción")
+
+            # 7. Actualizar territorio para todos los clanes restantes
+            for clan in self._canonical_order(self.clans):
+                clan._update_territory()
+
+            # 8. Registrar métricas
+            self._record_metrics()
+
+            # 9. Avanzar tiempo
+            self.time += dt
+
+            if self.step_count % 50 == 0:
+                total_pop = float(np.sum(store.sizes))
+                avg_energy = float(np.mean(store.energy)) if store.count else 0
+                print(f"📊 Paso {self.step_count}: {store.count} clanes, {total_pop:.1f} población, {avg_energy:.1f}% energía promedio")
+
+        except Exception as e:
+            self.environment.derived.unpin()
+            print(f"Error en paso de simulación: {e}")
+            import traceback
+            traceback.print_exc()
+
+    def _clan_positions(self):
+        """Posiciones actuales de los clanes (copia de la columna del almacén)."""
+        return self.store.positions.copy()
+
+    def _update_population_arrays(self, active, dt):
+        """Consumo, dinámica demográfica y decaimiento de energía vectorizados."""
+        store = self.store
+        rows = np.flatnonzero(active)
+        if len(rows) == 0:
+            return
+
+        sizes = store.sizes[rows]
+        energy = store.energy[rows]
+        demand = kernels.consumption_demand(
+            sizes,
+            store.parameter('resource_required_per_individual')[rows],
+            store.parameter('cooperation_tendency')[rows],
+            dt
+        )
+        cells = kernels.grid_cells(store.positions[rows], self.environment.grid.shape)
+        consume = kernels.consume_proportional if self.update_scheme == 'two_phase' else kernels.consume_in_order
+        consumed = consume(self.environment.grid, cells, demand)
+        self.environment.mark_grid_modified()
+
+        birth_rate = store.parameter('birth_rate')[rows]
+        natural_death_rate = store.parameter('natural_death_rate')[rows]
+        if self.demographic_integrator == 'legacy':
+            self.kernels.apply_consumption_outcome(sizes, energy, consumed, demand, birth_rate, natural_death_rate, dt)
+        else:
+            kernels.apply_energy_gain(energy, consumed, demand, dt)
+            rates = equations.demographic_rates(energy, birth_rate, natural_death_rate)
+            sizes[:] = equations.integrate_population(sizes, rates, dt, self.demographic_integrator)
+
+        # Recuperación ocasional de clanes extintos con energía alta (misma regla que Clan)
+        for i in np.flatnonzero((sizes == 0) & (energy > 50)):
+            clan = store.views[rows[i]]
+            if clan.rng and clan.rng.random_float() < 0.1:
+                sizes[i] = 1
+
+        kernels.apply_energy_decay(energy, dt)
+
+        store.sizes[rows] = sizes
+        store.energy[rows] = energy
+
+    def _run_combats(self, first, second, noise, dt):
+        """Combates en lote directamente sobre las filas del almacén."""
+        store = self.store
+        return self.kernels.combat_pairs(store.sizes, store.energy, store.parameter('aggressiveness'),
+                                         [clan.row for clan in first], [clan.row for clan in second], noise, dt)
+
+    def _record_metrics(self):
+        """Registra métricas básicas del sistema."""
+        self.population_history.append(float(np.sum(self.store.sizes)))
+        self.resource_history.append(self.environment.get_total_resources())
+
+        if len(self.population_history) > 1000:
+            self.population_history = self.population_history[-500:]
+            self.resource_history = self.resource_history[-500:]
+
+    def get_simulation_state(self):
+        """Obtiene el estado actual de la simulación para el frontend."""
+        state = super().get_simulation_state()
+        if 'error' not in state:
+            store = self.store
+            state['system_metrics'].update({
+                'total_population': float(np.sum(store.sizes)),
+                'active_clans': store.count,
+                'avg_energy': float(np.mean(store.energy)) if store.count else 0
+            })
+        return state
+
+    def __repr__(self):
+        return f"VectorizedSimulationEngine(t={self.time:.2f}, clanes={self.store.count})"
@@ -778,6 +778,7 @@ document.addEventListener('DOMContentLoaded', () => {
         ctx.clearRect(0, 0, gridCanvas.width, gridCanvas.height);
 
         renderResources(grid, rows, cols);
+        renderHotspots(simulationData.resource_hotspots || []);
         renderClans(clans);
 
         if (cellSize > 10) {
@@ -788,9 +789,11 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     function renderResources(grid, rows, cols) {
+        // Rejilla codificada por la política de precisión (p. ej. uint16 en punto fijo)
+        const scale = simulationData.resource_scale || 1;
         for (let y = 0; y < rows; y++) {
             for (let x = 0; x < cols; x++) {
-                const resource = grid[y][x];
+                const resource = grid[y][x] * scale;
                 const intensity = Math.min(1, Math.max(0, resource / 100));
 
                 ctx.fillStyle = `rgba(34, 139, 34, ${intensity * 0.6})`;
@@ -799,6 +802,16 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function renderHotspots(hotspots) {
+        // Celdas con más recurso (top-k del motor), marcadas con un borde
+        ctx.strokeStyle = 'rgba(218, 165, 32, 0.9)';
+        ctx.lineWidth = Math.max(1, cellSize / 8);
+        hotspots.forEach(hotspot => {
+            const [row, col] = hotspot.position;
+            ctx.strokeRect(col * cellSize, row * cellSize, cellSize, cellSize);
+        });
+    }
+
     function exportChartData() {
         if (!window.ChartController) {
             showNotification('Gráficos no disponibles para exportar', 'error');
@@ -0,0 +1,79 @@
+# clan_territorial_simulation/tests/test_clan_memory.py
+import unittest
+import numpy as np
+from models.clan import Clan
+from models.clan_memory import ResourceMemory
+from models.environment import Environment
+from models.perception import best_resource_direction, perceive_disk
+
+
+class TestResourceMemory(unittest.TestCase):
+    def test_update_overwrites_and_behaves_like_dict(self):
+        memory = ResourceMemory(capacity=10)
+        memory.update([[1, 2], [3, 4], [1, 2]], [5.0, 7.0, 9.0])
+        self.assertEqual(len(memory), 2)
+        self.assertEqual(memory.get((1, 2)), 9.0)
+        self.assertIsNone(memory.get((0, 0)))
+        self.assertIn((3, 4), memory)
+        memory[(0, 1)] = 2.5
+        self.assertEqual(memory[(0, 1)], 2.5)
+        np.testing.assert_array_equal(memory.lookup([[3, 4], [8, 8]], default=-1), [7.0, -1])
+        self.assertAlmostEqual(memory.mean(), (9.0 + 7.0 + 2.5) / 3)
+
+    def test_capacity_evicts_least_recently_seen(self):
+        memory = ResourceMemory(capacity=3)
+        memory.update([[0, 0], [0, 1]], [1.0, 2.0])
+        memory.update([[0, 2]], [3.0])
+        memory.update([[0, 0], [5, 5]], [4.0, 5.0])
+        self.assertEqual(len(memory), 3)
+        self.assertNotIn((0, 1), memory)
+        self.assertEqual({tuple(cell) for cell in memory.cells().tolist()}, {(0, 0), (0, 2), (5, 5)})
+
+    def test_decay_and_window(self):
+        memory = ResourceMemory(capacity=10, decay_rate=0.5, max_age=2)
+        memory.update([[1, 1]], [100.0])
+        memory.update([[2, 2]], [80.0])
+        cell, value = memory.argmax()
+        self.assertEqual(cell.tolist(), [2, 2])
+        self.assertAlmostEqual(value, 80.0)
+        self.assertAlmostEqual(memory.get((1, 1)), 100.0 * np.exp(-0.5))
+        memory.update([[3, 3]], [1.0])
+        memory.update([[3, 3]], [1.0])
+        self.assertNotIn((1, 1), memory)
+
+
+class TestClanMemory(unittest.TestCase):
+    def test_memory_stays_bounded_over_long_runs(self):
+        environment = Environment(grid_size=(60, 60))
+        environment.grid = np.random.RandomState(0).uniform(0, 100, (60, 60))
+        clan = Clan(1, 10, [5, 5], parameters={'memory_capacity': 120})
+        for step in range(80):
+            clan.position = np.array([step * 0.7, step * 0.4]) % 60
+            clan._perceive_environment(environment, [])
+            self.assertLessEqual(len(clan.resource_memory), 120)
+
+        expected = best_resource_direction(clan.resource_memory.cells().astype(float), clan.resource_memory.levels(),
+                                           clan.position, environment.grid_size)
+        np.testing.assert_allclose(clan._find_resource_direction(environment), expected)
+
+    def test_capacity_holds_a_full_perception(self):
+        environment = Environment(grid_size=(60, 60))
+        environment.grid = np.random.RandomState(1).uniform(0, 100, (60, 60))
+        clan = Clan(1, 10, [30, 30], parameters={'perception_radius': 10})
+        self.assertGreaterEqual(clan.resource_memory.capacity, 317)
+        clan.position = np.array([10.0, 10.0])
+        clan._perceive_environment(environment, [])
+        clan.position = np.array([40.0, 40.0])
+        clan._perceive_environment(environment, [])
+        # La percepción actual se conserva entera (317 celdas del disco de radio 10)
+        view, _ = perceive_disk(environment.grid, clan.position, 10)
+        self.assertTrue(all(tuple(cell) in clan.resource_memory for cell in view.tolist()))
+
+        # Si el radio crece después de crear el clan, la memoria también
+        clan.parameters['perception_radius'] = 12
+        clan._perceive_environment(environment, [])
+        view, _ = perceive_disk(environment.grid, clan.position, 12)
+        self.assertTrue(all(tuple(cell) in clan.resource_memory for cell in view.tolist()))
+
+if __name__ == '__main__':
+    unittest.main()
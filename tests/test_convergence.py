@@ -0,0 +1,42 @@
+# clan_territorial_simulation/tests/test_convergence.py
+import unittest
+import numpy as np
+from analysis.convergence import (run_simulation_for_convergence, richardson_extrapolation, analyze_convergence,
+                                  FinalStateReducer, CheckpointReducer, L2ErrorReducer)
+
+INITIAL_CONDITIONS = {
+    'grid_size': [20, 20],
+    'clans': [{'id': 1, 'size': 30, 'position': [5, 5], 'parameters': {'birth_rate': 0.1, 'natural_death_rate': 0.05}}]
+}
+
+
+class TestConvergenceReducers(unittest.TestCase):
+    def test_reducers_stream_without_storing_states(self):
+        output = run_simulation_for_convergence(INITIAL_CONDITIONS, 1.0, 0.1,
+                                                reducers=[FinalStateReducer(), CheckpointReducer(0.5)])
+        self.assertEqual(set(output), {'final_state', 'checkpoints'})
+        self.assertEqual(sorted(output['checkpoints']), [0.0, 0.5, 1.0])
+        self.assertAlmostEqual(output['final_state']['time'], 1.0)
+        self.assertEqual(np.shape(output['final_state']['resource_grid']), (20, 20))
+
+    def test_l2_error_against_own_trajectory_is_zero(self):
+        reference = run_simulation_for_convergence(INITIAL_CONDITIONS, 1.0, 0.1,
+                                                   reducers=[CheckpointReducer(0.5, include_grid=True)])['checkpoints']
+        errors = run_simulation_for_convergence(INITIAL_CONDITIONS, 1.0, 0.1, reducers=[L2ErrorReducer(reference)])['l2_error']
+        self.assertEqual(sorted(errors), [0.0, 0.5, 1.0])
+        self.assertTrue(all(error == 0 for error in errors.values()))
+
+    def test_richardson_accepts_reduced_outputs_and_state_lists(self):
+        dts = [0.1, 0.05]
+        reduced = {dt: run_simulation_for_convergence(INITIAL_CONDITIONS, 1.0, dt) for dt in dts}
+        legacy = {dt: [output['final_state']] for dt, output in reduced.items()}
+        self.assertEqual(richardson_extrapolation(reduced, dts), richardson_extrapolation(legacy, dts))
+
+    def test_parallel_analysis_matches_serial(self):
+        serial = analyze_convergence(INITIAL_CONDITIONS, 1.0, [0.1, 0.05], max_workers=1)
+        parallel = analyze_convergence(INITIAL_CONDITIONS, 1.0, [0.1, 0.05], max_workers=2)
+        self.assertEqual(serial['convergence_norms'], parallel['convergence_norms'])
+        self.assertEqual(serial['richardson_errors'], parallel['richardson_errors'])
+
+if __name__ == '__main__':
+    unittest.main()
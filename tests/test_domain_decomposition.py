@@ -0,0 +1,98 @@
+# clan_territorial_simulation/tests/test_domain_decomposition.py
+import contextlib
+import gc
+import io
+import unittest
+from multiprocessing import shared_memory
+import numpy as np
+from models.clan import Clan
+from models.environment import Environment
+from simulation.domain_decomposition import DomainDecompositionEngine
+from simulation.engine import create_engine
+from simulation.modes import DeterministicMode
+
+
+def build_scenario():
+    environment = Environment(grid_size=(40, 60))
+    environment.grid = np.random.default_rng(1).uniform(10, 90, (40, 60))
+    positions = np.random.default_rng(2).uniform(0, 40, (30, 2))
+    return environment, [Clan(i, 20, position) for i, position in enumerate(positions)]
+
+
+def run(tiles, processes, steps=15):
+    environment, clans = build_scenario()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with DomainDecompositionEngine(environment, clans, tiles=tiles, seed=5, processes=processes) as engine:
+            for _ in range(steps):
+                engine.step()
+            state = engine.get_simulation_state()
+    return state, environment
+
+
+class TestDomainDecomposition(unittest.TestCase):
+    def test_results_do_not_depend_on_tiling(self):
+        reference, reference_env = run((1, 1), processes=False)
+        tiled, tiled_env = run((3, 2), processes=True)
+        self.assertEqual(reference['clans'], tiled['clans'])
+        np.testing.assert_array_equal(reference_env.grid, tiled_env.grid)
+        self.assertAlmostEqual(reference['system_metrics']['total_resources'],
+                               tiled['system_metrics']['total_resources'], places=6)
+
+    def test_clans_migrate_between_tiles(self):
+        environment, _ = build_scenario()
+        # Recursos abundantes al otro lado del borde entre teselas (fila 20)
+        environment.grid = np.where(np.arange(40)[:, None] >= 20, 90.0, 10.0) * np.ones((40, 60))
+        clan = Clan(7, 20, np.array([19.3, 5.0]))
+        with contextlib.redirect_stdout(io.StringIO()):
+            with DomainDecompositionEngine(environment, [clan], tiles=(2, 1), seed=1, processes=False) as engine:
+                owners = [[len(batch['ids']) for batch in engine._broadcast('snapshot', [(), ()])]]
+                for _ in range(10):
+                    engine.step()
+                    owners.append([len(batch['ids']) for batch in engine._broadcast('snapshot', [(), ()])])
+                state = engine.get_simulation_state()
+        self.assertEqual(owners[0], [1, 0])
+        self.assertIn([0, 1], owners[1:])
+        self.assertEqual([c['id'] for c in state['clans']], [7])
+
+    def test_close_releases_shared_grid(self):
+        state, environment = run((2, 2), processes=True, steps=2)
+        self.assertEqual(len(state['resource_grid']), 40)
+        environment.grid[0, 0] = 1.0
+        self.assertEqual(environment.grid[0, 0], 1.0)
+
+    def test_unclosed_engine_is_released_on_collection(self):
+        environment, clans = build_scenario()
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = DomainDecompositionEngine(environment, clans, tiles=(2, 1), seed=5)
+            engine.step()
+        processes, name = list(engine._processes), engine._shm.name
+        del engine
+        gc.collect()
+        self.assertFalse(any(process.is_alive() for process in processes))
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+    def test_factory_exposes_reduced_model(self):
+        environment, clans = build_scenario()
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            engine = create_engine(environment, clans, DeterministicMode(seed=1), seed=5,
+                                   backend='decomposed', tiles=(1, 2))
+        with engine:
+            self.assertIn('modelo reducido', output.getvalue())
+            engine.run_step()
+            state = engine.get_simulation_state()
+            self.assertEqual(state['model'], 'forage')
+            self.assertEqual([clan.id for clan in engine.clans], [clan['id'] for clan in state['clans']])
+            self.assertTrue(all(clan.size > 0 and clan.state == 'foraging' for clan in engine.clans))
+        with self.assertRaises(ValueError):
+            create_engine(environment, clans, DeterministicMode(seed=1), backend='decomposed',
+                          demographic_integrator='exact')
+
+    def test_invalid_tiling_is_rejected(self):
+        environment, clans = build_scenario()
+        with self.assertRaises(ValueError):
+            DomainDecompositionEngine(environment, clans, tiles=(0, 2), processes=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
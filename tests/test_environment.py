@@ -0,0 +1,276 @@
+# clan_territorial_simulation/tests/test_environment.py
+import unittest
+import numpy as np
+from models.environment import Environment
+from models.hotspots import HotspotIndex
+from simulation.random_generators import MersenneTwister
+
+
+def legacy_add_patch(environment, center_position, radius, amount):
+    """Recorrido celda a celda anterior a los estampados vectorizados."""
+    center = environment.get_toroidal_position(np.array(center_position)).astype(int)
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            distance = np.sqrt(dx*dx + dy*dy)
+            if distance <= radius:
+                intensity = np.exp(-(distance**2) / (2 * (radius/3)**2))
+                pos = environment.get_toroidal_position(center + np.array([dx, dy])).astype(int)
+                environment.grid[pos[0], pos[1]] = min(environment.max_resource, environment.grid[pos[0], pos[1]] + amount * intensity)
+
+
+def legacy_deplete(environment, center_position, radius, depletion_factor):
+    center = environment.get_toroidal_position(np.array(center_position)).astype(int)
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            distance = np.sqrt(dx*dx + dy*dy)
+            if distance <= radius:
+                intensity = 1.0 - (distance / radius) * 0.5
+                pos = environment.get_toroidal_position(center + np.array([dx, dy])).astype(int)
+                current = environment.grid[pos[0], pos[1]]
+                environment.grid[pos[0], pos[1]] = max(0, current - current * depletion_factor * intensity)
+
+
+def build_pair(grid_size=(12, 9), seed=0):
+    grid = np.random.RandomState(seed).uniform(0, 100, grid_size)
+    environments = []
+    for _ in range(2):
+        environment = Environment(grid_size=grid_size)
+        environment.grid = grid.copy()
+        environments.append(environment)
+    return environments
+
+
+class TestLandscapeStamps(unittest.TestCase):
+    def test_patch_matches_cell_loop_including_wraparound(self):
+        for center, radius, amount in [([3, 4], 2, 30.0), ([11.7, -1.2], 4, 80.0), ([6, 6], 7, 55.0)]:
+            vectorized, legacy = build_pair()
+            vectorized.add_resource_patch(center, radius, amount)
+            legacy_add_patch(legacy, center, radius, amount)
+            np.testing.assert_array_equal(vectorized.grid, legacy.grid)
+
+    def test_batched_patches_match_sequential_calls(self):
+        vectorized, legacy = build_pair(grid_size=(30, 30))
+        centers = [[2, 2], [5, 3], [28, 29]]
+        amounts = [40.0, 90.0, 10.0]
+        vectorized.add_resource_patches(centers, 5, amounts)
+        for center, amount in zip(centers, amounts):
+            legacy_add_patch(legacy, center, 5, amount)
+        np.testing.assert_allclose(vectorized.grid, legacy.grid, rtol=0, atol=1e-12)
+
+    def test_batched_negative_patches_clamp_per_call(self):
+        # Un parche negativo tras uno que satura: el recorte debe ocurrir entre ambos
+        vectorized, legacy = build_pair()
+        centers = [[3, 4], [4, 4], [11.7, -1.2]]
+        amounts = [300.0, -120.0, 60.0]
+        vectorized.add_resource_patches(centers, 6, amounts)
+        for center, amount in zip(centers, amounts):
+            legacy_add_patch(legacy, center, 6, amount)
+        np.testing.assert_allclose(vectorized.grid, legacy.grid, rtol=0, atol=1e-12)
+
+    def test_depletion_matches_cell_loop_including_wraparound(self):
+        for center, radius in [([3, 4], 3), ([0, 8], 6)]:
+            vectorized, legacy = build_pair()
+            vectorized.deplete_area(center, radius, 0.4)
+            legacy_deplete(legacy, center, radius, 0.4)
+            np.testing.assert_array_equal(vectorized.grid, legacy.grid)
+
+    def test_patches_landscape_is_reproducible(self):
+        environment = Environment(grid_size=(40, 40))
+        environment.set_rng(MersenneTwister(3))
+        environment.reset_resources('patches', num_patches=6, patch_radius=4)
+
+        legacy = Environment(grid_size=(40, 40))
+        legacy.grid.fill(legacy.max_resource * 0.1)
+        rng = MersenneTwister(3)
+        for _ in range(6):
+            center = [rng.random_randint(0, 40), rng.random_randint(0, 40)]
+            legacy_add_patch(legacy, center, 4, legacy.max_resource * 0.9)
+        np.testing.assert_allclose(environment.grid, legacy.grid, rtol=0, atol=1e-12)
+
+
+def brute_force_top(grid, k):
+    flat = grid.ravel()
+    order = np.lexsort((np.arange(flat.size), -flat))[:k]
+    return order, flat[order]
+
+
+class TestHotspots(unittest.TestCase):
+    def setUp(self):
+        self.environment = Environment(grid_size=(30, 20))
+        self.environment.set_rng(MersenneTwister(5))
+        self.environment.grid = MersenneTwister(6).random_uniform(0, 100, (30, 20))
+
+    def test_percentile_hotspots_match_cell_loop(self):
+        grid = self.environment.grid
+        threshold = np.percentile(grid, 80)
+        expected = sorted(
+            [{'position': [i, j], 'resource_level': grid[i, j]} for i in range(30) for j in range(20) if grid[i, j] >= threshold],
+            key=lambda x: x['resource_level'], reverse=True
+        )
+        hotspots = self.environment.find_resource_hotspots(80)
+        self.assertEqual([h['position'] for h in hotspots], [e['position'] for e in expected])
+        self.assertEqual([h['resource_level'] for h in hotspots], [e['resource_level'] for e in expected])
+
+    def test_top_k_tracks_consumption_and_regeneration(self):
+        rng = np.random.RandomState(0)
+        for step in range(20):
+            for _ in range(5):
+                cell, _ = brute_force_top(self.environment.grid, 1)
+                target = np.divmod(cell[0], 20) if rng.rand() < 0.5 else rng.randint(0, 20, 2)
+                self.environment.consume(target, rng.uniform(0, 60))
+            if step % 4 == 0:
+                self.environment.regenerate(0.2)
+            hotspots = self.environment.get_top_hotspots(8)
+            cells, levels = brute_force_top(self.environment.grid, 8)
+            self.assertEqual([h['resource_level'] for h in hotspots], levels.tolist())
+            self.assertEqual([h['position'] for h in hotspots], [list(divmod(int(c), 20)) for c in cells])
+
+    def test_point_updates_avoid_rebuilds(self):
+        index = HotspotIndex(k=5, reserve=20)
+        grid = self.environment.grid.copy()
+        index.top(grid)
+        cells, _ = index.top(grid)
+        grid.ravel()[cells[0]] -= 1.0
+        index.update_cell(int(cells[0]), grid.ravel()[cells[0]])
+        index.top(grid)
+        self.assertEqual(index.get_stats()['rebuilds'], 1)
+
+    def test_regeneration_bound_avoids_grid_scans(self):
+        for precision, rate, dt in [('float64', 0.3, 0.2), ('float32', 3.0, 0.5), ('uint16', 1.5, 0.2)]:
+            environment = Environment(grid_size=(60, 40), regeneration_rate=rate, precision=precision)
+            environment.set_rng(MersenneTwister(5))
+            environment.grid = MersenneTwister(6).random_uniform(0, 60, (60, 40))
+            environment.get_top_hotspots(8)
+            for _ in range(30):
+                environment.regenerate(dt)
+                index = environment._hotspot_index
+                outside = np.where(index._member, -np.inf, environment.grid.ravel()).max()
+                self.assertGreaterEqual(index.outside_bound, outside)
+                _, levels = brute_force_top(environment.grid, 8)
+                self.assertEqual([h['resource_level'] for h in environment.get_top_hotspots(8)], levels.tolist())
+            if precision == 'float64':
+                self.assertLess(index.get_stats()['scans'], 15)
+
+    def test_engine_state_reports_top_hotspots(self):
+        from models.clan import Clan
+        from simulation.engine import SimulationEngine, STATE_HOTSPOTS
+        from simulation.modes import DeterministicMode
+        engine = SimulationEngine(self.environment, [Clan(1, 20, np.array([4.0, 4.0]))], DeterministicMode(seed=1))
+        for _ in range(3):
+            engine.step()
+            cells, levels = brute_force_top(self.environment.grid, STATE_HOTSPOTS)
+            hotspots = engine.get_simulation_state()['resource_hotspots']
+            self.assertEqual([h['resource_level'] for h in hotspots], levels.tolist())
+        self.assertEqual(self.environment._hotspot_index.get_stats()['queries'], 3)
+
+class TestDerivedFields(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(grid_size=(16, 12))
+        self.env.grid = np.random.default_rng(3).uniform(0, 100, (16, 12))
+
+    def test_fields_match_direct_computation(self):
+        grid = self.env.grid.copy()
+        self.env.derived.pin()
+        for position in [(0, 0), (15, 11), (7, 4)]:
+            legacy = [(grid[(position[0] + 1) % 16, position[1]] - grid[(position[0] - 1) % 16, position[1]]) / 2.0,
+                      (grid[position[0], (position[1] + 1) % 12] - grid[position[0], (position[1] - 1) % 12]) / 2.0]
+            np.testing.assert_array_equal(self.env.get_gradient(position), legacy)
+        self.assertAlmostEqual(self.env.get_local_resource_density((0, 0), 3),
+                               self.env.region_table().disk_mean(np.array([0, 0]), 3))
+        self.env.derived.unpin()
+        self.assertEqual(self.env.get_total_resources(), np.sum(grid))
+
+    def test_version_invalidates_unless_pinned(self):
+        cache = self.env.derived
+        cache.get('aggregates')
+        cache.get('aggregates')
+        self.assertEqual(cache.get_stats()['fields']['aggregates'], {'hits': 1, 'misses': 1})
+
+        version = self.env.version
+        self.env.consume((1, 1), 10)
+        self.assertGreater(self.env.version, version)
+        self.assertAlmostEqual(self.env.get_total_resources(), np.sum(self.env.grid))
+
+        # Fijada, el campo calculado al inicio del paso se comparte pese al consumo
+        cache.pin()
+        density = self.env.get_local_resource_density((5, 5), 2)
+        self.env.consume((5, 5), 50)
+        self.assertEqual(self.env.get_local_resource_density((5, 5), 2), density)
+        self.assertEqual(cache.get_stats()['fields']['density'], {'hits': 1, 'misses': 1})
+        cache.unpin()
+        self.assertLess(self.env.get_local_resource_density((5, 5), 2), density)
+
+    def test_engine_shares_fields_within_step(self):
+        from models.clan import Clan
+        from simulation.engine import SimulationEngine
+        from simulation.modes import HybridMode
+        clans = [Clan(i, 10 + i, np.array([2.0 * i, 3.0])) for i in range(4)]
+        engine = SimulationEngine(self.env, clans, HybridMode(seed=1), dt=0.2, seed=1)
+        self.env.derived.full_field_fraction = 1 / 16
+        engine.step()
+        stats = self.env.derived.get_stats()
+        self.assertFalse(stats['pinned'])
+        # Pocas consultas: una evaluación por celda, sin construir el campo completo
+        self.assertEqual(stats['fields']['density'], {'hits': 0, 'misses': len(clans)})
+        self.assertFalse(any(key[0] == 'density' for key in self.env.derived._entries))
+
+    def test_point_queries_switch_to_full_field(self):
+        cache = self.env.derived
+        cache.full_field_fraction = 1 / 16
+        table = self.env.region_table()
+        cache.pin()
+        first = self.env.get_local_resource_densities(np.array([[1, 1], [4, 7]]), 2)
+        np.testing.assert_allclose(first, table.disk_mean(np.array([[1, 1], [4, 7]]), 2))
+        self.env.get_local_resource_densities(np.array([[4, 7]]), 2)
+        self.assertEqual(cache.get_stats()['fields']['density'], {'hits': 1, 'misses': 1})
+        self.assertEqual(cache.get_stats()['point_entries'], 2)
+
+        # Con muchas celdas consultadas se calcula el campo entero una sola vez
+        rows, cols = np.indices((16, 12))
+        cells = np.stack([rows.ravel(), cols.ravel()], axis=-1)
+        densities = self.env.get_local_resource_densities(cells, 2)
+        np.testing.assert_allclose(densities, table.disk_mean(cells, 2))
+        self.assertTrue(any(key[0] == 'density' for key in cache._entries))
+        cache.unpin()
+        self.assertEqual(cache.get_stats()['point_entries'], 0)
+
+
+def legacy_regenerate(environment, noise, dt):
+    """Pasadas de arrays completos anteriores a los kernels por teselas."""
+    growth = environment.regeneration_rate * environment.grid * (1 - environment.grid / environment.max_resource) * dt
+    environment.grid = np.minimum(environment.grid + growth, environment.max_resource)
+    environment.grid = np.maximum(0, environment.grid + (noise * dt).astype(environment.grid.dtype, copy=False))
+
+
+class TestTiledRegeneration(unittest.TestCase):
+    def test_matches_full_array_passes_bit_for_bit(self):
+        for precision in ('float64', 'float32', 'uint16'):
+            for threads in (1, 4):
+                reference = Environment(grid_size=(300, 257), precision=precision)
+                reference.grid = MersenneTwister(3).random_uniform(0, 100, (300, 257))
+                tiled = Environment(grid_size=(300, 257), precision=precision, grid_threads=threads)
+                tiled.grid = reference.grid.copy()
+                # Teselas pequeñas y umbral bajo para forzar muchas teselas repartidas en hilos
+                tiled.grid_kernels.tile_bytes = 8 * 1024
+                tiled.grid_kernels.min_parallel_cells = 0
+                tiled.set_rng(MersenneTwister(11))
+
+                for _ in range(3):
+                    legacy_regenerate(reference, MersenneTwister(11).random_normal(0, 0.05, size=(300, 257)), 0.2)
+                    tiled.set_rng(MersenneTwister(11))
+                    tiled.regenerate(0.2)
+                    np.testing.assert_array_equal(tiled.grid, reference.grid)
+                tiled.grid_kernels.close()
+
+    def test_regeneration_invalidates_derived_fields(self):
+        environment = Environment(grid_size=(20, 20))
+        environment.grid = np.full((20, 20), 10.0)
+        version = environment.version
+        total = environment.get_total_resources()
+        environment.regenerate(0.5)
+        self.assertGreater(environment.version, version)
+        self.assertGreater(environment.get_total_resources(), total)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 # clan_territorial_simulation/tests/test_equations.py
 import unittest
+import contextlib
+import io
 from models.equations import population_dynamics, resource_evolution, starvation_mortality, cooperative_consumption, clan_movement
+from models import equations
 import numpy as np
 
 class TestEquationFunctions(unittest.TestCase):
@@ -32,5 +35,87 @@ class TestEquationFunctions(unittest.TestCase):
         expected_dpos_dt = velocity * gradient + sigma * epsilon
         np.testing.assert_array_equal(dpos_dt, expected_dpos_dt)
 
+
+class TestArrayEquations(unittest.TestCase):
+    def test_functions_evaluate_whole_populations(self):
+        sizes = np.array([0.0, 5.0, 40.0])
+        birth = np.array([0.1, 0.2, 0.05])
+        np.testing.assert_array_equal(population_dynamics(sizes, birth, 0.05),
+                                      [population_dynamics(n, b, 0.05) for n, b in zip(sizes, birth)])
+        resources = np.array([0.2, 1.0, 4.0])
+        mortality = starvation_mortality(resources)
+        self.assertEqual(mortality.shape, (3,))
+        self.assertTrue(np.all(np.diff(mortality) < 0))
+        np.testing.assert_allclose(cooperative_consumption(1, sizes[1:], 0.8, 0.5, 0.1), 0.05 * sizes[1:] ** 0.2)
+
+    def test_demographic_rates_match_legacy_step_for_small_dt(self):
+        from simulation import kernels
+        energy = np.array([-1.0, 10.0, 28.0, 60.0, 100.0])
+        sizes = np.full(5, 1000.0)
+        birth, death, dt = np.full(5, 0.1), np.full(5, 0.05), 1e-3
+        rates = equations.demographic_rates(energy, birth, death)
+        legacy_sizes, legacy_energy = sizes.copy(), energy.copy()
+        # Sin ganancia de energía: demanda nula con ganancia ociosa despreciable frente a dt
+        kernels.apply_consumption_outcome(legacy_sizes, legacy_energy, np.zeros(5), np.zeros(5), birth, death, dt)
+        np.testing.assert_allclose(equations.integrate_population(sizes, rates, dt, 'euler'), sizes * (1 + rates * dt))
+        np.testing.assert_allclose(legacy_sizes, np.round(sizes * (1 + rates * dt)), atol=1)
+
+
+class TestIntegrators(unittest.TestCase):
+    def test_rk4_is_fourth_order_and_exact_is_exact(self):
+        sizes, rates = np.array([10.0, 50.0]), np.array([0.3, -0.4])
+        exact = sizes * np.exp(rates * 1.0)
+        errors = {}
+        for method in ('euler', 'rk4'):
+            errors[method] = []
+            for steps in (4, 8):
+                state = sizes
+                for _ in range(steps):
+                    state = equations.integrate_population(state, rates, 1.0 / steps, method)
+                errors[method].append(np.max(np.abs(state - exact)))
+        self.assertAlmostEqual(errors['euler'][0] / errors['euler'][1], 2, delta=0.3)
+        self.assertAlmostEqual(errors['rk4'][0] / errors['rk4'][1], 16, delta=2)
+        np.testing.assert_allclose(equations.integrate_population(sizes, rates, 1.0, 'exact'), exact)
+
+    def test_exact_integration_is_stable_for_large_dt(self):
+        sizes, rates = np.array([100.0]), np.array([-3.0])
+        self.assertEqual(equations.integrate_population(sizes, rates, 1.0, 'euler')[0], 0.0)
+        self.assertAlmostEqual(equations.integrate_population(sizes, rates, 1.0, 'exact')[0], 100 * np.exp(-3))
+        with self.assertRaises(ValueError):
+            equations.integrate_population(sizes, rates, 1.0, 'midpoint')
+
+    def test_logistic_step_matches_rk4(self):
+        state = np.array([5.0, 60.0, 99.0])
+        derivative = lambda r: 1.5 * r * (1 - r / 100.0)
+        numeric = state
+        for _ in range(100):
+            numeric = equations.rk4_step(derivative, numeric, 0.01)
+        np.testing.assert_allclose(equations.logistic_step(state, 1.5, 100.0, 1.0), numeric, rtol=1e-8)
+
+    def test_vectorized_engine_uses_batch_integrator(self):
+        from models.clan import Clan
+        from models.environment import Environment
+        from simulation.engine import create_engine
+        from simulation.modes import DeterministicMode
+        from simulation.random_generators import MersenneTwister
+
+        populations = {}
+        for method in ('rk4', 'exact'):
+            environment = Environment(grid_size=(30, 30))
+            environment.set_rng(MersenneTwister(2))
+            environment.grid = MersenneTwister(3).random_uniform(40, 90, (30, 30))
+            clans = [Clan(i, 6 + i, [4.0 + 7 * i, 5.0 + 6 * i]) for i in range(3)]
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine = create_engine(environment, clans, DeterministicMode(seed=1), dt=0.5,
+                                       backend='vectorized', demographic_integrator=method)
+                for _ in range(6):
+                    engine.step()
+            populations[method] = engine.store.sizes.copy()
+        self.assertFalse(np.all(populations['exact'] == np.round(populations['exact'])))
+        np.testing.assert_allclose(populations['rk4'], populations['exact'], rtol=1e-3)
+        with self.assertRaises(ValueError):
+            create_engine(environment, clans, DeterministicMode(seed=1), demographic_integrator='exact')
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,183 @@
+# clan_territorial_simulation/tests/test_kernels.py
+import contextlib
+import io
+import os
+import unittest
+import numpy as np
+from models.clan import Clan, plan_migrations
+from models.environment import Environment
+from simulation.engine import SimulationEngine
+from simulation.vectorized_engine import VectorizedSimulationEngine
+from simulation.modes import DeterministicMode
+from simulation.random_generators import MersenneTwister
+from simulation import kernels
+
+HAS_NUMBA = kernels.numba_available()
+# En CI (trabajo numba-kernels) la equivalencia con numba no se puede omitir
+REQUIRE_NUMBA = os.environ.get('REQUIRE_NUMBA') == '1'
+
+
+class ReferenceCombatEngine(VectorizedSimulationEngine):
+    """Motor vectorizado con el combate escalar original, par a par."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_combat = False
+
+
+class ScalarCombatEngine(SimulationEngine):
+    """Motor por objetos con el combate escalar original, par a par."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_combat = False
+
+
+def build_battle(seed=4):
+    environment = Environment(grid_size=(30, 30))
+    environment.set_rng(MersenneTwister(seed))
+    environment.grid = MersenneTwister(seed + 1).random_uniform(30, 80, (30, 30))
+    clans = [Clan(i, 30 + 5 * i, [10.0 + 0.8 * i, 10.0 + 0.5 * (i % 2)]) for i in range(1, 6)]
+    for clan in clans:
+        clan.strategy = 'aggressive'
+    return environment, clans
+
+
+def run_battle(engine_class, kernel_backend='numpy', steps=8):
+    environment, clans = build_battle()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = engine_class(environment, clans, DeterministicMode(seed=2), dt=0.2, kernel_backend=kernel_backend)
+        for _ in range(steps):
+            engine.step()
+    return [(clan['id'], clan['size'], clan['energy'], tuple(clan['position']))
+            for clan in engine.get_simulation_state()['clans']], engine
+
+
+def random_pairs(rng, num_clans, num_pairs):
+    first = rng.integers(0, num_clans, num_pairs)
+    second = (first + rng.integers(1, num_clans, num_pairs)) % num_clans
+    return first, second
+
+
+class TestNumpyKernels(unittest.TestCase):
+    def test_combat_pairs_match_sequential_interactions(self):
+        rng = np.random.default_rng(0)
+        sizes = rng.uniform(5, 50, 6)
+        energy = rng.uniform(0, 100, 6)
+        aggressiveness = rng.uniform(0, 1, 6)
+        first, second = random_pairs(rng, 6, 20)
+        noise = rng.normal(0, 0.1, (20, 2))
+
+        clans = [Clan(i, 1, [0.0, 0.0]) for i in range(6)]
+        for clan, size, clan_energy, aggression in zip(clans, sizes, energy, aggressiveness):
+            clan.size, clan.energy, clan.parameters['aggressiveness'] = size, clan_energy, aggression
+
+        class ReplayRNG:
+            def __init__(self, values):
+                self.values = iter(values)
+
+            def random_normal(self, mean, std_dev):
+                return next(self.values)
+
+        replay = ReplayRNG(noise.ravel())
+        for a, b in zip(first, second):
+            SimulationEngine._combat_interaction(None, clans[a], clans[b], 0.2, replay)
+
+        fought = kernels.combat_pairs(sizes, energy, aggressiveness, first, second, noise, 0.2)
+        self.assertTrue(fought.all())
+        np.testing.assert_array_equal(sizes, [clan.size for clan in clans])
+        np.testing.assert_array_equal(energy, [clan.energy for clan in clans])
+
+    def test_migration_choice_matches_clan_scoring(self):
+        environment = Environment(grid_size=(30, 30))
+        environment.grid = np.random.default_rng(1).uniform(0, 100, (30, 30))
+        directions = []
+        for backend in (None, kernels):
+            clan = Clan(1, 10, [12.0, 7.0])
+            clan.set_rng(MersenneTwister(8))
+            clan.resource_memory.update(np.array([[15, 7], [12, 10]]), np.array([50.0, 3.0]))
+            clan.set_kernels(backend)
+            directions.append([clan._find_migration_direction(environment) for _ in range(10)])
+        np.testing.assert_array_equal(directions[0], directions[1])
+
+    def test_planned_migrations_match_per_clan_choice(self):
+        environment = Environment(grid_size=(30, 30))
+        environment.grid = np.random.default_rng(2).uniform(0, 100, (30, 30))
+
+        def make_clans():
+            clans = [Clan(i, 10, [3.0 * i, 2.0 * i], parameters={'perception_radius': 4 + i % 2}) for i in range(6)]
+            for clan in clans:
+                clan.set_rng(MersenneTwister(clan.id))
+                clan.resource_memory.update(np.array([[3 * clan.id + 5, 2 * clan.id]]), np.array([50.0]))
+            return clans
+
+        expected = [clan._find_migration_direction(environment) for clan in make_clans()]
+        clans = make_clans()
+        plan_migrations(clans, environment, kernels)
+        np.testing.assert_array_equal([clan._find_migration_direction(environment) for clan in clans], expected)
+        self.assertTrue(all(clan.planned_migration is None for clan in clans))
+
+    def test_vectorized_engine_combat_matches_scalar_combat(self):
+        reference, _ = run_battle(ReferenceCombatEngine)
+        accelerated, engine = run_battle(VectorizedSimulationEngine)
+        self.assertEqual(engine.kernels.BACKEND_NAME, 'numba' if HAS_NUMBA else 'numpy')
+        self.assertEqual(reference, accelerated)
+        self.assertLess(sum(size for _, size, _, _ in accelerated), 30 + 35 + 40 + 45 + 50)
+
+    def test_object_engine_batches_combat_per_step(self):
+        reference, _ = run_battle(ScalarCombatEngine)
+        batched, engine = run_battle(SimulationEngine)
+        self.assertEqual(reference, batched)
+        self.assertGreater(engine.combat_stats['pairs'], engine.combat_stats['kernel_calls'])
+        self.assertLessEqual(engine.combat_stats['kernel_calls'], 8)
+
+    def test_backend_selection_falls_back_to_numpy(self):
+        self.assertIs(kernels.select_backend('numpy'), kernels)
+        with self.assertRaises(ValueError):
+            kernels.select_backend('cuda')
+        if not HAS_NUMBA:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertIs(kernels.select_backend('numba'), kernels)
+
+
+@unittest.skipUnless(HAS_NUMBA or REQUIRE_NUMBA, "numba no está instalado")
+class TestNumbaKernels(unittest.TestCase):
+    def setUp(self):
+        from simulation import jit_kernels
+        self.jit = jit_kernels
+        self.rng = np.random.default_rng(5)
+
+    def test_consumption_outcome_matches_numpy(self):
+        n = 500
+        sizes = self.rng.integers(0, 80, n).astype(float)
+        energy = self.rng.uniform(-5, 100, n)
+        demand = self.rng.uniform(0, 10, n) * (self.rng.random(n) > 0.1)
+        consumed = demand * self.rng.random(n)
+        birth, death = self.rng.uniform(0, 0.2, n), self.rng.uniform(0, 0.1, n)
+        expected = kernels.apply_consumption_outcome(sizes.copy(), energy.copy(), consumed, demand, birth, death, 0.2)
+        result = self.jit.apply_consumption_outcome(sizes.copy(), energy.copy(), consumed, demand, birth, death, 0.2)
+        np.testing.assert_allclose(result[0], expected[0], rtol=0, atol=0)
+        np.testing.assert_allclose(result[1], expected[1], rtol=1e-15)
+
+    def test_migration_and_combat_match_numpy(self):
+        area = self.rng.uniform(0, 100, (50, 10))
+        memory = self.rng.uniform(0, 20, (50, 10))
+        bonus = self.rng.uniform(0, 20, 50)
+        np.testing.assert_array_equal(self.jit.migration_choice(area, memory, bonus),
+                                      kernels.migration_choice(area, memory, bonus))
+
+        sizes, energy = self.rng.uniform(1, 50, 30), self.rng.uniform(0, 100, 30)
+        aggressiveness = self.rng.uniform(0, 1, 30)
+        first, second = random_pairs(self.rng, 30, 200)
+        noise = self.rng.normal(0, 0.1, (200, 2))
+        expected_sizes, expected_energy = sizes.copy(), energy.copy()
+        kernels.combat_pairs(expected_sizes, expected_energy, aggressiveness, first, second, noise, 0.2)
+        self.jit.combat_pairs(sizes, energy, aggressiveness, first, second, noise, 0.2)
+        np.testing.assert_allclose(sizes, expected_sizes, rtol=1e-12)
+        np.testing.assert_allclose(energy, expected_energy, rtol=1e-12)
+
+    def test_engine_trajectories_match(self):
+        self.assertEqual(run_battle(VectorizedSimulationEngine, 'numpy')[0],
+                         run_battle(VectorizedSimulationEngine, 'numba')[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
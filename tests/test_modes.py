@@ -0,0 +1,65 @@
+# clan_territorial_simulation/tests/test_modes.py
+import unittest
+import numpy as np
+from models.environment import Environment
+from models.clan import Clan
+from simulation.modes import DeterministicMode
+
+
+class TestMigrationCache(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(grid_size=(30, 30))
+        self.env.grid = np.random.default_rng(5).uniform(10, 40, (30, 30))
+        self.mode = DeterministicMode(seed=1)
+        self.clan = Clan(1, 20, np.array([10.0, 10.0]))
+        self.clan.set_rng(self.mode.rng)
+
+    def test_repeated_query_hits_cache(self):
+        first = self.mode._cached_migration_direction(self.clan, self.env)
+        second = self.mode._cached_migration_direction(self.clan, self.env)
+        np.testing.assert_array_equal(first, second)
+        stats = self.mode.get_optimization_stats()
+        self.assertEqual((stats['cache_hits'], stats['cache_misses']), (1, 1))
+        self.assertEqual(stats['cache_hit_rate'], 0.5)
+        self.assertGreater(stats['cache_memory_bytes'], 0)
+
+    def test_region_change_invalidates_entry(self):
+        self.mode._cached_migration_direction(self.clan, self.env)
+        self.env.deplete_area((12, 12), 6, depletion_factor=0.9)
+        self.mode._cached_migration_direction(self.clan, self.env)
+        stats = self.mode.get_optimization_stats()
+        self.assertEqual(stats['cache_invalidations'], 1)
+        self.assertEqual(stats['cache_misses'], 2)
+
+        # Un cambio fuera de la región consultada no invalida
+        self.env.deplete_area((25, 25), 1, depletion_factor=0.9)
+        self.mode._cached_migration_direction(self.clan, self.env)
+        self.assertEqual(self.mode.get_optimization_stats()['cache_hits'], 1)
+
+    def test_local_change_to_one_candidate_invalidates(self):
+        self.mode._cached_migration_direction(self.clan, self.env)
+        # Parche 3x3 sobre el anillo de candidatos: <2% de la media de toda la caja, ~30% de un área 5x5
+        self.env.grid[16:19, 9:12] += 20
+        self.env.mark_grid_modified()
+        self.mode._cached_migration_direction(self.clan, self.env)
+        self.assertEqual(self.mode.get_optimization_stats()['cache_invalidations'], 1)
+
+        # Marcar como explorado un punto del anillo también cambia la decisión
+        self.mode._cached_migration_direction(self.clan, self.env)
+        self.clan.resource_memory.update([[17, 10]], [50.0])
+        self.mode._cached_migration_direction(self.clan, self.env)
+        self.assertEqual(self.mode.get_optimization_stats()['cache_invalidations'], 2)
+
+    def test_lru_eviction_respects_limit(self):
+        self.mode.update_cache_limit(3)
+        for x in range(5):
+            self.clan.position = np.array([float(x), 0.0])
+            self.mode._cached_migration_direction(self.clan, self.env)
+        stats = self.mode.get_optimization_stats()
+        self.assertEqual(stats['cache_size'], 3)
+        self.assertEqual(stats['cache_evictions'], 2)
+        self.assertEqual(list(self.mode.optimal_step_cache), [(1, 2, 0), (1, 3, 0), (1, 4, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# clan_territorial_simulation/tests/test_precision.py
+import contextlib
+import io
+import unittest
+import numpy as np
+from models.clan import Clan
+from models.environment import Environment
+from models.precision import PrecisionPolicy, decode_resource_grid
+from simulation.engine import SimulationEngine
+from simulation.ensemble import EnsembleEngine
+from simulation.modes import DeterministicMode
+
+
+def build_environment(precision):
+    environment = Environment(grid_size=(24, 24), precision=precision)
+    environment.grid = np.random.default_rng(7).uniform(10, 90, (24, 24))
+    return environment
+
+
+class TestPrecisionPolicy(unittest.TestCase):
+    def test_unknown_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            PrecisionPolicy('float16')
+
+    def test_grid_and_derived_fields_follow_policy(self):
+        for name, dtype in [('float64', np.float64), ('float32', np.float32), ('uint16', np.float32)]:
+            environment = build_environment(name)
+            environment.regenerate(0.2)
+            self.assertEqual(environment.grid.dtype, dtype)
+            environment.derived.pin()
+            self.assertEqual(environment.derived.get('gradient').dtype, dtype)
+            self.assertEqual(environment.derived.get('density', radius=2).dtype, dtype)
+            environment.derived.unpin()
+            self.assertEqual(environment.get_resource_grid_info()['precision'], name)
+
+    def test_fixed_point_round_trip_and_consumption(self):
+        environment = build_environment('uint16')
+        stored = environment.export_grid()
+        self.assertEqual(stored.dtype, np.uint16)
+        restored = build_environment('uint16')
+        restored.import_grid(stored)
+        np.testing.assert_array_equal(restored.grid, environment.grid)
+
+        total = environment.get_total_resources()
+        consumed = environment.consume((3, 4), 5.0)
+        self.assertLessEqual(consumed, 5.0)
+        self.assertAlmostEqual(total - environment.get_total_resources(), consumed, places=3)
+
+    def test_engine_state_uses_storage_format(self):
+        for name in ('float64', 'uint16'):
+            environment = build_environment(name)
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine = SimulationEngine(environment, [Clan(1, 20, [5.0, 5.0])], DeterministicMode(seed=1))
+                engine.step()
+            state = engine.get_simulation_state()
+            self.assertEqual(state['precision'], name)
+            np.testing.assert_array_equal(state['resource_grid'], environment.export_grid())
+            np.testing.assert_array_equal(decode_resource_grid(state), environment.grid)
+        self.assertTrue(all(isinstance(value, int) for value in state['resource_grid'][0]))
+
+    def test_regenerate_quantizes_once(self):
+        environment = build_environment('uint16')
+        whole_grid_casts = []
+        cast = environment.precision.cast
+        def counting_cast(values, *args, **kwargs):
+            whole_grid_casts.append(values is environment.grid)
+            return cast(values, *args, **kwargs)
+        environment.precision.cast = counting_cast
+        environment.regenerate(0.2)
+        self.assertTrue(whole_grid_casts)
+        self.assertFalse(any(whole_grid_casts))
+        np.testing.assert_array_equal(cast(environment.grid, environment.max_resource), environment.grid)
+
+    def test_reduced_precision_trajectories_stay_close(self):
+        clans = [Clan(i, 20, np.array([3.0 * i, 5.0])) for i in range(5)]
+        totals = {}
+        for name in ('float64', 'float32', 'uint16'):
+            ensemble = EnsembleEngine(build_environment(name), clans, num_replicas=2, seed=3)
+            ensemble.run(10)
+            self.assertEqual(ensemble.grids.dtype, ensemble.precision.dtype)
+            totals[name] = np.array(ensemble.resource_history)
+        np.testing.assert_allclose(totals['float32'], totals['float64'], rtol=1e-5)
+        np.testing.assert_allclose(totals['uint16'], totals['float64'], rtol=1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
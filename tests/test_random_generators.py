@@ -0,0 +1,156 @@
+# clan_territorial_simulation/tests/test_random_generators.py
+import unittest
+import numpy as np
+from simulation.random_generators import (MersenneTwister, BufferedMersenneTwister, GeneratorRNG, RNGStreams,
+                                          LinearCongruentialGenerator, XORShiftGenerator, create_generator)
+
+
+def draw_mixed(rng, count=300):
+    """Secuencia de llamadas mezcladas como en los modos de simulación."""
+    values = []
+    for i in range(count):
+        values.append(rng.random_float())
+        values.extend(rng.random_normal(0, 0.1, size=2))
+        values.append(rng.random_uniform(0, 2 * np.pi))
+        if i % 50 == 0:
+            values.extend(rng.random_normal(0, 0.05, size=(3, 4)).ravel())
+    return np.array(values)
+
+
+class TestBufferedMersenneTwister(unittest.TestCase):
+    def test_reproducible_for_seed(self):
+        np.testing.assert_array_equal(draw_mixed(BufferedMersenneTwister(7, block_size=64)),
+                                      draw_mixed(BufferedMersenneTwister(7, block_size=64)))
+        self.assertFalse(np.array_equal(draw_mixed(BufferedMersenneTwister(7)), draw_mixed(BufferedMersenneTwister(8))))
+
+    def test_state_round_trip_is_exact(self):
+        rng = BufferedMersenneTwister(21, block_size=50)
+        draw_mixed(rng, 37)
+        state = rng.get_state()
+        expected = draw_mixed(rng, 120)
+        draw_mixed(rng, 5)
+        rng.set_state(state)
+        np.testing.assert_array_equal(draw_mixed(rng, 120), expected)
+
+    def test_distribution_matches_direct_draws(self):
+        rng = BufferedMersenneTwister(3, block_size=1000)
+        uniforms = np.array([rng.random_uniform(2, 5) for _ in range(20000)])
+        normals = np.concatenate([rng.random_normal(1.0, 0.5, size=2) for _ in range(10000)])
+        self.assertTrue(np.all((uniforms >= 2) & (uniforms < 5)))
+        self.assertAlmostEqual(uniforms.mean(), 3.5, places=1)
+        self.assertAlmostEqual(normals.mean(), 1.0, places=1)
+        self.assertAlmostEqual(normals.std(), 0.5, places=1)
+
+    def test_large_requests_fall_through(self):
+        rng = BufferedMersenneTwister(5, block_size=16)
+        self.assertEqual(rng.random_normal(0, 1, size=(10, 10)).shape, (10, 10))
+        self.assertEqual(rng.random_uniform(0, 1, size=100).shape, (100,))
+
+    def test_factory(self):
+        self.assertIsInstance(create_generator('buffered', 1), BufferedMersenneTwister)
+        self.assertIsInstance(create_generator('mersenne', 1), MersenneTwister)
+
+class TestArrayGenerators(unittest.TestCase):
+    def test_lcg_blocks_match_scalar_sequence(self):
+        scalar = LinearCongruentialGenerator(12345)
+        batched = LinearCongruentialGenerator(12345)
+        expected = [scalar.random_int() for _ in range(70000)]
+        values = np.concatenate([batched.random_ints(3), batched.random_ints(69997)])
+        np.testing.assert_array_equal(values, expected)
+        self.assertEqual(batched.current, scalar.current)
+
+    def test_lcg_varying_sizes_share_one_table(self):
+        scalar = LinearCongruentialGenerator(99)
+        batched = LinearCongruentialGenerator(99)
+        sizes = list(range(1, 60))
+        values = np.concatenate([batched.random_ints(size) for size in sizes])
+        np.testing.assert_array_equal(values, [scalar.random_int() for _ in range(sum(sizes))])
+        multipliers, increments = batched._jump_table
+        self.assertEqual((len(multipliers), len(increments)), (batched.JUMP_BLOCK, batched.JUMP_BLOCK))
+        self.assertTrue(np.shares_memory(batched._jump_coefficients(7)[0], multipliers))
+
+    def test_xorshift_state_stays_bounded_and_reproducible(self):
+        rng = create_generator('xorshift', 7)
+        self.assertIsInstance(rng, XORShiftGenerator)
+        values = np.concatenate([[rng.random_float()], rng.random_uniform(0, 1, size=20000)])
+        self.assertEqual(rng.state.dtype, np.uint64)
+        self.assertTrue(((values >= 0) & (values < 1)).all())
+        again = XORShiftGenerator(7)
+        np.testing.assert_array_equal(again.random_uniform(0, 1, size=20001), values)
+
+    def test_array_interface_shapes_and_moments(self):
+        for name in ('lcg', 'xorshift'):
+            rng = create_generator(name, 3)
+            self.assertEqual(rng.random_normal(0, 1, size=(4, 5)).shape, (4, 5))
+            ints = rng.random_randint(2, 6, size=1000)
+            self.assertTrue(((ints >= 2) & (ints < 6)).all())
+            normals = rng.random_normal(1.0, 0.5, size=50000)
+            self.assertAlmostEqual(normals.mean(), 1.0, delta=0.02)
+            self.assertAlmostEqual(normals.std(), 0.5, delta=0.02)
+            self.assertIsInstance(rng.random_normal(), float)
+
+
+class TestGeneratorStreams(unittest.TestCase):
+    def test_generator_keeps_legacy_interface(self):
+        rng = GeneratorRNG(11, bit_generator='philox')
+        state = rng.get_state()
+        expected = draw_mixed(rng, 50)
+        rng.set_state(state)
+        np.testing.assert_array_equal(draw_mixed(rng, 50), expected)
+        self.assertTrue(0 <= rng.random_randint(0, 5) < 5)
+        self.assertIsInstance(create_generator('pcg64', 1), GeneratorRNG)
+
+    def test_streams_do_not_depend_on_request_order(self):
+        forward = RNGStreams(42)
+        backward = RNGStreams(42)
+        first = [forward.stream('clan', clan_id).random_float() for clan_id in (1, 2, 3)]
+        second = [backward.stream('clan', clan_id).random_float() for clan_id in (3, 2, 1)]
+        self.assertEqual(first, second[::-1])
+        self.assertNotEqual(forward.stream('clan', 1).random_float(), forward.stream('interactions').random_float())
+        self.assertIs(forward.stream('clan', 2), forward.stream('clan', 2))
+
+    def test_clan_results_independent_of_update_order(self):
+        from models.clan import Clan
+        from models.environment import Environment
+        from simulation.modes import StochasticMode
+
+        def run(order):
+            environment = Environment(grid_size=(20, 20))
+            environment.grid = np.full((20, 20), 40.0)
+            mode = StochasticMode(seed=9)
+            clans = {clan_id: Clan(clan_id, 20, np.array([3.0 * clan_id, 4.0])) for clan_id in (1, 2, 3)}
+            for _ in range(5):
+                for clan_id in order:
+                    mode.apply_clan_behavior(clans[clan_id], environment, 0.2)
+            return {clan_id: clan.position.copy() for clan_id, clan in clans.items()}
+
+        forward, backward = run([1, 2, 3]), run([3, 2, 1])
+        for clan_id in forward:
+            np.testing.assert_array_equal(forward[clan_id], backward[clan_id])
+
+    def test_seeded_engine_runs_reproduce_environment(self):
+        import contextlib
+        import io
+        from models.clan import Clan
+        from models.environment import Environment
+        from simulation.engine import create_engine
+        from simulation.modes import StochasticMode
+
+        def run(global_seed, backend):
+            # El estado global de NumPy no debe influir en la rejilla
+            np.random.seed(global_seed)
+            environment = Environment(grid_size=(20, 20))
+            environment.grid = np.full((20, 20), 40.0)
+            clans = [Clan(clan_id, 20, np.array([3.0 * clan_id, 4.0])) for clan_id in (1, 2, 3)]
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine = create_engine(environment, clans, StochasticMode(seed=9), seed=9, backend=backend)
+                for _ in range(5):
+                    engine.step()
+            return environment.grid.copy()
+
+        for backend in ('object', 'vectorized'):
+            np.testing.assert_array_equal(run(1, backend), run(2, backend))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+# clan_territorial_simulation/tests/test_sensitivity.py
+import threading
+import unittest
+from analysis.sensitivity import run_parallel_monte_carlo, spawn_run_seeds, analyze_sensitivity_results
+
+
+class TestParallelMonteCarlo(unittest.TestCase):
+    def test_results_do_not_depend_on_worker_count(self):
+        serial = run_parallel_monte_carlo(num_runs=4, num_steps=10, seed=21, max_workers=1)
+        parallel = run_parallel_monte_carlo(num_runs=4, num_steps=10, seed=21, max_workers=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual([record['run'] for record in parallel], [0, 1, 2, 3])
+        self.assertEqual([record['seed'] for record in parallel], spawn_run_seeds(21, 4))
+
+    def test_records_are_compact_and_analyzable(self):
+        results = run_parallel_monte_carlo(num_runs=3, num_steps=5, seed=4, max_workers=1)
+        for record in results:
+            self.assertNotIn('resource_grid', record['final_state'])
+        analysis = analyze_sensitivity_results(results)
+        self.assertIn('correlations', analysis)
+
+    def test_progress_and_cancel(self):
+        cancel_event = threading.Event()
+        progress = []
+
+        def on_progress(completed, total):
+            progress.append((completed, total))
+            if completed == 2:
+                cancel_event.set()
+
+        results = run_parallel_monte_carlo(num_runs=5, num_steps=5, seed=8, max_workers=1,
+                                           progress_callback=on_progress, cancel_event=cancel_event)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(progress, [(1, 5), (2, 5)])
+
+if __name__ == '__main__':
+    unittest.main()
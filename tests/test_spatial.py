@@ -0,0 +1,180 @@
+# clan_territorial_simulation/tests/test_spatial.py
+import unittest
+import numpy as np
+from models.clan import Clan
+from models.environment import Environment
+from models.perception import disk_stencil, perceive_disk
+from models.spatial_index import SpatialIndex, brute_force_pairs
+from simulation.engine import SimulationEngine
+from simulation.modes import DeterministicMode
+from simulation.random_generators import MersenneTwister
+
+
+def legacy_perception(environment, position, radius):
+    """Recorrido celda a celda usado antes de los stencils."""
+    memory = {}
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            if np.sqrt(dx*dx + dy*dy) <= radius:
+                pos = environment.get_toroidal_position(position + np.array([dx, dy])).astype(int)
+                memory[tuple(pos)] = environment.get_resource(pos)
+    return memory
+
+
+def legacy_disk_mean(environment, position, radius):
+    """Media sobre el disco con el doble bucle anterior a la tabla de sumas."""
+    total, count = 0.0, 0
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            if dx*dx + dy*dy <= radius*radius:
+                total += environment.get_resource(np.asarray(position, dtype=int) + np.array([dx, dy]))
+                count += 1
+    return total / count
+
+
+class TestPerception(unittest.TestCase):
+    def setUp(self):
+        self.environment = Environment(grid_size=(20, 30))
+        self.environment.grid = np.random.RandomState(0).uniform(0, 100, (20, 30))
+
+    def test_disk_stencil_is_cached_and_ordered(self):
+        offsets, distances = disk_stencil(5)
+        self.assertIs(disk_stencil(5)[0], offsets)
+        self.assertEqual(len(offsets), 81)
+        self.assertTrue(np.all(distances <= 5))
+        self.assertEqual(tuple(offsets[0]), (-5, 0))
+
+    def test_perceive_disk_matches_legacy_loop(self):
+        for position in ([0.2, 0.7], [19.9, 29.5], [10.5, 3.25]):
+            position = np.array(position)
+            cells, levels = perceive_disk(self.environment.grid, position, 4)
+            expected = legacy_perception(self.environment, position, 4)
+            self.assertEqual(dict(zip(map(tuple, cells.tolist()), levels.tolist())), expected)
+
+    def test_resource_direction_points_to_richest_cell(self):
+        self.environment.grid.fill(10.0)
+        self.environment.grid[0, 28] = 90.0
+        clan = Clan(1, 10, [0.0, 1.0], parameters={'perception_radius': 3})
+        clan._perceive_environment(self.environment, [])
+        direction = clan._find_resource_direction(self.environment)
+        np.testing.assert_allclose(direction, [0.0, -1.0])
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(4)
+        self.grid_size = (60, 45)
+        self.positions = rng.uniform(0, 1, (300, 2)) * self.grid_size
+        self.index = SpatialIndex(self.grid_size, bin_size=5.0)
+        self.index.rebuild(range(len(self.positions)), self.positions)
+
+    def test_query_pairs_matches_brute_force(self):
+        for radius in (2.0, 5.0, 12.5):
+            first, second, distances = self.index.query_pairs(radius)
+            exp_first, exp_second, exp_distances = brute_force_pairs(self.positions, radius, self.grid_size)
+            np.testing.assert_array_equal(first, exp_first)
+            np.testing.assert_array_equal(second, exp_second)
+            np.testing.assert_allclose(distances, exp_distances)
+
+    def test_query_radius_wraps_around_torus(self):
+        index = SpatialIndex((20, 20), bin_size=5.0)
+        index.rebuild(['a', 'b', 'c'], [[0.5, 0.5], [19.5, 19.5], [10.0, 10.0]])
+        indices, distances = index.query_radius([0.0, 0.0], 2.0)
+        self.assertEqual(indices.tolist(), [0, 1])
+        np.testing.assert_allclose(distances, [np.sqrt(0.5), np.sqrt(0.5)])
+        self.assertEqual(index.get_stats()['queries'], 1)
+
+    def test_engine_paths_agree(self):
+        environment = Environment(grid_size=(30, 30))
+        clans = [Clan(i, 10, position) for i, position in enumerate(self.positions[:40] % 30)]
+        engine = SimulationEngine(environment, clans, DeterministicMode(seed=0))
+        engine.spatial_index_min_clans = 0
+        indexed = engine._find_interaction_pairs(5.0)
+        engine.use_spatial_index = False
+        brute = engine._find_interaction_pairs(5.0)
+        self.assertEqual([(i, j) for i, j, _ in indexed], [(i, j) for i, j, _ in brute])
+        np.testing.assert_allclose([d for _, _, d in indexed], [d for _, _, d in brute])
+        stats = engine.get_spatial_index_stats()
+        self.assertEqual(stats['index_steps'], 1)
+        self.assertEqual(stats['brute_force_steps'], 1)
+
+    def test_neighbor_queries_match_fallback_and_follow_moves(self):
+        environment = Environment(grid_size=(30, 30))
+        clans = [Clan(i, 10, position) for i, position in enumerate([[0.5, 0.5], [29.0, 29.5], [3.0, 0.5], [15.0, 15.0]])]
+        index = SpatialIndex((30, 30), bin_size=5.0)
+        index.rebuild(clans)
+
+        # Sin lista de clanes no hay vecinos (los modos llaman a update_behavior con [])
+        clans[0].set_neighbor_index(index)
+        self.assertEqual(clans[0]._nearby_clans([], 5.0), [])
+        clans[0]._decide_state(environment, [])
+        self.assertNotIn(clans[0].state, ('fighting', 'defending'))
+
+        # Índice y recorrido de la lista usan la misma distancia toroidal
+        indexed = clans[0]._nearby_clans(clans, 5.0)
+        clans[0].set_neighbor_index(None)
+        fallback = clans[0]._nearby_clans(clans, 5.0, environment)
+        self.assertEqual([c.id for c, _ in indexed], [1, 2])
+        self.assertEqual([c.id for c, _ in fallback], [1, 2])
+        np.testing.assert_allclose([d for _, d in indexed], [d for _, d in fallback])
+
+        # Un clan que se mueve tras reconstruir el índice se consulta en su posición actual
+        clans[3].set_neighbor_index(index)
+        clans[3]._move(np.array([-13.0, -13.0]), environment)
+        clans[0].set_neighbor_index(index)
+        self.assertEqual([c.id for c, _ in clans[0]._nearby_clans(clans, 5.0)], [1, 2, 3])
+        first, second, _ = index.query_pairs(5.0)
+        expected_first, expected_second, _ = brute_force_pairs([c.position for c in clans], 5.0, (30, 30))
+        np.testing.assert_array_equal(first, expected_first)
+        np.testing.assert_array_equal(second, expected_second)
+
+
+class TestRegionSumTable(unittest.TestCase):
+    def setUp(self):
+        self.environment = Environment(grid_size=(23, 17))
+        self.environment.grid = np.random.RandomState(0).uniform(0, 100, (23, 17))
+
+    def test_box_sums_wrap_and_exceed_grid(self):
+        table = self.environment.region_table()
+        tiled = np.tile(self.environment.grid, (4, 4))
+        for row, col, height, width in [(0, 0, 23, 17), (-5, 14, 7, 6), (20, -3, 30, 40), (3, 3, 1, 1)]:
+            expected = tiled[row + 23:row + 23 + height, col + 17:col + 17 + width].sum()
+            self.assertAlmostEqual(table.box_sum(row, col, height, width), expected, places=8)
+
+    def test_disk_means_match_loop_in_batch(self):
+        positions = np.random.RandomState(1).uniform(-20, 40, (30, 2)).astype(int)
+        for radius in (0, 2, 5, 12):
+            batched = self.environment.get_local_resource_densities(positions, radius)
+            expected = [legacy_disk_mean(self.environment, p, radius) for p in np.mod(positions, (23, 17))]
+            np.testing.assert_allclose(batched, expected)
+
+    def test_point_changes_are_tracked_without_rebuild(self):
+        table = self.environment.region_table()
+        self.environment.consume([4, 4], 30)
+        self.environment.consume([22, 0], 500)
+        self.assertIs(self.environment.region_table(), table)
+        for position in ([4, 4], [0, 0], [10, 10]):
+            self.assertAlmostEqual(self.environment.get_local_resource_density(position, 3),
+                                   legacy_disk_mean(self.environment, position, 3), places=8)
+        self.environment.grid = self.environment.grid * 0.5
+        self.assertIsNot(self.environment.region_table(), table)
+
+    def test_migration_direction_matches_box_loop(self):
+        clan = Clan(1, 10, [11.3, 6.7])
+        clan.set_rng(MersenneTwister(4))
+        clan.resource_memory[(5, 5)] = 50.0
+        angles = MersenneTwister(4).random_uniform(0, 2*np.pi, size=clan.parameters['perception_radius'] * 2)
+
+        best_score, expected = -1.0, None
+        for angle in angles:
+            direction = np.array([np.cos(angle), np.sin(angle)])
+            cell = self.environment.get_toroidal_position(clan.position + direction * clan.parameters['perception_radius'] * 1.5).astype(int)
+            score = np.mean([self.environment.get_resource(cell + np.array([dx, dy])) for dx in range(-2, 3) for dy in range(-2, 3)])
+            if clan.resource_memory.get(tuple(cell), 0) < 10:
+                score += clan.parameters['exploration_tendency'] * 20
+            if score > best_score:
+                best_score, expected = score, direction
+
+        np.testing.assert_allclose(clan._find_migration_direction(self.environment), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+# clan_territorial_simulation/tests/test_startup.py
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from utils.lazy_imports import lazy_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_probe(code, cwd=ROOT):
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=ROOT))
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return result.stdout.strip().splitlines()[-1]
+
+
+class TestLazyStartup(unittest.TestCase):
+    def test_engine_import_does_not_load_heavy_dependencies(self):
+        output = run_probe(
+            "import sys\n"
+            "import simulation.engine, simulation.vectorized_engine, simulation.ensemble\n"
+            "import analysis.statistics, visualization.charts, utils.logger\n"
+            "print(sorted(m for m in ('pandas', 'scipy', 'plotly') if m in sys.modules))"
+        )
+        self.assertEqual(output, '[]')
+
+    def test_logger_import_has_no_side_effects(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            run_probe("import utils.logger; print('ok')", cwd=cwd)
+            self.assertFalse(os.path.exists(os.path.join(cwd, 'logs')))
+
+    def test_lazy_module_loads_on_first_use(self):
+        module = lazy_import('colorsys')
+        self.assertIsNone(module._module)
+        self.assertEqual(module.rgb_to_hsv(1.0, 0.0, 0.0)[0], 0.0)
+        self.assertIsNotNone(module._module)
+
+
+if __name__ == '__main__':
+    unittest.main()
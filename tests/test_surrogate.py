@@ -0,0 +1,87 @@
+# clan_territorial_simulation/tests/test_surrogate.py
+import unittest
+import numpy as np
+from models import equations
+from analysis.surrogate import (
+    build_parameter_grid, integrate_mean_field, classify_regimes, regime_boundaries,
+    handoff_scenarios, screen_parameters, calibrate_surrogate, REGIMES
+)
+
+INITIAL_CONDITIONS = {
+    'grid_size': (15, 15),
+    'clans': [
+        {'id': 1, 'size': 30, 'position': [3, 3]},
+        {'id': 2, 'size': 25, 'position': [10, 11]}
+    ]
+}
+
+
+class TestMeanFieldIntegration(unittest.TestCase):
+    def test_empty_landscape_follows_logistic_regrowth(self):
+        points, _ = build_parameter_grid(regeneration_rate=[0.2, 0.5, 1.5])
+        result = integrate_mean_field(points, [0, 0], t_end=6.0, dt=0.1, initial_resource=5.0)
+        expected = equations.logistic_step(5.0, points['regeneration_rate'], points['max_resource'], 6.0)
+        np.testing.assert_allclose(result['resource'], expected, rtol=1e-6)
+        np.testing.assert_array_equal(result['regime'], [0, 0, 0])
+
+    def test_well_fed_clan_grows_at_net_birth_rate(self):
+        # Rejilla enorme: el recurso medio apenas cambia y la energía se mantiene al máximo
+        points, _ = build_parameter_grid(birth_rate=[0.1, 0.2], hostility=[0.0])
+        result = integrate_mean_field(points, [20], t_end=5.0, dt=0.1, grid_size=(2000, 2000))
+        np.testing.assert_allclose(result['energy'], 100.0)
+        expected = equations.exponential_step(20.0, points['birth_rate'] - points['natural_death_rate'], 5.0)
+        np.testing.assert_allclose(result['sizes'][:, 0], expected, rtol=1e-6)
+
+    def test_batch_matches_points_integrated_one_by_one(self):
+        points, _ = build_parameter_grid(birth_rate=[0.03, 0.15], aggressiveness=[0.1, 0.9], hostility=[5.0])
+        batch = integrate_mean_field(points, [40, 10, 25], t_end=20.0, grid_size=(10, 10), record_every=10)
+        for index in range(len(points['birth_rate'])):
+            single = integrate_mean_field({name: value[index:index + 1] for name, value in points.items()},
+                                          [40, 10, 25], t_end=20.0, grid_size=(10, 10))
+            np.testing.assert_allclose(batch['sizes'][index], single['sizes'][0], rtol=1e-12)
+            self.assertAlmostEqual(batch['resource'][index], single['resource'][0])
+        self.assertEqual(batch['history']['population'].shape, (10, 4))
+
+
+class TestScreening(unittest.TestCase):
+    def test_regimes_and_boundaries(self):
+        np.testing.assert_array_equal(classify_regimes([[0, 0], [3, 0], [2, 7]]), [0, 1, 2])
+        regimes = np.array([[0, 0, 2], [0, 2, 2]]).ravel()
+        np.testing.assert_array_equal(regime_boundaries(regimes, (2, 3)), [False, True, True, True, True, False])
+
+    def test_screen_hands_boundary_points_to_engine(self):
+        result = screen_parameters(INITIAL_CONDITIONS, t_end=100.0, max_handoff=3,
+                                   birth_rate=np.linspace(0.0, 0.3, 16), regeneration_rate=[0.5, 1.0])
+        regimes = result['regime'].reshape(result['shape'])
+        self.assertEqual(regimes[0, 0], REGIMES.index('extinction'))
+        self.assertEqual(regimes[-1, 0], REGIMES.index('coexistence'))
+        self.assertTrue(result['boundary'].any())
+        self.assertLessEqual(len(result['handoff']), 3)
+        for scenario in result['handoff']:
+            self.assertTrue(result['boundary'][scenario['index']])
+            self.assertEqual(scenario['clan_parameters']['birth_rate'], result['points']['birth_rate'][scenario['index']])
+            self.assertNotIn('hostility', scenario['clan_parameters'])
+        self.assertEqual(handoff_scenarios(result['points'], np.zeros(32, dtype=bool)), [])
+
+
+class TestCalibration(unittest.TestCase):
+    def test_surrogate_tracks_engine_runs(self):
+        points = {'birth_rate': np.array([0.0, 0.2]), 'natural_death_rate': np.array([0.5, 0.05])}
+        calibration = calibrate_surrogate(points, INITIAL_CONDITIONS, num_steps=25, seeds=(0,),
+                                          demographic_integrator='exact', closure_candidates={'forage_rate': [0.5, 1.0, 2.0]})
+        self.assertIn(calibration['closure']['forage_rate'], [0.5, 1.0, 2.0])
+        self.assertEqual(len(calibration['runs']), 2)
+        self.assertLess(np.max(calibration['population_log_error']), 0.5)
+        self.assertLess(np.max(calibration['resource_relative_error']), 0.25)
+        # Con natalidad por debajo de la mortalidad la población decrece en ambos modelos
+        self.assertLess(calibration['observed_population'][0], 20)
+        self.assertLess(calibration['predicted_population'][0], 20)
+        self.assertGreater(calibration['observed_population'][1], 55)
+        self.assertGreater(calibration['predicted_population'][1], 55)
+
+        with self.assertRaises(ValueError):
+            calibrate_surrogate(points, INITIAL_CONDITIONS, num_steps=1, closure_candidates={'birth_rate': [0.1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+# clan_territorial_simulation/tests/test_territory.py
+import unittest
+import numpy as np
+from models.clan import Clan
+from models.environment import Environment
+from models.territory import Territory, TerritoryRaster, NO_OWNER
+from simulation.engine import SimulationEngine
+from simulation.modes import DeterministicMode
+
+
+class TestTerritoryRaster(unittest.TestCase):
+    def test_claims_wrap_and_are_counted(self):
+        raster = TerritoryRaster((10, 8))
+        self.assertEqual(raster.claim(1, [[-1, 0], [9, 0], [10, 9]], strength=2.0), 2)
+        self.assertEqual(raster.owner[9, 0], 1)
+        self.assertEqual(raster.owner[0, 1], 1)
+        self.assertEqual(raster.size_of(1), 2)
+
+    def test_contests_are_decided_by_strength(self):
+        raster = TerritoryRaster((10, 10))
+        raster.claim(1, [[2, 2], [2, 3]], strength=5.0)
+        self.assertEqual(raster.claim(2, [[2, 2]], strength=3.0), 0)
+        self.assertEqual(raster.claim(2, [[2, 3]], strength=8.0), 1)
+        self.assertEqual((raster.size_of(1), raster.size_of(2)), (1, 1))
+
+        without_strength = TerritoryRaster((10, 10), track_strength=False)
+        without_strength.claim(1, [[0, 0]])
+        self.assertEqual(without_strength.claim(2, [[0, 0]], strength=100.0), 0)
+
+    def test_trim_keeps_nearest_cells_on_torus(self):
+        raster = TerritoryRaster((20, 20))
+        raster.claim(1, [[0, 0], [19, 19], [10, 10], [1, 0], [5, 5]])
+        raster.trim(1, 3, [0.2, 0.2])
+        kept = {tuple(cell) for cell in raster.cells_of(1).tolist()}
+        self.assertEqual(kept, {(0, 0), (19, 19), (1, 0)})
+
+    def test_circular_center_across_the_seam(self):
+        raster = TerritoryRaster((20, 20))
+        raster.claim(3, [[19, 5], [0, 5], [1, 5], [19, 6], [0, 6], [1, 6]])
+        size, center = raster.summary()[3]
+        self.assertEqual(size, 6)
+        self.assertAlmostEqual(center[0], 0.0, places=6)
+        self.assertAlmostEqual(center[1], 5.5, places=6)
+
+        raster.release_owners([3])
+        self.assertEqual(raster.size_of(3), 0)
+        self.assertTrue(np.all(raster.owner == NO_OWNER))
+
+    def test_batched_updates_match_rescan(self):
+        rng = np.random.RandomState(4)
+        for shape in [(12, 9), (1, 7), (2, 5)]:
+            raster = TerritoryRaster(shape)
+            for _ in range(150):
+                clan_id = int(rng.randint(1, 4))
+                cells = np.c_[rng.randint(-3, shape[0] + 3, 8), rng.randint(-3, shape[1] + 3, 8)]
+                if rng.rand() < 0.7:
+                    raster.claim(clan_id, cells, strength=float(rng.rand() * 5))
+                else:
+                    raster.release(clan_id, cells)
+                for owner, territory in raster.territories.items():
+                    reference = {tuple(cell) for cell in raster.cells_of(owner).tolist()}
+                    sequential = Territory(shape)
+                    for cell in reference:
+                        sequential.add_cell(cell)
+                    self.assertEqual(territory.controlled_cells, reference)
+                    self.assertEqual(territory.get_perimeter(), rescanned_perimeter(reference, shape))
+                    np.testing.assert_allclose(territory.get_centroid(), sequential.get_centroid(), atol=1e-6)
+
+
+def rescanned_perimeter(cells, grid_size):
+    """Recuento de bordes celda a celda (implementación original de get_perimeter)."""
+    perimeter = 0
+    for x, y in cells:
+        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            if ((x + dx) % grid_size[0], (y + dy) % grid_size[1]) not in cells:
+                perimeter += 1
+    return perimeter
+
+
+class TestIncrementalTerritory(unittest.TestCase):
+    def test_perimeter_and_area_track_random_edits(self):
+        rng = np.random.RandomState(0)
+        for use_bitmap in (False, True):
+            territory = Territory(grid_size=(12, 9), use_bitmap=use_bitmap)
+            reference = set()
+            for _ in range(300):
+                cell = (int(rng.randint(0, 12)), int(rng.randint(0, 9)))
+                if rng.rand() < 0.6:
+                    territory.add_cell(cell)
+                    reference.add(cell)
+                else:
+                    territory.remove_cell(cell)
+                    reference.discard(cell)
+                self.assertEqual(territory.area, len(reference))
+                self.assertEqual(territory.get_perimeter(), rescanned_perimeter(reference, (12, 9)))
+            self.assertEqual(territory.controlled_cells, reference)
+            self.assertEqual(territory.uses_bitmap, use_bitmap)
+
+    def test_switches_to_bitmap_when_large(self):
+        territory = Territory(grid_size=(16, 16))
+        for x in range(5):
+            for y in range(5):
+                territory.add_cell((x, y))
+        self.assertTrue(territory.uses_bitmap)
+        self.assertTrue(territory.contains((20, 4)))
+        self.assertEqual(territory.get_perimeter(), 20)
+        self.assertAlmostEqual(territory.get_compactness(), 4 * np.pi * 25 / 400)
+
+    def test_circular_centroid_and_legacy_mean(self):
+        territory = Territory(grid_size=(20, 20))
+        for cell in [(19, 5), (0, 5), (1, 5), (-1, 6), (20, 6), (21, 6)]:
+            territory.add_cell(cell)
+        np.testing.assert_allclose(territory.get_centroid(), [0.0, 5.5], atol=1e-9)
+
+        legacy = Territory()
+        legacy.add_cell((1, 2))
+        legacy.add_cell((3, 4))
+        np.testing.assert_allclose(legacy.get_centroid(), [2.0, 3.0])
+        info = legacy.get_boundary_info()
+        self.assertEqual((info['territory_size'], info['perimeter_size']), (2, 8))
+
+
+class TestEngineTerritory(unittest.TestCase):
+    def test_engine_shares_raster_and_releases_extinct(self):
+        environment = Environment(grid_size=(30, 30))
+        environment.grid.fill(60.0)
+        clans = [Clan(1, 20, [5, 5], parameters={'territorial_expansion_rate': 1.0}),
+                 Clan(2, 20, [20, 20], parameters={'territorial_expansion_rate': 1.0})]
+        engine = SimulationEngine(environment, clans, DeterministicMode(seed=3))
+        self.assertIs(environment.territory, engine.territory)
+
+        for _ in range(30):
+            engine.step()
+        sizes = {clan.id: clan.get_territory_size() for clan in engine.clans}
+        self.assertTrue(all(size > 0 for size in sizes.values()))
+        self.assertEqual(sizes[1], int((engine.territory.owner == 1).sum()))
+        self.assertEqual(engine.get_simulation_state()['clans'][0]['territory_size'], sizes[1])
+
+        boundaries = engine.get_simulation_state()['territorial_boundaries']
+        self.assertEqual(boundaries[1]['territory_size'], sizes[1])
+        self.assertGreater(boundaries[1]['perimeter_size'], 0)
+
+        engine.clans[0].size = 0
+        engine.step()
+        self.assertEqual(engine.territory.size_of(1), 0)
+
+if __name__ == '__main__':
+    unittest.main()
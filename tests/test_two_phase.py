@@ -0,0 +1,68 @@
+# clan_territorial_simulation/tests/test_two_phase.py
+import contextlib
+import io
+import unittest
+import numpy as np
+from models.clan import Clan
+from models.environment import Environment
+from simulation.engine import create_engine
+from simulation.kernels import consume_proportional
+from simulation.modes import StochasticMode
+from simulation.random_generators import GeneratorRNG
+
+
+def run_engine(order, backend='object', max_workers=None, steps=8):
+    environment = Environment(grid_size=(20, 20))
+    environment.grid = np.random.default_rng(2).uniform(20, 60, (20, 20))
+    environment.set_rng(GeneratorRNG(9))
+    # Varios clanes en las mismas celdas para forzar disputas
+    clans = {clan_id: Clan(clan_id, 15 + clan_id, np.array([2.0 + clan_id % 3, 4.0 + clan_id % 2]))
+             for clan_id in range(1, 9)}
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = create_engine(environment, [clans[clan_id] for clan_id in order], StochasticMode(seed=4),
+                               seed=4, backend=backend, update_scheme='two_phase', max_workers=max_workers)
+        for _ in range(steps):
+            engine.step()
+        engine.close()
+    state = {clan.id: (tuple(clan.position), clan.size, round(clan.energy, 9)) for clan in engine.clans}
+    return state, environment.grid.copy()
+
+
+class TestProportionalCommit(unittest.TestCase):
+    def test_contested_cells_are_shared_proportionally(self):
+        grid = np.array([[6.0, 10.0]])
+        cells = np.array([[0, 0], [0, 0], [0, 1]])
+        consumed = consume_proportional(grid, cells, [4.0, 8.0, 3.0])
+        np.testing.assert_allclose(consumed, [2.0, 4.0, 3.0])
+        np.testing.assert_allclose(grid, [[0.0, 7.0]])
+
+    def test_result_does_not_depend_on_list_order(self):
+        grid = np.full((3, 3), 5.0)
+        cells = np.array([[1, 1], [1, 1], [2, 0]])
+        demand = np.array([4.0, 6.0, 1.0])
+        forward = consume_proportional(grid.copy(), cells, demand)
+        reverse = consume_proportional(grid.copy(), cells[::-1], demand[::-1])
+        np.testing.assert_allclose(forward, reverse[::-1])
+
+
+class TestTwoPhaseEngine(unittest.TestCase):
+    def test_clan_order_does_not_change_results(self):
+        for backend in ('object', 'vectorized'):
+            forward_state, forward_grid = run_engine(list(range(1, 9)), backend)
+            reverse_state, reverse_grid = run_engine(list(range(8, 0, -1)), backend)
+            self.assertEqual(forward_state, reverse_state)
+            np.testing.assert_allclose(forward_grid, reverse_grid)
+
+    def test_thread_count_does_not_change_results(self):
+        serial_state, serial_grid = run_engine(list(range(1, 9)), max_workers=1)
+        threaded_state, threaded_grid = run_engine(list(range(1, 9)), max_workers=4)
+        self.assertEqual(serial_state, threaded_state)
+        np.testing.assert_array_equal(serial_grid, threaded_grid)
+
+    def test_unknown_update_scheme_is_rejected(self):
+        with self.assertRaises(ValueError):
+            create_engine(Environment(grid_size=(5, 5)), [], StochasticMode(seed=1), update_scheme='async')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+# clan_territorial_simulation/tests/test_vectorized_engine.py
+import unittest
+import numpy as np
+from models.clan import Clan
+from models.clan_store import ClanStore
+from models.environment import Environment
+from simulation.engine import SimulationEngine, create_engine
+from simulation.vectorized_engine import VectorizedSimulationEngine
+from simulation.ensemble import EnsembleEngine
+from simulation.modes import DeterministicMode
+from simulation.random_generators import MersenneTwister
+from simulation import kernels
+
+
+def build_scenario(seed=3):
+    environment = Environment(grid_size=(40, 40))
+    environment.set_rng(MersenneTwister(seed))
+    environment.grid = MersenneTwister(seed + 1).random_uniform(30, 80, (40, 40))
+    clans = [Clan(1, 12, [5.5, 5.5]), Clan(2, 8, [25.2, 24.8]), Clan(3, 15, [6.0, 26.0])]
+    return environment, clans
+
+
+class TestClanStore(unittest.TestCase):
+    def test_views_share_array_state(self):
+        store = ClanStore.from_clans([Clan(1, 10, [2, 3]), Clan(2, 5, [7, 1], parameters={'birth_rate': 0.2})])
+        view = store.views[1]
+        self.assertEqual(view.size, 5)
+        self.assertEqual(view.parameters['birth_rate'], 0.2)
+        view.size = 9
+        view.position = np.array([4.0, 4.0])
+        view.state = 'resting'
+        self.assertEqual(store.sizes[1], 9)
+        np.testing.assert_array_equal(store.positions[1], [4.0, 4.0])
+        self.assertEqual(store.state_codes[1], 4)
+        self.assertEqual(view.get_state_info()['state'], 'resting')
+
+    def test_compact_reindexes_views(self):
+        store = ClanStore.from_clans([Clan(i, 10, [i, i]) for i in range(1, 5)])
+        store.sizes[[0, 2]] = 0
+        store.compact(store.sizes > 0)
+        self.assertEqual(len(store), 2)
+        self.assertEqual([view.id for view in store.views], [2, 4])
+        self.assertEqual([view.row for view in store.views], [0, 1])
+        np.testing.assert_array_equal(store.views[1].position, [4, 4])
+
+
+class TestPopulationKernels(unittest.TestCase):
+    def test_consume_in_order_matches_sequential_consume(self):
+        grid = np.array([[5.0, 1.0], [2.0, 0.0]])
+        cells = np.array([[0, 0], [0, 0], [0, 1], [0, 0], [1, 1]])
+        demand = np.array([3.0, 1.5, 2.0, 4.0, 1.0])
+
+        environment = Environment(grid_size=(2, 2))
+        environment.grid = grid.copy()
+        expected = [environment.consume(cell, amount) for cell, amount in zip(cells, demand)]
+
+        consumed = kernels.consume_in_order(grid, cells, demand)
+        np.testing.assert_allclose(consumed, expected)
+        np.testing.assert_allclose(grid, environment.grid)
+
+    def test_consumption_outcome_matches_clan(self):
+        environment = Environment(grid_size=(10, 10))
+        environment.grid.fill(0.4)
+        energies = [0.0, 12.0, 60.0, 95.0]
+        clans = [Clan(i, 20, [i, i]) for i in range(len(energies))]
+        for clan, energy in zip(clans, energies):
+            clan.energy = energy
+
+        store = ClanStore.from_clans([Clan(c.id, c.size, c.position) for c in clans])
+        store.energy[:] = energies
+        for clan in clans:
+            clan._consume_resources(environment, 0.5)
+
+        grid = np.full((10, 10), 0.4)
+        demand = kernels.consumption_demand(store.sizes, store.parameter('resource_required_per_individual'),
+                                            store.parameter('cooperation_tendency'), 0.5)
+        consumed = kernels.consume_in_order(grid, kernels.grid_cells(store.positions, grid.shape), demand)
+        kernels.apply_consumption_outcome(store.sizes, store.energy, consumed, demand,
+                                          store.parameter('birth_rate'), store.parameter('natural_death_rate'), 0.5)
+
+        np.testing.assert_allclose(store.sizes, [clan.size for clan in clans])
+        np.testing.assert_allclose(store.energy, [clan.energy for clan in clans])
+
+
+class TestVectorizedEngine(unittest.TestCase):
+    def test_factory_selects_backend(self):
+        environment, clans = build_scenario()
+        engine = create_engine(environment, clans, DeterministicMode(seed=1), backend='vectorized')
+        self.assertIsInstance(engine, VectorizedSimulationEngine)
+        with self.assertRaises(ValueError):
+            create_engine(environment, clans, DeterministicMode(seed=1), backend='gpu')
+
+    def test_matches_object_engine_for_separated_clans(self):
+        env_a, clans_a = build_scenario()
+        env_b, clans_b = build_scenario()
+        engine_a = SimulationEngine(env_a, clans_a, DeterministicMode(seed=11), dt=0.2)
+        engine_b = VectorizedSimulationEngine(env_b, clans_b, DeterministicMode(seed=11), dt=0.2)
+
+        for _ in range(5):
+            engine_a.step()
+            engine_b.step()
+
+        state_a = engine_a.get_simulation_state()
+        state_b = engine_b.get_simulation_state()
+        self.assertEqual(len(state_a['clans']), len(state_b['clans']))
+        for clan_a, clan_b in zip(state_a['clans'], state_b['clans']):
+            self.assertEqual(clan_a['id'], clan_b['id'])
+            self.assertEqual(clan_a['size'], clan_b['size'])
+            self.assertEqual(clan_a['state'], clan_b['state'])
+            self.assertAlmostEqual(clan_a['energy'], clan_b['energy'])
+            np.testing.assert_allclose(clan_a['position'], clan_b['position'])
+        np.testing.assert_allclose(state_a['resource_grid'], state_b['resource_grid'])
+        self.assertAlmostEqual(state_a['system_metrics']['total_population'],
+                               state_b['system_metrics']['total_population'])
+
+    def test_extinct_clans_are_removed(self):
+        environment, clans = build_scenario()
+        engine = VectorizedSimulationEngine(environment, clans, DeterministicMode(seed=2), dt=0.2)
+        engine.store.sizes[1] = 0
+        engine.step()
+        self.assertEqual([clan.id for clan in engine.clans], [1, 3])
+        self.assertEqual(len(engine.store), 2)
+
+
+class TestEnsembleEngine(unittest.TestCase):
+    def test_replicas_keep_independent_streams(self):
+        environment, clans = build_scenario()
+        ensemble = EnsembleEngine(environment, clans, num_replicas=4, seed=7)
+        single = EnsembleEngine(environment, clans, replica_seeds=[ensemble.replica_seeds[2]])
+        ensemble.run(10)
+        single.run(10)
+
+        np.testing.assert_allclose(ensemble.grids[2], single.grids[0])
+        np.testing.assert_allclose(ensemble.positions[2], single.positions[0])
+        np.testing.assert_allclose(ensemble.sizes[2], single.sizes[0])
+        self.assertFalse(np.allclose(ensemble.grids[0], ensemble.grids[1]))
+
+    def test_noise_free_replicas_stay_identical(self):
+        environment, clans = build_scenario()
+        ensemble = EnsembleEngine(environment, clans, num_replicas=3, seed=1)
+        grids_before = ensemble.grids.copy()
+        ensemble.movement_noise_std = 0.0
+        ensemble.regeneration_rate = 0.0
+        for rng in ensemble.rngs:
+            rng.random_normal = lambda mean, std, size=None: np.zeros(size)
+        ensemble.step()
+
+        # Sin ruido todas las réplicas siguen la misma trayectoria
+        np.testing.assert_allclose(ensemble.grids[0], ensemble.grids[1])
+        np.testing.assert_allclose(ensemble.sizes[0], ensemble.sizes[2])
+        self.assertLess(ensemble.grids.sum(), grids_before.sum())
+
+    def test_extinct_replicas_are_frozen(self):
+        environment, clans = build_scenario()
+        ensemble = EnsembleEngine(environment, clans, num_replicas=3, seed=5)
+        ensemble.sizes[1] = 0
+        ensemble.step()
+        frozen_grid = ensemble.grids[1].copy()
+        frozen_positions = ensemble.positions[1].copy()
+        ensemble.run(5)
+
+        self.assertEqual(ensemble.replica_active.tolist(), [True, False, True])
+        np.testing.assert_array_equal(ensemble.grids[1], frozen_grid)
+        np.testing.assert_array_equal(ensemble.positions[1], frozen_positions)
+        state = ensemble.get_replica_state(1)
+        self.assertEqual(state['system_metrics']['active_clans'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
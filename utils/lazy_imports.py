@@ -0,0 +1,36 @@
+# clan_territorial_simulation/utils/lazy_imports.py
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Módulo que se importa de verdad en el primer acceso a un atributo.
+
+    Permite declarar dependencias pesadas (pandas, scipy, plotly) en la cabecera
+    de un módulo sin pagar su importación hasta que se usan. Si la dependencia
+    no está instalada el error aparece en ese primer uso.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'cargado' if self._module is not None else 'pendiente'
+        return f"LazyModule({self.__name__!r}, {state})"
+
+
+def lazy_import(name):
+    """Referencia perezosa al módulo `name` (se importa en el primer uso)."""
+    return LazyModule(name)
@@ -4,35 +4,46 @@ import os
 from datetime import datetime
 
 LOG_DIR = 'logs'
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
-
-LOG_FILENAME = os.path.join(LOG_DIR, f'simulation_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s')
+# Los manejadores (y el directorio de logs) se crean en el primer mensaje, no al importar
+_configured = False
+LOG_FILENAME = None
+
+
+def get_logger():
+    """Logger de la simulación, configurado con archivo y consola en el primer uso."""
+    global _configured, LOG_FILENAME
+    if not _configured:
+        if not os.path.exists(LOG_DIR):
+            os.makedirs(LOG_DIR)
+        LOG_FILENAME = os.path.join(LOG_DIR, f'simulation_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
+
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s')
 
-file_handler = logging.FileHandler(LOG_FILENAME)
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+        file_handler = logging.FileHandler(LOG_FILENAME)
+        file_handler.setFormatter(formatter)
+        logger.addHandler(file_handler)
 
-stream_handler = logging.StreamHandler()
-stream_handler.setFormatter(formatter)
-logger.addHandler(stream_handler)
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        logger.addHandler(stream_handler)
+        _configured = True
+    return logger
 
 def log_info(message):
-    logger.info(message)
+    get_logger().info(message)
 
 def log_debug(message):
-    logger.debug(message)
+    get_logger().debug(message)
 
 def log_warning(message):
-    logger.warning(message)
+    get_logger().warning(message)
 
 def log_error(message):
-    logger.error(message)
+    get_logger().error(message)
 
 def log_exception(message, exc_info=True):
-    logger.exception(message, exc_info=exc_info)
\ No newline at end of file
+    get_logger().exception(message, exc_info=exc_info)
\ No newline at end of file
@@ -1,8 +1,9 @@
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
-import pandas as pd
-from scipy.ndimage import gaussian_filter
+from utils.lazy_imports import lazy_import
+
+# Dependencias pesadas: se importan en el primer uso
+go = lazy_import('plotly.graph_objects')
+ndimage = lazy_import('scipy.ndimage')
 
 def plot_population_over_time(history):
     """Genera un gráfico de la población de cada clan a lo largo del tiempo."""
@@ -49,7 +50,7 @@ def plot_territory_heatmap(history, last_n_steps=-1, blur_radius=2):
             if 0 <= pos_x < grid_size[0] and 0 <= pos_y < grid_size[1]:
                 clan_presence[pos_y, pos_x] += 1
 
-    blurred_presence = gaussian_filter(clan_presence, sigma=blur_radius)
+    blurred_presence = ndimage.gaussian_filter(clan_presence, sigma=blur_radius)
 
     fig = go.Figure(data=go.Heatmap(z=blurred_presence,
                                    colorscale='Viridis',
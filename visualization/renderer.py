@@ -1,4 +1,5 @@
 import numpy as np
+from models.precision import decode_resource_grid
 
 class SimulationRenderer:
     """Renderizador avanzado para convertir estados de simulación a formato frontend"""
@@ -16,7 +17,8 @@ class SimulationRenderer:
             rendered_state = {
                 'time': simulation_state.get('time', 0),
                 'step': simulation_state.get('step', 0),
-                'resource_grid': self._prepare_resource_grid(simulation_state.get('resource_grid', [])),
+                'resource_grid': self._prepare_resource_grid(
+                    decode_resource_grid(simulation_state) if simulation_state.get('resource_grid') else []),
                 'clans': self._prepare_clans(simulation_state.get('clans', [])),
                 'territorial_map': self._prepare_territorial_map(simulation_state),
                 'emergent_patterns': simulation_state.get('emergent_patterns', []),